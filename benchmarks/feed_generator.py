@@ -0,0 +1,99 @@
+import argparse
+import random
+from datetime import date
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from faker import Faker
+
+WRITE_BATCH = 10_000
+
+
+def generate_feed(
+    path: str | Path,
+    products: int,
+    duplicate_ratio: float = 0.2,
+    categories: int = 20,
+    sale_date: date = date(2024, 1, 1),
+    seed: int = 42,
+    extra_fields: int = 0,
+) -> Path:
+    """
+    Пишет синтетический фид в формате fill_test_db.xml.
+    duplicate_ratio - доля <product>, повторяющих уже встречавшееся имя,
+    categories - число различных категорий,
+    extra_fields - число лишних полей в каждом <product> (широкие записи).
+    Имя, категория и цена выводятся из номера продукта, поэтому повторы
+    не требуют хранить уже выданные имена в памяти.
+    """
+    path = Path(path)
+    faker = Faker()
+    Faker.seed(seed)
+    rnd = random.Random(seed)
+
+    words = list(dict.fromkeys(escape(faker.word().title()) for _ in range(5000)))
+    category_names = [
+        escape(f"{faker.word().title()} {number}") for number in range(categories)
+    ]
+
+    extra = "".join(
+        f"            <attribute_{index}>{words[index % len(words)]}</attribute_{index}>\n"
+        for index in range(extra_fields)
+    )
+
+    def product_row(row_id: int, number: int) -> str:
+        first, second = divmod(number, len(words))
+        name = f"{words[second]} {words[first % len(words)]} {number}"
+        return (
+            "        <product>\n"
+            f"            <id>{row_id}</id>\n"
+            f"            <name>{name}</name>\n"
+            f"            <quantity>{rnd.randint(1, 500)}</quantity>\n"
+            f"            <price>{number % 100_000 + 1}.{number % 100:02d}</price>\n"
+            f"            <category>{category_names[number % categories]}</category>\n"
+            f"{extra}"
+            "        </product>\n"
+        )
+
+    unique = 0
+    with path.open("w", encoding="utf-8") as file:
+        file.write(f'<sales_data date="{sale_date.isoformat()}">\n    <products>\n')
+        batch = []
+        for row_id in range(1, products + 1):
+            if unique and rnd.random() < duplicate_ratio:
+                number = rnd.randrange(unique)
+            else:
+                number = unique
+                unique += 1
+            batch.append(product_row(row_id, number))
+
+            if len(batch) == WRITE_BATCH:
+                file.write("".join(batch))
+                batch.clear()
+        file.write("".join(batch))
+        file.write("    </products>\n</sales_data>\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic sales feed")
+    parser.add_argument("path")
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.2)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--extra-fields", type=int, default=0)
+    args = parser.parse_args()
+
+    generate_feed(
+        path=args.path,
+        products=args.products,
+        duplicate_ratio=args.duplicate_ratio,
+        categories=args.categories,
+        seed=args.seed,
+        extra_fields=args.extra_fields,
+    )
+
+
+if __name__ == "__main__":
+    main()
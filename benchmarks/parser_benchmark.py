@@ -0,0 +1,215 @@
+import argparse
+import json
+import logging
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.feed_generator import generate_feed
+# Импорт на уровне модуля: время импорта не входит в замер разбора
+from src.logic.other.decompression import map_feed
+from src.logic.parser_engines import TargetParserEngine
+from src.logic.xml_parser import LXMLParser
+
+DEFAULT_SIZES = (10_000, 1_000_000, 10_000_000)
+INCREMENTAL_CHUNK_SIZE = 64 * 1024
+
+
+def run_parsing(path: Path) -> int:
+    return len(LXMLParser.parsing(path.read_text(encoding="utf-8")))
+
+
+def run_streaming_parsing(path: Path) -> int:
+    return len(LXMLParser.streaming_parsing(str(path)))
+
+
+def run_incremental_parsing(path: Path) -> int:
+    parser = LXMLParser.incremental_parsing()
+    with path.open("rb") as file:
+        while chunk := file.read(INCREMENTAL_CHUNK_SIZE):
+            parser.feed(chunk)
+    return len(parser.close())
+
+
+def run_sharded_parsing(path: Path) -> int:
+    with map_feed(path) as lxml_data:
+        return len(LXMLParser.sharded_parsing(lxml_data, path=str(path)))
+
+
+def run_columnar_parsing(path: Path) -> int:
+    return len(LXMLParser.columnar_parsing(str(path)))
+
+
+def run_target_parsing(path: Path) -> int:
+    return len(TargetParserEngine().parse(str(path)))
+
+
+def run_target_incremental_parsing(path: Path) -> int:
+    parser = TargetParserEngine().incremental()
+    with path.open("rb") as file:
+        while chunk := file.read(INCREMENTAL_CHUNK_SIZE):
+            parser.feed(chunk)
+    return len(parser.close())
+
+
+MODES: dict[str, Callable[[Path], int]] = {
+    "parsing": run_parsing,
+    "streaming_parsing": run_streaming_parsing,
+    "incremental_parsing": run_incremental_parsing,
+    "sharded_parsing": run_sharded_parsing,
+    "columnar_parsing": run_columnar_parsing,
+    "target_parsing": run_target_parsing,
+    "target_incremental_parsing": run_target_incremental_parsing,
+}
+
+
+def measure(mode: str, path: Path) -> dict[str, Any]:
+    # Запускается в отдельном процессе, чтобы ru_maxrss относился к одному режиму
+    logging.disable(logging.WARNING)
+    started = time.perf_counter()
+    unique_products = MODES[mode](path)
+    elapsed = time.perf_counter() - started
+
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "unique_products": unique_products,
+        "seconds": elapsed,
+        # На Linux ru_maxrss в килобайтах
+        "peak_rss_mb": max(own, children) / 1024,
+    }
+
+
+def run_in_subprocess(mode: str, path: Path) -> dict[str, Any]:
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.parser_benchmark",
+            "--measure",
+            mode,
+            str(path),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def get_revision() -> str | None:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def get_feed(
+    feed_dir: Path,
+    products: int,
+    duplicate_ratio: float,
+    categories: int,
+    extra_fields: int = 0,
+) -> Path:
+    path = (
+        feed_dir
+        / f"feed_{products}_{duplicate_ratio}_{categories}_{extra_fields}.xml"
+    )
+    if not path.exists():
+        generate_feed(
+            path=path,
+            products=products,
+            duplicate_ratio=duplicate_ratio,
+            categories=categories,
+            extra_fields=extra_fields,
+        )
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LXMLParser parse modes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--duplicate-ratio", type=float, default=0.2)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument(
+        "--extra-fields",
+        type=int,
+        nargs="+",
+        default=[0],
+        help="feed shapes: number of extra elements per <product>",
+    )
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--feed-dir", type=Path, default=Path("benchmarks/feeds"))
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="jsonl file the results are appended to, stdout by default",
+    )
+    parser.add_argument(
+        "--measure", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.measure:
+        mode, path = args.measure
+        print(json.dumps(measure(mode, Path(path))))
+        return
+
+    args.feed_dir.mkdir(parents=True, exist_ok=True)
+    started_at = datetime.now(timezone.utc).isoformat()
+    revision = get_revision()
+
+    shapes = [
+        (products, extra_fields)
+        for products in args.sizes
+        for extra_fields in args.extra_fields
+    ]
+    for products, extra_fields in shapes:
+        path = get_feed(
+            feed_dir=args.feed_dir,
+            products=products,
+            duplicate_ratio=args.duplicate_ratio,
+            categories=args.categories,
+            extra_fields=extra_fields,
+        )
+        size_mb = path.stat().st_size / 1024 / 1024
+
+        for mode in args.modes:
+            result = run_in_subprocess(mode, path)
+            record = {
+                "started_at": started_at,
+                "revision": revision,
+                "python": platform.python_version(),
+                "mode": mode,
+                "products": products,
+                "duplicate_ratio": args.duplicate_ratio,
+                "categories": args.categories,
+                "extra_fields": extra_fields,
+                "feed_mb": round(size_mb, 3),
+                "unique_products": result["unique_products"],
+                "seconds": round(result["seconds"], 4),
+                "products_per_second": round(products / result["seconds"], 1),
+                "mb_per_second": round(size_mb / result["seconds"], 3),
+                "peak_rss_mb": round(result["peak_rss_mb"], 1),
+            }
+            line = json.dumps(record)
+            if args.output:
+                with args.output.open("a", encoding="utf-8") as file:
+                    file.write(line + "\n")
+            print(line, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
+import argparse
 import asyncio
 from contextlib import asynccontextmanager
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 
 from src.common.settings.config import ProjectSettings
+from src.infra.db.postgres.db import AsyncPostgresClient
 from src.infra.db.postgres.models.base import Base
 from src.logic.container import init_container
+from src.logic.parser_engines import PARSER_ENGINES
 from src.logic.use_case.product_category import ParseAndCreateProductCategoryUseCase
 
 
@@ -35,23 +38,58 @@ async def make_migrations():
             await conn.run_sync(Base.metadata.create_all)
 
 
-async def fill_db():
+async def fill_db(
+    path: str = "fill_test_db.xml",
+    sharded: bool = False,
+    delta: bool = False,
+    engine: str | None = None,
+    columnar: bool = False,
+):
     await make_migrations()
     create_product_category_usecase: ParseAndCreateProductCategoryUseCase = (
         init_container().resolve(ParseAndCreateProductCategoryUseCase)
     )
-    file = open("fill_test_db.xml", mode="r", encoding="utf-8")
+    # Файл читает сам lxml (или mmap для sharded), без промежуточной строки в Python
     try:
-        file_content = file.read()
-        await create_product_category_usecase.parse_and_create(lxml_data=file_content)
-    except Exception as e:
-        raise e
+        return await create_product_category_usecase.parse_file_and_create(
+            path=path, sharded=sharded, delta=delta, engine=engine, columnar=columnar
+        )
     finally:
-        file.close()
+        await init_container().resolve(AsyncPostgresClient).dispose()
 
 
 async def main():
-    return await fill_db()
+    parser = argparse.ArgumentParser(description="Load xml feed file into database")
+    parser.add_argument("path", nargs="?", default="fill_test_db.xml")
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="parse an uncompressed file in a process pool instead of streaming",
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="replace already loaded products of the feed sale date with the feed",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=list(PARSER_ENGINES),
+        default=None,
+        help="parser engine, PARSER_ENGINE setting by default",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="parse into columns instead of an entity per product",
+    )
+    args = parser.parse_args()
+    return await fill_db(
+        path=args.path,
+        sharded=args.sharded,
+        delta=args.delta,
+        engine=args.engine,
+        columnar=args.columnar,
+    )
 
 
 if __name__ == "__main__":
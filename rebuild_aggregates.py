@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+
+from src.infra.db.postgres.db import AsyncPostgresClient
+from src.logic.container import init_container
+from src.logic.repo_service.aggregate_service import DailyAggregateService
+
+
+"""
+
+Пересчёт дневных агрегатов из products, например после ручных правок в базе.
+С --check только выводит даты, где агрегаты разошлись с products.
+
+"""
+
+
+async def rebuild_aggregates(check: bool = False):
+    service: DailyAggregateService = init_container().resolve(DailyAggregateService)
+    try:
+        if check:
+            return await service.check()
+        await service.rebuild()
+        return await service.check()
+    finally:
+        await init_container().resolve(AsyncPostgresClient).dispose()
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild daily aggregate tables from products"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only report dates whose aggregates differ from products",
+    )
+    args = parser.parse_args()
+    mismatched = await rebuild_aggregates(check=args.check)
+    print(f"Mismatched dates: {[day.isoformat() for day in mismatched]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
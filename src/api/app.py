@@ -1,22 +1,33 @@
+from typing import Any
+
 from fastapi import FastAPI
 
-from src.api.lifespan import run_migrations
+from src.api.lifespan import lifespan
 from src.api.routers.routers.xml_handlers import router as api_router
+from src.infra.db.postgres.db import AsyncPostgresClient
+from src.logic.container import init_container
 
 
 def get_app():
     app = FastAPI(
         title="API",
         description="API for parsing xml and generating summary with gpt",
+        lifespan=lifespan,
     )
     app.include_router(api_router)
 
-    @app.on_event("startup")
-    async def on_startup():
-        await run_migrations()
-
     @app.get("/")
     async def healtcheck() -> dict[str, bool]:
         return {"Success": True}
 
+    @app.get("/pool_stats")
+    async def pool_stats() -> dict[str, Any]:
+        # Размер пула postgres, занятые соединения и время ожидания checkout
+        return init_container().resolve(AsyncPostgresClient).pool_stats()
+
+    @app.get("/statement_cache_stats")
+    async def statement_cache_stats() -> dict[str, Any]:
+        # Доля запросов, взятых из кэша скомпилированных выражений
+        return init_container().resolve(AsyncPostgresClient).statement_cache_stats()
+
     return app
@@ -1,9 +1,31 @@
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+from src.infra.db.mongo.db import AsyncMongoClient
 from src.infra.db.postgres.db import AsyncPostgresClient
+from src.logic.other.http_client import HttpClient
 from src.infra.db.postgres.models.base import Base
 from src.logic.container import init_container
+from src.logic.repo_service.partition_service import ProductPartitionService
 
 
 async def run_migrations():
     client: AsyncPostgresClient = init_container().resolve(AsyncPostgresClient)
     async with client.get_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # create_all создаёт только родительскую таблицу products, без секций
+    await init_container().resolve(ProductPartitionService).maintain()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Пул postgres и клиент mongo создаются здесь, http - при первом запросе;
+    # все живут до остановки приложения
+    await run_migrations()
+    mongo_client: AsyncMongoClient = init_container().resolve(AsyncMongoClient)
+    await mongo_client.connect()
+    yield
+    await init_container().resolve(AsyncPostgresClient).dispose()
+    mongo_client.close()
+    await init_container().resolve(HttpClient).close()
@@ -10,9 +10,8 @@ from src.domain.schemas.response_schema import (
     ResponseSchema,
 )
 from src.domain.schemas.xml_schemas import XMLSchema
-from src.infra.celery.tasks import start_parse_xml_and_save_products
+from src.infra.celery.tasks import start_download_parse_and_save_products
 from src.logic.container import init_container
-from src.logic.other.http_client import HttpClient
 from src.logic.repo_service.mongo_service import MongoService
 
 router = APIRouter(prefix="/api", tags=["api"])
@@ -25,31 +24,19 @@ router = APIRouter(prefix="/api", tags=["api"])
 )
 async def create_summary(
     schema: XMLSchema,
-    client: HttpClient = Depends(HttpClient),
 ) -> ResponseOutSchema:
-    try:
-        response = await client.make_get_request_and_download(url=schema.url)
-        start_parse_xml_and_save_products.apply_async(args=[response])
-
-        return ResponseOutSchema(
-            status_code=StatusCodeSchema(status_code=200),
-            description=DescriptionSchema(description=""),
-            extra=ExtraSchema(
-                extra="U can search answer after on date, example='2024-01-01'"
-            ),
-            text=ResponseSchema(text="Task pending"),
-        )
+    start_download_parse_and_save_products.apply_async(
+        args=[schema.url], kwargs={"delta": schema.delta}
+    )
 
-    except HTTPError:
-        raise HTTPException(
-            status_code=404,
-            detail=ResponseOutSchema(
-                status_code=StatusCodeSchema(status_code=404),
-                description=DescriptionSchema(description=""),
-                extra=ExtraSchema(extra=""),
-                text=ResponseSchema(text="Wrong url"),
-            ),
-        )
+    return ResponseOutSchema(
+        status_code=StatusCodeSchema(status_code=200),
+        description=DescriptionSchema(description=""),
+        extra=ExtraSchema(
+            extra="U can search answer after on date, example='2024-01-01'"
+        ),
+        text=ResponseSchema(text="Task pending"),
+    )
 
 
 @router.get(
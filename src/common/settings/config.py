@@ -14,6 +14,27 @@ class ProjectSettings(BaseSettings):
     postgres_host: str = Field(alias="POSTGRES_HOST")
     postgres_port: str = Field(alias="POSTGRES_PORT")
     postgres_name: str = Field(alias="POSTGRES_NAME")
+    postgres_pool_size: int = Field(default=5, alias="POSTGRES_POOL_SIZE")
+    postgres_max_overflow: int = Field(default=10, alias="POSTGRES_MAX_OVERFLOW")
+    postgres_pool_timeout: float = Field(default=30, alias="POSTGRES_POOL_TIMEOUT")
+    postgres_pool_recycle: int = Field(default=30 * 60, alias="POSTGRES_POOL_RECYCLE")
+    postgres_pool_pre_ping: bool = Field(default=True, alias="POSTGRES_POOL_PRE_PING")
+    # 0 отключает кэш подготовленных выражений asyncpg (нужно за pgbouncer)
+    postgres_statement_cache_size: int = Field(
+        default=100, alias="POSTGRES_STATEMENT_CACHE_SIZE"
+    )
+    # Месячные секции products: сколько создавать заранее и сколько хранить
+    # (None - хранить всё)
+    products_partitions_ahead: int = Field(
+        default=3, alias="PRODUCTS_PARTITIONS_AHEAD"
+    )
+    products_retention_months: int | None = Field(
+        default=None, alias="PRODUCTS_RETENTION_MONTHS"
+    )
+    # Кэш скомпилированных запросов SQLAlchemy на движок
+    postgres_query_cache_size: int = Field(
+        default=500, alias="POSTGRES_QUERY_CACHE_SIZE"
+    )
 
     mongo_database: str = Field(alias="MONGO_DATABASE")
     mongo_user: str = Field(alias="MONGO_INITDB_ROOT_USERNAME")
@@ -22,6 +43,19 @@ class ProjectSettings(BaseSettings):
     mongo_port: str = Field(alias="MONGO_INITDB_PORT")
     mongo_db_name: str = Field(alias="MONGO_INITDB_DATABASE")
     mongo_collection: str = Field(alias="MONGO_COLLECTION")
+    mongo_max_pool_size: int = Field(default=100, alias="MONGO_MAX_POOL_SIZE")
+    mongo_min_pool_size: int = Field(default=0, alias="MONGO_MIN_POOL_SIZE")
+    mongo_max_idle_time_ms: int | None = Field(
+        default=None, alias="MONGO_MAX_IDLE_TIME_MS"
+    )
+    mongo_connect_timeout_ms: int = Field(
+        default=20_000, alias="MONGO_CONNECT_TIMEOUT_MS"
+    )
+    mongo_server_selection_timeout_ms: int = Field(
+        default=30_000, alias="MONGO_SERVER_SELECTION_TIMEOUT_MS"
+    )
+    # Например "zstd,snappy,zlib", пусто - без сжатия
+    mongo_compressors: str = Field(default="", alias="MONGO_COMPRESSORS")
 
     broker: str = Field(alias="BROKER")
     redis_host: str = Field(alias="REDIS_HOST")
@@ -29,6 +63,37 @@ class ProjectSettings(BaseSettings):
 
     celery_name: str = Field(alias="CELERY_NAME")
 
+    http_max_connections: int = Field(default=100, alias="HTTP_MAX_CONNECTIONS")
+    http_max_keepalive_connections: int = Field(
+        default=20, alias="HTTP_MAX_KEEPALIVE_CONNECTIONS"
+    )
+    http_keepalive_expiry: float = Field(default=5.0, alias="HTTP_KEEPALIVE_EXPIRY")
+    http_timeout: float = Field(default=100, alias="HTTP_TIMEOUT")
+    http_connect_timeout: float = Field(default=10, alias="HTTP_CONNECT_TIMEOUT")
+    # Нужен пакет h2, без него остаётся HTTP/1.1
+    http2: bool = Field(default=False, alias="HTTP2")
+    # Предел распакованного размера скачиваемого фида, пусто - без предела
+    feed_max_download_size: int | None = Field(
+        default=2 * 1024 * 1024 * 1024, alias="FEED_MAX_DOWNLOAD_SIZE"
+    )
+
+    feed_digest_ttl: int = Field(default=24 * 60 * 60, alias="FEED_DIGEST_TTL")
+    feed_in_flight_ttl: int = Field(default=60 * 60, alias="FEED_IN_FLIGHT_TTL")
+    # Продуктов в одной транзакции при загрузке фида, пусто - весь фид
+    ingest_chunk_size: int | None = Field(default=10_000, alias="INGEST_CHUNK_SIZE")
+    ingest_chunk_retries: int = Field(default=3, alias="INGEST_CHUNK_RETRIES")
+    # Чанков, которые пишутся одновременно, и чанков, ждущих записи
+    ingest_concurrency: int = Field(default=4, alias="INGEST_CONCURRENCY")
+    ingest_queue_size: int = Field(default=8, alias="INGEST_QUEUE_SIZE")
+    category_cache_size: int = Field(default=1024, alias="CATEGORY_CACHE_SIZE")
+    category_cache_ttl: int = Field(default=24 * 60 * 60, alias="CATEGORY_CACHE_TTL")
+    # tree | target, см. src.logic.parser_engines
+    parser_engine: str = Field(default="tree", alias="PARSER_ENGINE")
+    # Фиды от этого числа продуктов пишутся в базу через COPY
+    copy_loader_threshold: int | None = Field(
+        default=100_000, alias="COPY_LOADER_THRESHOLD"
+    )
+
     yandex_oauth_json: dict = Field(alias="YANDEX_OAUTH_JSON")
 
     gpt_url: str = Field(alias="GPT_URL")
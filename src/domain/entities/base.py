@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, MISSING
+from functools import cache
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class BaseEntity(ABC):
 
     def __post_init__(self):
@@ -15,3 +16,28 @@ class BaseEntity(ABC):
     @abstractmethod
     def to_dict(self):
         ...
+
+    @classmethod
+    def from_trusted(cls, **values):
+        # Сборка из уже проверенных данных (например, строк из базы) без validate
+        entity = object.__new__(cls)
+        for name, default, default_factory in _trusted_fields(cls):
+            if name in values:
+                value = values[name]
+            elif default is not MISSING:
+                value = default
+            elif default_factory is not MISSING:
+                value = default_factory()
+            else:
+                raise TypeError(f"{cls.__name__}.from_trusted() missing field {name!r}")
+            object.__setattr__(entity, name, value)
+        return entity
+
+
+@cache
+def _trusted_fields(cls: type) -> tuple[tuple[str, object, object], ...]:
+    # Поля датакласса разбираются один раз на класс
+    return tuple(
+        (entity_field.name, entity_field.default, entity_field.default_factory)
+        for entity_field in fields(cls)
+    )
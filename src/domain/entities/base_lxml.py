@@ -1,4 +1,5 @@
 import uuid
+from array import array
 from dataclasses import dataclass, field
 from datetime import datetime, date
 from typing import Optional, Any
@@ -12,16 +13,23 @@ from src.domain.entities.lxml_entities import (
     PriceEntity,
     ProductIdEntity,
 )
+from src.domain.exceptions.entities import (
+    ColumnsLengthMismatchException,
+    ProductLengthTooShortException,
+    ProductLengthTooLongException,
+    TooSmallQuantityException,
+    TooSmallPriceException,
+)
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class BaseModelEntity:
     id: uuid
     created_at: datetime
     updated_at: datetime
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class BaseLxmlEntity(BaseEntity):
     product: ProductEntity
     sale_date: date
@@ -44,7 +52,92 @@ class BaseLxmlEntity(BaseEntity):
         }
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
+class ProductColumnsEntity(BaseEntity):
+    sale_date: date
+    products: list[str] = field(default_factory=list)
+    categories: list[str] = field(default_factory=list)
+    quantities: array = field(default_factory=lambda: array("q"))
+    prices: array = field(default_factory=lambda: array("q"))
+
+    def __post_init__(self):
+        self.validate()
+
+    def __len__(self):
+        return len(self.products)
+
+    def chunk(self, start: int, stop: int) -> "ProductColumnsEntity":
+        # Срез уже проверенных колонок повторно не валидируется
+        return ProductColumnsEntity.from_trusted(
+            sale_date=self.sale_date,
+            products=self.products[start:stop],
+            categories=self.categories[start:stop],
+            quantities=self.quantities[start:stop],
+            prices=self.prices[start:stop],
+        )
+
+    def validate(self):
+        # Проверяем колонки целиком, а не каждую строку отдельной сущностью
+        lengths = {
+            len(self.products),
+            len(self.categories),
+            len(self.quantities),
+            len(self.prices),
+        }
+        if len(lengths) > 1:
+            raise ColumnsLengthMismatchException(sorted(lengths))
+
+        if not self.products:
+            return
+
+        shortest = min(self.products, key=len)
+        if len(shortest) < 1:
+            raise ProductLengthTooShortException(shortest)
+
+        longest = max(self.products, key=len)
+        if len(longest) > 100:
+            raise ProductLengthTooLongException(longest)
+
+        if (quantity := min(self.quantities)) <= 0:
+            raise TooSmallQuantityException(quantity)
+
+        if (price := min(self.prices)) < 0:
+            raise TooSmallPriceException(price)
+
+    def to_dict(self):
+        return {
+            "sale_date": self.sale_date,
+            "product": self.products,
+            "category_name": self.categories,
+            "quantity": self.quantities,
+            "price": self.prices,
+        }
+
+
+@dataclass(eq=False, slots=True)
+class ProductDeltaEntity(BaseEntity):
+    sale_date: date
+    inserts: list[BaseLxmlEntity] = field(default_factory=list)
+    # (id строки в products, новые значения)
+    updates: list[tuple[Any, BaseLxmlEntity]] = field(default_factory=list)
+    # id строк в products
+    deletes: list[Any] = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.inserts) + len(self.updates) + len(self.deletes)
+
+    def validate(self): ...
+
+    def to_dict(self):
+        return {
+            "sale_date": self.sale_date,
+            "inserts": self.inserts,
+            "updates": self.updates,
+            "deletes": self.deletes,
+        }
+
+
+@dataclass(eq=False, slots=True)
 class ProductModelWithId(BaseEntity, BaseModelEntity):
     sale_date: date
     product: ProductEntity
@@ -74,7 +167,7 @@ class ProductModelWithId(BaseEntity, BaseModelEntity):
         }
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class ProductEntityWithCategoryId(BaseEntity):
     category_id: uuid
     sale_date: date
@@ -98,7 +191,7 @@ class ProductEntityWithCategoryId(BaseEntity):
         }
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class ProductEntityWithoutCategoryId(BaseEntity):
     sale_date: date
     product: ProductEntity
@@ -120,7 +213,7 @@ class ProductEntityWithoutCategoryId(BaseEntity):
         }
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class ProductQuery(BaseEntity):
     sale_date: date | None = field(default=None)
     product: str | None = field(default=None)
@@ -147,7 +240,7 @@ class ProductQuery(BaseEntity):
         }
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class CategoryModelWithId(BaseEntity, BaseModelEntity):
     name: str
 
@@ -166,7 +259,7 @@ class CategoryModelWithId(BaseEntity, BaseModelEntity):
         }
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class GPTAnswerEntity(BaseEntity):
     sale_date: str | date
     answer: str
@@ -179,7 +272,7 @@ class GPTAnswerEntity(BaseEntity):
         return {"sale_date": self.sale_date, "answer": self.answer}
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class GPTAnswerModel(BaseEntity):
     sale_date: str
     answer: str
@@ -11,7 +11,7 @@ from src.domain.exceptions.entities import (
 )
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class ProductEntity(BaseEntity):
     name: str
 
@@ -26,7 +26,7 @@ class ProductEntity(BaseEntity):
         return {"name": self.name}
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class ProductIdEntity(BaseEntity):
     product_id: Optional[uuid] = field(default_factory=uuid.uuid4)
 
@@ -36,7 +36,7 @@ class ProductIdEntity(BaseEntity):
         return {"product_id": self.product_id}
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class QuantityEntity(BaseEntity):
     quantity: int
 
@@ -48,7 +48,7 @@ class QuantityEntity(BaseEntity):
         return {"name": self.quantity}
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class PriceEntity(BaseEntity):
     price: int
 
@@ -60,7 +60,7 @@ class PriceEntity(BaseEntity):
         return {"name": self.price}
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class CategoryEntity(BaseEntity):
     name: str | None = ""
 
@@ -70,7 +70,7 @@ class CategoryEntity(BaseEntity):
         return {"name": self.name}
 
 
-@dataclass(eq=False)
+@dataclass(eq=False, slots=True)
 class CategoryQuery(BaseEntity):
     name: str | None = ""
 
@@ -39,3 +39,11 @@ class TooSmallPriceException(CommonException):
     @property
     def message(self):
         return f"Price too small exception {self.data} < 0"
+
+
+class ColumnsLengthMismatchException(CommonException):
+    data: str
+
+    @property
+    def message(self):
+        return f"Columns must have the same length {self.data}"
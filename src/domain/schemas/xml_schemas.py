@@ -16,6 +16,8 @@ class ProductSchema(BaseModel):
 
 class XMLSchema(BaseModel):
     url: str
+    # Фид заменяет уже загруженные данные за свою дату
+    delta: bool = False
 
 
 class GPTSchemaIn(BaseModel):
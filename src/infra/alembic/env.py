@@ -10,6 +10,8 @@ from alembic import context
 from src.common.settings.config import get_settings
 from src.infra.db.postgres.models.base import Base
 from src.infra.db.postgres.models.lxml_models import *  # noqa
+from src.infra.db.postgres.models.feed_models import *  # noqa
+from src.infra.db.postgres.models.aggregate_models import *  # noqa
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
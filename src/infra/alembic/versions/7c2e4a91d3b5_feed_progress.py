@@ -0,0 +1,34 @@
+"""feed progress
+
+Revision ID: 7c2e4a91d3b5
+Revises: 215fd06a32d6
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e4a91d3b5'
+down_revision: Union[str, None] = '215fd06a32d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('feed_progress',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('committed_rows', sa.Integer(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('digest')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('feed_progress')
@@ -0,0 +1,35 @@
+"""staged rows of feeds written while parsing
+
+Revision ID: a6d3e9b1c4f7
+Revises: f3a9c6d2b814
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3e9b1c4f7'
+down_revision: Union[str, None] = 'f3a9c6d2b814'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('feed_staged_products',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('ordinal', sa.BigInteger(), nullable=False),
+    sa.Column('product', sa.String(), nullable=False),
+    sa.Column('category_id', sa.UUID(), nullable=False),
+    sa.Column('sale_date', sa.Date(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('digest', 'ordinal')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('feed_staged_products')
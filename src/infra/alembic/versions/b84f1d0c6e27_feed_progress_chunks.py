@@ -0,0 +1,41 @@
+"""feed progress chunks
+
+Revision ID: b84f1d0c6e27
+Revises: 7c2e4a91d3b5
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b84f1d0c6e27'
+down_revision: Union[str, None] = '7c2e4a91d3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Прогресс незавершённых фидов не переносится: такие фиды загрузятся заново
+    op.execute('DELETE FROM feed_progress')
+    op.drop_constraint('feed_progress_digest_key', 'feed_progress', type_='unique')
+    op.drop_column('feed_progress', 'committed_rows')
+    op.add_column('feed_progress', sa.Column('chunk_index', sa.Integer(), nullable=False))
+    op.add_column('feed_progress', sa.Column('chunk_size', sa.Integer(), nullable=False))
+    op.add_column('feed_progress', sa.Column('products', sa.Integer(), nullable=False))
+    op.create_unique_constraint(
+        'uq_feed_progress_chunk', 'feed_progress', ['digest', 'chunk_index']
+    )
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM feed_progress')
+    op.drop_constraint('uq_feed_progress_chunk', 'feed_progress', type_='unique')
+    op.drop_column('feed_progress', 'products')
+    op.drop_column('feed_progress', 'chunk_size')
+    op.drop_column('feed_progress', 'chunk_index')
+    op.add_column('feed_progress', sa.Column('committed_rows', sa.Integer(), nullable=False))
+    op.create_unique_constraint('feed_progress_digest_key', 'feed_progress', ['digest'])
@@ -0,0 +1,91 @@
+"""partition products by sale_date month
+
+Revision ID: d41a7c2e9f30
+Revises: b84f1d0c6e27
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7c2e9f30'
+down_revision: Union[str, None] = 'b84f1d0c6e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = 'sale_date, product, price, quantity, category_id, id, created_at, updated_at'
+
+# Секции на каждый месяц с данными и на три месяца вперёд, имена как у
+# PartitionRepository.partition_name: products_y2024m01
+CREATE_PARTITIONS = """
+DO $$
+DECLARE month date;
+BEGIN
+    FOR month IN
+        SELECT DISTINCT date_trunc('month', sale_date)::date FROM products_unpartitioned
+        UNION
+        SELECT generate_series(
+            date_trunc('month', LOCALTIMESTAMP),
+            date_trunc('month', LOCALTIMESTAMP) + interval '3 months',
+            interval '1 month'
+        )::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF products FOR VALUES FROM (%L) TO (%L)',
+            'products_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+            month,
+            (month + interval '1 month')::date
+        );
+    END LOOP;
+END $$
+"""
+
+
+def create_products_table(primary_key: list[str], **kwargs) -> None:
+    op.create_table('products',
+    sa.Column('sale_date', sa.Date(), nullable=False),
+    sa.Column('product', sa.String(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.PrimaryKeyConstraint(*primary_key, name='products_pkey'),
+    sa.UniqueConstraint('product', 'category_id', 'sale_date', name='uq_product_category_date'),
+    **kwargs,
+    )
+
+
+def upgrade() -> None:
+    # Имена индексов уникальны в схеме, поэтому старые ограничения переименовываются
+    op.rename_table('products', 'products_unpartitioned')
+    op.execute('ALTER TABLE products_unpartitioned RENAME CONSTRAINT products_pkey TO products_unpartitioned_pkey')
+    op.execute('ALTER TABLE products_unpartitioned RENAME CONSTRAINT uq_product_category_date TO uq_products_unpartitioned')
+
+    # Ключ секционирования должен входить в первичный ключ
+    create_products_table(
+        primary_key=['id', 'sale_date'],
+        postgresql_partition_by='RANGE (sale_date)',
+    )
+    op.execute(CREATE_PARTITIONS)
+
+    op.execute(f'INSERT INTO products ({COLUMNS}) SELECT {COLUMNS} FROM products_unpartitioned')
+    op.drop_table('products_unpartitioned')
+
+
+def downgrade() -> None:
+    op.rename_table('products', 'products_partitioned')
+    op.execute('ALTER TABLE products_partitioned RENAME CONSTRAINT products_pkey TO products_partitioned_pkey')
+    op.execute('ALTER TABLE products_partitioned RENAME CONSTRAINT uq_product_category_date TO uq_products_partitioned')
+
+    create_products_table(primary_key=['id'])
+
+    op.execute(f'INSERT INTO products ({COLUMNS}) SELECT {COLUMNS} FROM products_partitioned')
+    # Секции удаляются вместе с родительской таблицей
+    op.drop_table('products_partitioned')
@@ -0,0 +1,38 @@
+"""products indexes for date analytics and category lookups
+
+Revision ID: e5b2f8a1c7d4
+Revises: d41a7c2e9f30
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2f8a1c7d4'
+down_revision: Union[str, None] = 'd41a7c2e9f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Индекс на секционированной таблице создаётся на каждой секции и на будущих;
+    # CONCURRENTLY для родительской таблицы PostgreSQL не поддерживает
+    op.create_index(
+        'ix_products_sale_date_brin', 'products', ['sale_date'],
+        postgresql_using='brin',
+    )
+    op.create_index(
+        'ix_products_sale_date_product', 'products', ['sale_date', 'product'],
+        postgresql_include=['quantity', 'price', 'category_id'],
+    )
+    op.create_index('ix_products_category_id', 'products', ['category_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_category_id', table_name='products')
+    op.drop_index('ix_products_sale_date_product', table_name='products')
+    op.drop_index('ix_products_sale_date_brin', table_name='products')
@@ -0,0 +1,59 @@
+"""daily aggregate tables for date analytics
+
+Revision ID: f3a9c6d2b814
+Revises: e5b2f8a1c7d4
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c6d2b814'
+down_revision: Union[str, None] = 'e5b2f8a1c7d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_revenue',
+    sa.Column('sale_date', sa.Date(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('sale_date')
+    )
+    op.create_table('daily_product_sales',
+    sa.Column('sale_date', sa.Date(), nullable=False),
+    sa.Column('product', sa.String(), nullable=False),
+    sa.Column('quantity', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('sale_date', 'product')
+    )
+    op.create_table('daily_category_revenue',
+    sa.Column('sale_date', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.UUID(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('sale_date', 'category_id')
+    )
+
+    # Агрегаты уже загруженных данных, дальше их поддерживают записи products
+    op.execute(
+        'INSERT INTO daily_revenue (sale_date, revenue) '
+        'SELECT sale_date, sum(price * quantity) FROM products GROUP BY sale_date'
+    )
+    op.execute(
+        'INSERT INTO daily_product_sales (sale_date, product, quantity) '
+        'SELECT sale_date, product, sum(quantity) FROM products GROUP BY sale_date, product'
+    )
+    op.execute(
+        'INSERT INTO daily_category_revenue (sale_date, category_id, revenue) '
+        'SELECT sale_date, category_id, sum(price * quantity) FROM products '
+        'GROUP BY sale_date, category_id'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_category_revenue')
+    op.drop_table('daily_product_sales')
+    op.drop_table('daily_revenue')
@@ -28,6 +28,10 @@ app.conf.beat_schedule = {
         "task": "src.infra.celery.tasks.gpt_task",
         "schedule": timedelta(minutes=10),
     },
+    "maintain-product-partitions": {
+        "task": "src.infra.celery.tasks.maintain_partitions_task",
+        "schedule": timedelta(days=1),
+    },
 }
 
 
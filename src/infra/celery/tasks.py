@@ -1,4 +1,3 @@
-import asyncio
 from datetime import datetime
 
 from redis import Redis
@@ -6,7 +5,10 @@ from redis import Redis
 from src.common.settings.logger import get_logger
 from src.infra.celery.client import app
 from src.infra.celery.redis import RedisClient
+from src.infra.celery.worker_loop import run_in_worker_loop
 from src.logic.container import init_container
+from src.logic.other.ingestion import IngestionProgress
+from src.logic.repo_service.partition_service import ProductPartitionService
 from src.logic.use_case.gpt_usecase import GPTUseCase
 from src.logic.use_case.product_category import ParseAndCreateProductCategoryUseCase
 
@@ -14,36 +16,129 @@ from src.logic.use_case.product_category import ParseAndCreateProductCategoryUse
 logger = get_logger(__name__)
 
 
-@app.task
+def report_progress(task):
+    # Счётчики загрузки видны через AsyncResult(task_id).info в состоянии PROGRESS
+    def on_progress(progress: IngestionProgress) -> None:
+        task.update_state(state="PROGRESS", meta=progress.to_dict())
+
+    return on_progress
+
+
+@app.task(bind=True)
 def start_parse_xml_and_save_products(
+    self,
     xml_data: str,
     element: str = "//product",
+    delta: bool = False,
     parse_and_create_usecase: ParseAndCreateProductCategoryUseCase = init_container().resolve(
         ParseAndCreateProductCategoryUseCase
     ),
     redis_client: Redis = init_container().resolve(RedisClient),
 ):
+    logger.debug("Starting XML parsing task")
+
     try:
+        message, sale_date = run_in_worker_loop(
+            parse_and_create_usecase.parse_and_create(
+                xml_data,
+                element,
+                task_id=self.request.id,
+                delta=delta,
+                on_progress=report_progress(self),
+            )
+        )
+        if sale_date is None:
+            logger.info(message)
+            return message
+        redis_client.set("sale_date", str(sale_date))
+        logger.info(
+            f"Successfully parsed and created products, cached sale date: {sale_date}"
+        )
+        return f"Successfully created objects, cached key {str(sale_date)}"
+    except Exception as e:
+        logger.error(f"Error occurred while parsing XML and creating products: {e}")
+        raise e
 
-        logger.debug("Starting XML parsing task")
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        logger.debug("Created new event loop")
 
-    asyncio.set_event_loop(loop)
+@app.task(bind=True)
+def start_download_parse_and_save_products(
+    self,
+    url: str,
+    tag: str = "product",
+    delta: bool = False,
+    engine: str | None = None,
+    parse_and_create_usecase: ParseAndCreateProductCategoryUseCase = init_container().resolve(
+        ParseAndCreateProductCategoryUseCase
+    ),
+    redis_client: Redis = init_container().resolve(RedisClient),
+):
+    logger.debug(f"Starting XML download and parsing task, {url=}")
 
     try:
-        _, sale_date = loop.run_until_complete(
-            parse_and_create_usecase.parse_and_create(xml_data, element)
+        message, sale_date = run_in_worker_loop(
+            parse_and_create_usecase.download_parse_and_create(
+                url,
+                tag,
+                task_id=self.request.id,
+                delta=delta,
+                engine=engine,
+                on_progress=report_progress(self),
+            )
         )
+        if sale_date is None:
+            logger.info(message)
+            return message
         redis_client.set("sale_date", str(sale_date))
         logger.info(
-            f"Successfully parsed and created products, cached sale date: {sale_date}"
+            f"Successfully downloaded, parsed and created products, cached sale date: {sale_date}"
         )
         return f"Successfully created objects, cached key {str(sale_date)}"
     except Exception as e:
-        logger.error(f"Error occurred while parsing XML and creating products: {e}")
+        logger.error(
+            f"Error occurred while downloading XML and creating products: {e}"
+        )
+        raise e
+
+
+@app.task(bind=True)
+def start_parse_xml_file_and_save_products(
+    self,
+    path: str,
+    tag: str = "product",
+    sharded: bool = False,
+    delta: bool = False,
+    engine: str | None = None,
+    columnar: bool = False,
+    parse_and_create_usecase: ParseAndCreateProductCategoryUseCase = init_container().resolve(
+        ParseAndCreateProductCategoryUseCase
+    ),
+    redis_client: Redis = init_container().resolve(RedisClient),
+):
+    logger.debug(f"Starting XML file parsing task, {path=}")
+
+    try:
+        message, sale_date = run_in_worker_loop(
+            parse_and_create_usecase.parse_file_and_create(
+                path,
+                tag,
+                sharded,
+                task_id=self.request.id,
+                delta=delta,
+                engine=engine,
+                on_progress=report_progress(self),
+                columnar=columnar,
+            )
+        )
+        if sale_date is None:
+            logger.info(message)
+            return message
+        redis_client.set("sale_date", str(sale_date))
+        logger.info(
+            f"Successfully parsed file and created products, cached sale date: {sale_date}"
+        )
+        return f"Successfully created objects, cached key {str(sale_date)}"
+    except Exception as e:
+        logger.error(f"Error occurred while parsing XML file and creating products: {e}")
         raise e
 
 
@@ -58,7 +153,7 @@ def gpt_task(
                 input_date_bytes.decode("utf-8"), "%Y-%m-%d"
             ).date()
             logger.debug(f"Starting GPT task with date: {input_date}")
-            asyncio.run(
+            run_in_worker_loop(
                 gpt_usecase.create_summary_by_gpt_and_save(input_date=input_date)
             )
             logger.info(f"Task with {input_date} started")
@@ -72,3 +167,18 @@ def gpt_task(
 
     finally:
         redis_client.delete("sale_date")
+
+
+@app.task
+def maintain_partitions_task(
+    partition_service: ProductPartitionService = init_container().resolve(
+        ProductPartitionService
+    ),
+):
+    try:
+        result = run_in_worker_loop(partition_service.maintain())
+        logger.info(f"Product partitions maintained: {result}")
+        return result
+    except Exception as e:
+        logger.error(f"Error occurred while maintaining product partitions: {e}")
+        raise e
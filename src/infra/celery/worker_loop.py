@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Coroutine
+
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from src.common.settings.logger import get_logger
+from src.infra.db.mongo.db import AsyncMongoClient
+from src.infra.db.postgres.db import AsyncPostgresClient
+from src.logic.other.http_client import HttpClient
+from src.logic.container import init_container
+
+logger = get_logger(__name__)
+
+# Соединения asyncpg привязаны к циклу событий, поэтому все задачи процесса
+# выполняются в одном цикле и делят один пул
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+        logger.debug("Created worker event loop")
+    return _loop
+
+
+def run_in_worker_loop(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    return get_worker_loop().run_until_complete(coroutine)
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs) -> None:
+    global _loop
+    # Цикл и движок родителя после fork использовать нельзя
+    _loop = None
+    client: AsyncPostgresClient = init_container().resolve(AsyncPostgresClient)
+    client.reset_after_fork()
+    mongo_client: AsyncMongoClient = init_container().resolve(AsyncMongoClient)
+    mongo_client.reset_after_fork()
+    init_container().resolve(HttpClient).reset_after_fork()
+
+    loop = get_worker_loop()
+    client.get_engine
+    loop.run_until_complete(mongo_client.connect())
+    logger.info("Worker process initialised postgres engine and mongo client")
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs) -> None:
+    client: AsyncPostgresClient = init_container().resolve(AsyncPostgresClient)
+    loop = get_worker_loop()
+    loop.run_until_complete(client.dispose())
+    init_container().resolve(AsyncMongoClient).close()
+    loop.run_until_complete(init_container().resolve(HttpClient).close())
+    loop.close()
+    logger.info("Worker process closed postgres, mongo and http clients")
@@ -1,18 +1,70 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-import motor
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
 
 from src.common.settings.config import ProjectSettings
+from src.common.settings.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 @dataclass(eq=False)
 class AsyncMongoClient:
+    """
+    Один клиент Motor (и его пул соединений) на процесс, коллекция кэшируется.
+    Создаётся при старте приложения или воркера, закрывается через close.
+    """
+
     settings: ProjectSettings
     collection: str
+    _client: AsyncIOMotorClient | None = field(init=False, default=None, repr=False)
+    _collection: AsyncIOMotorCollection | None = field(
+        init=False, default=None, repr=False
+    )
+
+    @property
+    def get_client(self) -> AsyncIOMotorClient:
+        if self._client is None:
+            options = {
+                "maxPoolSize": self.settings.mongo_max_pool_size,
+                "minPoolSize": self.settings.mongo_min_pool_size,
+                "maxIdleTimeMS": self.settings.mongo_max_idle_time_ms,
+                "connectTimeoutMS": self.settings.mongo_connect_timeout_ms,
+                "serverSelectionTimeoutMS": self.settings.mongo_server_selection_timeout_ms,
+            }
+            if self.settings.mongo_compressors:
+                options["compressors"] = self.settings.mongo_compressors
+            self._client = AsyncIOMotorClient(
+                self.settings.get_no_sql_db_url, **options
+            )
+            logger.info(
+                f"Mongo client created: maxPoolSize={self.settings.mongo_max_pool_size}"
+            )
+        return self._client
 
     @property
     def get_collection(self) -> AsyncIOMotorCollection:
-        return motor.motor_asyncio.AsyncIOMotorClient(self.settings.get_no_sql_db_url)[
-            self.settings.mongo_database
-        ][self.collection]
+        if self._collection is None:
+            self._collection = self.get_client[self.settings.mongo_database][
+                self.collection
+            ]
+        return self._collection
+
+    async def connect(self) -> None:
+        # Рукопожатие и поиск сервера на старте, а не в первом запросе
+        try:
+            await self.get_client.admin.command("ping")
+        except Exception as e:
+            logger.warning(f"Mongo is not reachable on startup: {e}")
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            logger.info("Mongo client closed")
+        self._client = None
+        self._collection = None
+
+    def reset_after_fork(self) -> None:
+        # Клиент pymongo нельзя использовать в дочернем процессе после fork
+        self._client = None
+        self._collection = None
@@ -1,38 +1,196 @@
+import time
 from contextlib import asynccontextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import AsyncGenerator, Any
 
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     create_async_engine,
     async_sessionmaker,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.common.settings.config import ProjectSettings
+from src.common.settings.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(eq=False)
+class PoolStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    # Время получения соединения из пула, включая открытие нового
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    def add_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+            "wait_seconds_avg": round(
+                self.wait_seconds_total / self.checkouts if self.checkouts else 0.0, 6
+            ),
+        }
+
+
+@dataclass(eq=False)
+class StatementCacheStats:
+    """
+    Попадания в кэш скомпилированных запросов SQLAlchemy. Запросы с
+    execution_options(statement_name=...) считаются отдельно, остальные - в "other".
+    """
+
+    hits: dict[str, int] = field(default_factory=dict)
+    misses: dict[str, int] = field(default_factory=dict)
+
+    def listen(self, engine: Engine) -> None:
+        event.listen(engine, "after_execute", self.after_execute)
+
+    def after_execute(
+        self, conn, clauseelement, multiparams, params, execution_options, result
+    ) -> None:
+        context = getattr(result, "context", None)
+        if context is None:
+            return
+        name = context.execution_options.get("statement_name", "other")
+        counters = self.hits if context.cache_hit == CACHE_HIT else self.misses
+        counters[name] = counters.get(name, 0) + 1
+
+    def to_dict(self) -> dict[str, Any]:
+        stats = {}
+        for name in sorted(self.hits.keys() | self.misses.keys()):
+            hits, misses = self.hits.get(name, 0), self.misses.get(name, 0)
+            stats[name] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4),
+            }
+        return stats
+
+
+class MeasuredAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.add_wait(time.perf_counter() - started)
 
 
 @dataclass(eq=False)
 class AsyncPostgresClient:
+    """
+    Один движок и пул соединений на процесс. Создаётся при первом обращении
+    (или явно в lifespan / worker_process_init), закрывается через dispose.
+    """
+
     settings: ProjectSettings
+    _engine: AsyncEngine | None = field(init=False, default=None, repr=False)
+    _sessionmaker: async_sessionmaker | None = field(
+        init=False, default=None, repr=False
+    )
+    statement_stats: StatementCacheStats = field(
+        init=False, default_factory=StatementCacheStats, repr=False
+    )
 
     @property
-    def get_engine(self):
-        return create_async_engine(
-            self.settings.get_sql_db_url,
-        )
+    def get_engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = create_async_engine(
+                self.settings.get_sql_db_url,
+                poolclass=MeasuredAsyncAdaptedQueuePool,
+                pool_size=self.settings.postgres_pool_size,
+                max_overflow=self.settings.postgres_max_overflow,
+                pool_timeout=self.settings.postgres_pool_timeout,
+                pool_recycle=self.settings.postgres_pool_recycle,
+                pool_pre_ping=self.settings.postgres_pool_pre_ping,
+                query_cache_size=self.settings.postgres_query_cache_size,
+                connect_args={
+                    # Свой кэш asyncpg и кэш prepare() диалекта SQLAlchemy
+                    "statement_cache_size": self.settings.postgres_statement_cache_size,
+                    "prepared_statement_cache_size": (
+                        self.settings.postgres_statement_cache_size
+                    ),
+                },
+            )
+            self.statement_stats.listen(self._engine.sync_engine)
+            self._sessionmaker = async_sessionmaker(
+                bind=self._engine, class_=AsyncSession
+            )
+            logger.info(
+                f"Postgres engine created: pool_size={self.settings.postgres_pool_size}, "
+                f"max_overflow={self.settings.postgres_max_overflow}"
+            )
+        return self._engine
 
     @property
     def get_async_sessionmaker(self) -> async_sessionmaker[AsyncSession | Any]:
-        return async_sessionmaker(bind=self.get_engine, class_=AsyncSession)
+        if self._sessionmaker is None:
+            self.get_engine
+        return self._sessionmaker
 
     @asynccontextmanager
     async def get_async_session(self) -> AsyncGenerator[AsyncSession, None]:
         session = self.get_async_sessionmaker()
         try:
             yield session
-        except Exception as e:
+        except BaseException:
+            # В том числе CancelledError: отменённая транзакция не коммитится
             await session.rollback()
-            raise e
-        finally:
+            raise
+        else:
             await session.commit()
+        finally:
             await session.close()
+
+    async def dispose(self) -> None:
+        if self._engine is not None:
+            logger.info(f"Disposing postgres engine, pool stats: {self.pool_stats()}")
+            await self._engine.dispose()
+        self._engine = None
+        self._sessionmaker = None
+
+    def reset_after_fork(self) -> None:
+        # Соединения родителя не закрываем: они принадлежат ему
+        if self._engine is not None:
+            self._engine.sync_engine.dispose(close=False)
+        self._engine = None
+        self._sessionmaker = None
+        self.statement_stats = StatementCacheStats()
+
+    def pool_stats(self) -> dict[str, Any]:
+        if self._engine is None:
+            return {"engine": False}
+
+        pool = self._engine.sync_engine.pool
+        return {
+            "engine": True,
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            **pool.stats.to_dict(),
+        }
+
+    def statement_cache_stats(self) -> dict[str, Any]:
+        return self.statement_stats.to_dict()
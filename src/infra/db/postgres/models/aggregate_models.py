@@ -0,0 +1,36 @@
+from sqlalchemy import Column, String, Date, Float, BigInteger
+from sqlalchemy.dialects.postgresql import UUID
+
+from .base import Base
+
+
+class DailyRevenue(Base):
+    """Выручка за дату в копейках, sum(price * quantity) по products."""
+
+    __tablename__ = "daily_revenue"
+
+    sale_date = Column(Date, primary_key=True)
+    revenue = Column(Float, nullable=False, default=0)
+
+
+class DailyProductSales(Base):
+    """Проданное количество товара за дату, sum(quantity) по всем категориям."""
+
+    __tablename__ = "daily_product_sales"
+
+    sale_date = Column(Date, primary_key=True)
+    product = Column(String, primary_key=True)
+    quantity = Column(BigInteger, nullable=False, default=0)
+
+
+class DailyCategoryRevenue(Base):
+    """
+    Выручка категории за дату в копейках. Без внешнего ключа: агрегаты
+    остаются и после удаления старых секций products.
+    """
+
+    __tablename__ = "daily_category_revenue"
+
+    sale_date = Column(Date, primary_key=True)
+    category_id = Column(UUID(as_uuid=True), primary_key=True)
+    revenue = Column(Float, nullable=False, default=0)
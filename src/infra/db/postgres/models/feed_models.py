@@ -0,0 +1,46 @@
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    BigInteger,
+    Date,
+    Float,
+    UniqueConstraint,
+    UUID,
+)
+
+from .base import AbstractModel, Base
+
+
+class FeedProgress(AbstractModel):
+    """Закоммиченные чанки фида, строка пишется в транзакции самого чанка."""
+
+    __tablename__ = "feed_progress"
+
+    # sha256 фида, как в FeedDigestRepository
+    digest = Column(String(64), nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    products = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("digest", "chunk_index", name="uq_feed_progress_chunk"),
+    )
+
+
+class FeedStagedProduct(Base):
+    """
+    Строки фида, который пишется по ходу разбора. В products они переносятся
+    одним запросом после конца разбора, оборванный фид туда не попадает.
+    """
+
+    __tablename__ = "feed_staged_products"
+
+    digest = Column(String(64), primary_key=True)
+    # Номер строки в фиде: категория и цена повторов берутся у первой строки
+    ordinal = Column(BigInteger, primary_key=True)
+    product = Column(String, nullable=False)
+    category_id = Column(UUID(as_uuid=True), nullable=False)
+    sale_date = Column(Date, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    price = Column(Float, nullable=False)
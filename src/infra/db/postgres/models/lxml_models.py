@@ -6,6 +6,8 @@ from sqlalchemy import (
     ForeignKey,
     Date,
     UniqueConstraint,
+    PrimaryKeyConstraint,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
@@ -24,7 +26,9 @@ class Category(AbstractModel):
 
 class Product(AbstractModel):
     __tablename__ = "products"
-    sale_date = Column(Date, nullable=False)
+    # Таблица секционирована по месяцам sale_date, секции создаёт
+    # PartitionRepository, поэтому дата входит в первичный ключ
+    sale_date = Column(Date, nullable=False, primary_key=True)
     product = Column(String, nullable=False)
     price = Column(Float, nullable=False)
     quantity = Column(Integer, nullable=False, default=0)
@@ -36,7 +40,20 @@ class Product(AbstractModel):
     category = relationship("Category", back_populates="products")
 
     __table_args__ = (
+        PrimaryKeyConstraint("id", "sale_date", name="products_pkey"),
         UniqueConstraint(
             "product", "category_id", "sale_date", name="uq_product_category_date"
         ),
+        # Таблица пополняется по датам, BRIN на sale_date почти ничего не весит
+        Index("ix_products_sale_date_brin", "sale_date", postgresql_using="brin"),
+        # Запросы QueryRepository за дату читают только этот индекс (index-only scan),
+        # строки одной даты уже упорядочены по product для GROUP BY
+        Index(
+            "ix_products_sale_date_product",
+            "sale_date",
+            "product",
+            postgresql_include=["quantity", "price", "category_id"],
+        ),
+        Index("ix_products_category_id", "category_id"),
+        {"postgresql_partition_by": "RANGE (sale_date)"},
     )
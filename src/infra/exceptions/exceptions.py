@@ -23,6 +23,26 @@ class SQLIntegrityError(IntegrityError):
         return f"Product must be unique and must appear in one category"
 
 
+@dataclass(eq=False)
+class ChunkAlreadyCommitted(Exception):
+    digest: str
+    chunk_index: int
+
+    @property
+    def message(self):
+        return f"Chunk {self.chunk_index} of feed {self.digest} is already committed"
+
+
+@dataclass(eq=False)
+class MergedRowsMismatch(Exception):
+    staged: int
+    merged: int
+
+    @property
+    def message(self):
+        return f"Merged {self.merged} products out of {self.staged} staged"
+
+
 @dataclass(eq=False)
 class MongoWriteError(WriteError):
 
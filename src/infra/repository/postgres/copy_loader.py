@@ -0,0 +1,233 @@
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Iterable
+
+from sqlalchemy import text, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.common.settings.logger import get_logger
+from src.infra.exceptions.exceptions import MergedRowsMismatch
+from src.infra.repository.postgres.daily_aggregates_repo import (
+    DailyAggregateRepository,
+    CHANGES_COLUMNS,
+)
+
+logger = get_logger(__name__)
+
+STAGING_TABLE = "products_staging"
+# ordinal - номер строки в фиде: цена берётся у первой строки продукта,
+# как в ProductRepository.bulk_upsert
+STAGING_COLUMNS = (
+    "ordinal",
+    "product",
+    "category_id",
+    "sale_date",
+    "quantity",
+    "price",
+)
+CHANGES_TABLE = "products_changes"
+
+
+@dataclass(eq=False)
+class ProductCopyLoader:
+    """
+    Загрузка больших фидов: строки идут бинарным COPY во временную таблицу,
+    затем один запрос делает upsert в products с той же семантикой, что
+    ProductRepository.bulk_upsert. id категорий резолвит вызывающий
+    (CategoryRepository.get_or_create_ids) отдельными запросами до COPY.
+    """
+
+    product_model: Any
+    aggregates: DailyAggregateRepository | None = None
+    # Таблица фидов, которые пишутся по ходу разбора, см. stage
+    staged_model: Any | None = None
+
+    async def load(
+        self,
+        session: AsyncSession,
+        records: Iterable[tuple[str, uuid.UUID, date, int, int]],
+    ) -> int:
+        """records - кортежи (product, category_id, sale_date, quantity, price)."""
+        # Таблица видна только этому соединению и удаляется вместе с транзакцией
+        await session.execute(
+            text(
+                f"CREATE TEMP TABLE {STAGING_TABLE} ("
+                "ordinal bigint NOT NULL, "
+                "product varchar NOT NULL, "
+                "category_id uuid NOT NULL, "
+                "sale_date date NOT NULL, "
+                "quantity integer NOT NULL, "
+                "price double precision NOT NULL"
+                ") ON COMMIT DROP"
+            )
+        )
+
+        await self.copy_records(
+            session=session,
+            table=STAGING_TABLE,
+            records=((ordinal, *record) for ordinal, record in enumerate(records)),
+            columns=STAGING_COLUMNS,
+        )
+
+        upserted = await self.merge(session=session, relation=STAGING_TABLE)
+        await session.execute(text(f"DROP TABLE {STAGING_TABLE}"))
+        logger.info(f"Merged {upserted} products from {STAGING_TABLE}")
+        return upserted
+
+    async def stage(
+        self,
+        session: AsyncSession,
+        digest: str,
+        first_ordinal: int,
+        records: Iterable[tuple[str, uuid.UUID, date, int, int]],
+    ) -> None:
+        """
+        Пачка фида копится в staged_model до конца разбора, в products она
+        попадёт только через merge_staged. first_ordinal - номер первой строки
+        пачки в фиде.
+        """
+        await self.copy_records(
+            session=session,
+            table=self.staged_model.__tablename__,
+            records=(
+                (digest, first_ordinal + ordinal, *record)
+                for ordinal, record in enumerate(records)
+            ),
+            columns=("digest", *STAGING_COLUMNS),
+        )
+
+    async def merge_staged(self, session: AsyncSession, digest: str) -> int:
+        """
+        Переносит накопленный фид в products одним запросом. Повторы продукта
+        из разных пачек сливаются как при разборе всего фида: количество
+        складывается, категория и цена берутся у первой строки.
+        """
+        staged = self.staged_model.__tablename__
+        # DELETE ... RETURNING забирает строки: второй merge того же фида
+        # ждёт на блокировках строк и не находит ни одной
+        sources = f"""
+            claimed AS (
+                DELETE FROM {staged} WHERE digest = :digest
+                RETURNING {", ".join(STAGING_COLUMNS)}
+            ),
+            feed AS (
+                SELECT
+                    min(ordinal) AS ordinal, product,
+                    (array_agg(category_id ORDER BY ordinal))[1] AS category_id,
+                    sale_date, sum(quantity) AS quantity,
+                    (array_agg(price ORDER BY ordinal))[1] AS price
+                FROM claimed
+                GROUP BY product, sale_date
+            )"""
+        upserted = await self.merge(
+            session=session, relation="feed", sources=sources, params={"digest": digest}
+        )
+        logger.info(f"Merged {upserted} staged products of feed {digest}")
+        return upserted
+
+    async def discard_staged(self, session: AsyncSession, digest: str) -> None:
+        await session.execute(
+            delete(self.staged_model).where(self.staged_model.digest == digest)
+        )
+
+    async def copy_records(
+        self,
+        session: AsyncSession,
+        table: str,
+        records: Iterable[tuple],
+        columns: Iterable[str],
+    ) -> None:
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        copied = await raw_connection.driver_connection.copy_records_to_table(
+            table, records=records, columns=list(columns)
+        )
+        logger.debug(f"Copied into {table}: {copied}")
+
+    async def merge(
+        self,
+        session: AsyncSession,
+        relation: str,
+        sources: str = "",
+        params: dict[str, Any] | None = None,
+    ) -> int:
+        if self.aggregates is not None:
+            await session.execute(
+                text(
+                    f"CREATE TEMP TABLE {CHANGES_TABLE} ("
+                    "sale_date date NOT NULL, "
+                    "product varchar NOT NULL, "
+                    "category_id uuid NOT NULL, "
+                    "quantity bigint NOT NULL, "
+                    "revenue double precision NOT NULL"
+                    ") ON COMMIT DROP"
+                )
+            )
+
+        result = await session.execute(
+            text(self.merge_query(relation=relation, sources=sources)), params or {}
+        )
+        upserted, staged = result.one()
+        if upserted != staged:
+            # Каждый ключ relation должен дать строку в products
+            raise MergedRowsMismatch(staged=staged, merged=upserted)
+
+        if self.aggregates is not None:
+            await self.aggregates.add_changes_from(
+                session=session, relation=CHANGES_TABLE
+            )
+            await session.execute(text(f"DROP TABLE {CHANGES_TABLE}"))
+        return upserted
+
+    def merge_query(self, relation: str = STAGING_TABLE, sources: str = "") -> str:
+        """
+        relation - строки с колонками STAGING_COLUMNS, sources - CTE, которые
+        идут перед остальными, если relation строится в самом запросе.
+        """
+        products = self.product_model.__tablename__
+        return f"""
+            WITH {f"{sources}," if sources else ""}
+            grouped AS (
+                SELECT
+                    product, category_id, sale_date, sum(quantity) AS quantity,
+                    (array_agg(price ORDER BY ordinal))[1] AS price
+                FROM {relation}
+                GROUP BY product, category_id, sale_date
+            ),
+            upserted AS (
+                INSERT INTO {products} (
+                    id, product, category_id, sale_date, quantity, price,
+                    created_at, updated_at
+                )
+                SELECT
+                    gen_random_uuid(), product, category_id, sale_date, quantity,
+                    price, LOCALTIMESTAMP, LOCALTIMESTAMP
+                FROM grouped
+                ON CONFLICT (product, category_id, sale_date) DO UPDATE
+                SET quantity = {products}.quantity + excluded.quantity,
+                    updated_at = excluded.updated_at
+                RETURNING product, category_id, sale_date, price
+            ){self.changes_query()}
+            SELECT
+                (SELECT count(*) FROM upserted),
+                (
+                    SELECT count(DISTINCT (product, category_id, sale_date))
+                    FROM {relation}
+                )
+        """
+
+    def changes_query(self) -> str:
+        if self.aggregates is None:
+            return ""
+        # Выручка по сохранённой цене: у существующей строки цена не меняется
+        return f""",
+            changes AS (
+                INSERT INTO {CHANGES_TABLE} ({CHANGES_COLUMNS})
+                SELECT
+                    upserted.sale_date, upserted.product, upserted.category_id,
+                    grouped.quantity, upserted.price * grouped.quantity
+                FROM upserted
+                JOIN grouped USING (product, category_id, sale_date)
+                RETURNING 1
+            )"""
@@ -0,0 +1,182 @@
+from dataclasses import dataclass
+from datetime import date
+from functools import cached_property
+from typing import Any, Iterable
+
+from sqlalchemy import select, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.common.settings.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Колонки изменений, из которых складываются агрегаты
+CHANGES_COLUMNS = "sale_date, product, category_id, quantity, revenue"
+CHANGES_PARAMS = (
+    "unnest("
+    "CAST(:sale_dates AS date[]), CAST(:products AS varchar[]), "
+    "CAST(:category_ids AS uuid[]), CAST(:quantities AS bigint[]), "
+    "CAST(:revenues AS double precision[])"
+    f") AS changes ({CHANGES_COLUMNS})"
+)
+# Выручка хранится во float, суммы в разном порядке расходятся в младших разрядах
+REVENUE_TOLERANCE = 0.005
+
+
+@dataclass(eq=False)
+class DailyAggregateRepository:
+    """
+    Дневные агрегаты products: выручка за дату, количество по товару и
+    выручка по категории. Изменения строк products прибавляются в той же
+    транзакции, где они записаны; refresh_dates и rebuild пересчитывают
+    агрегаты из products.
+    """
+
+    revenue_model: Any
+    product_sales_model: Any
+    category_revenue_model: Any
+    product_model: Any
+
+    def aggregates(self) -> list[tuple[str, str, str, str]]:
+        # (таблица, ключ, колонка агрегата, выражение по строкам products)
+        return [
+            (
+                self.revenue_model.__tablename__,
+                "sale_date",
+                "revenue",
+                "price * quantity",
+            ),
+            (
+                self.product_sales_model.__tablename__,
+                "sale_date, product",
+                "quantity",
+                "quantity",
+            ),
+            (
+                self.category_revenue_model.__tablename__,
+                "sale_date, category_id",
+                "revenue",
+                "price * quantity",
+            ),
+        ]
+
+    async def lock_dates(self, session: AsyncSession, sale_dates: Iterable[date]) -> None:
+        # Строку агрегата даты меняют все параллельные чанки фида: пока дата
+        # заблокирована, остальные строки её агрегатов меняет один писатель
+        for sale_date in sorted(set(sale_dates)):
+            await session.execute(
+                select(
+                    func.pg_advisory_xact_lock(
+                        func.hashtext(f"daily_aggregates:{sale_date.isoformat()}")
+                    )
+                )
+            )
+
+    async def add_changes(
+        self,
+        session: AsyncSession,
+        changes: Iterable[tuple[date, str, Any, int, float]],
+    ) -> None:
+        """changes - (sale_date, product, category_id, quantity, revenue) изменённых строк."""
+        columns = list(zip(*changes))
+        if not columns:
+            return
+
+        sale_dates, products, category_ids, quantities, revenues = columns
+        await self.lock_dates(session=session, sale_dates=sale_dates)
+        await session.execute(
+            self.add_changes_query,
+            {
+                "sale_dates": list(sale_dates),
+                "products": list(products),
+                "category_ids": list(category_ids),
+                "quantities": list(quantities),
+                "revenues": list(revenues),
+            },
+        )
+        logger.debug(f"Added {len(products)} product changes to daily aggregates")
+
+    async def add_changes_from(self, session: AsyncSession, relation: str) -> None:
+        # relation - таблица с колонками CHANGES_COLUMNS, например временная у COPY
+        sale_dates = await session.execute(
+            text(f"SELECT DISTINCT sale_date FROM {relation}")
+        )
+        await self.lock_dates(session=session, sale_dates=sale_dates.scalars())
+        await session.execute(text(self.merge_query(f"{relation} AS changes")))
+
+    @cached_property
+    def add_changes_query(self):
+        return text(self.merge_query(CHANGES_PARAMS)).execution_options(
+            statement_name="daily_aggregates_add"
+        )
+
+    def merge_query(self, source: str) -> str:
+        # GROUP BY: ON CONFLICT не может изменить одну строку дважды за запрос
+        merges = ",\n".join(
+            f"""
+            {table}_merge AS (
+                INSERT INTO {table} ({key}, {column})
+                SELECT {key}, sum({column}) FROM changes GROUP BY {key}
+                ON CONFLICT ({key}) DO UPDATE
+                SET {column} = {table}.{column} + excluded.{column}
+            )"""
+            for table, key, column, _ in self.aggregates()
+        )
+        return f"""
+            WITH changes AS (SELECT {CHANGES_COLUMNS} FROM {source}),
+            {merges}
+            SELECT count(*) FROM changes
+        """
+
+    async def refresh_dates(
+        self, session: AsyncSession, sale_dates: Iterable[date]
+    ) -> None:
+        """Пересчитывает агрегаты дат целиком: для дельты и правок отдельных товаров."""
+        sale_dates = sorted(set(sale_dates))
+        if not sale_dates:
+            return
+
+        await self.lock_dates(session=session, sale_dates=sale_dates)
+        for query in self.rebuild_queries(
+            "WHERE sale_date = ANY(CAST(:sale_dates AS date[]))"
+        ):
+            await session.execute(text(query), {"sale_dates": sale_dates})
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        # Все даты сразу: остальные писатели агрегатов ждут конца транзакции
+        for table, *_ in self.aggregates():
+            await session.execute(text(f"LOCK TABLE {table} IN EXCLUSIVE MODE"))
+        for query in self.rebuild_queries(""):
+            await session.execute(text(query))
+        logger.info("Daily aggregates rebuilt from products")
+
+    def rebuild_queries(self, where: str) -> list[str]:
+        products = self.product_model.__tablename__
+        queries = []
+        for table, key, column, expression in self.aggregates():
+            queries.append(f"DELETE FROM {table} {where}")
+            queries.append(
+                f"INSERT INTO {table} ({key}, {column}) "
+                f"SELECT {key}, sum({expression}) FROM {products} {where} "
+                f"GROUP BY {key}"
+            )
+        return queries
+
+    async def get_mismatched_dates(self, session: AsyncSession) -> list[date]:
+        """Даты, где сохранённые агрегаты расходятся с пересчётом из products."""
+        products = self.product_model.__tablename__
+        mismatched = set()
+        for table, key, column, expression in self.aggregates():
+            result = await session.execute(
+                text(
+                    f"SELECT DISTINCT sale_date FROM {table} "
+                    f"FULL JOIN ("
+                    f"SELECT {key}, sum({expression}) AS computed "
+                    f"FROM {products} GROUP BY {key}"
+                    f") AS fresh USING ({key}) "
+                    f"WHERE abs(coalesce({table}.{column}, 0) - coalesce(fresh.computed, 0)) "
+                    f"> {REVENUE_TOLERANCE}"
+                )
+            )
+            mismatched.update(result.scalars())
+        return sorted(mismatched)
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import select, delete, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.common.settings.logger import get_logger
+from src.infra.exceptions.exceptions import ChunkAlreadyCommitted
+
+logger = get_logger(__name__)
+
+
+@dataclass(eq=False)
+class FeedProgressRepository:
+    """
+    Какие чанки фида уже закоммичены. Чанки пишутся параллельно и завершаются
+    в любом порядке, поэтому каждый отмечается своей строкой в своей транзакции.
+    """
+
+    model: Any
+
+    async def get_committed_chunks(
+        self, session: AsyncSession, digest: str
+    ) -> tuple[int | None, set[int]]:
+        # Размер чанка берётся из прогресса, чтобы номера совпали при другой настройке
+        chunks = await session.execute(
+            select(self.model.chunk_size, self.model.chunk_index).where(
+                self.model.digest == digest
+            )
+        )
+        chunk_size = None
+        committed = set()
+        for size, index in chunks.tuples():
+            chunk_size = size
+            committed.add(index)
+        return chunk_size, committed
+
+    async def mark_chunk(
+        self,
+        session: AsyncSession,
+        digest: str,
+        chunk_index: int,
+        chunk_size: int,
+        products: int,
+    ) -> None:
+        """
+        Отметка пишется в транзакции чанка. Если тот же чанк уже закоммитил
+        другой писатель, уникальный индекс откатывает всю транзакцию чанка.
+        """
+        try:
+            await session.execute(
+                insert(self.model).values(
+                    digest=digest,
+                    chunk_index=chunk_index,
+                    chunk_size=chunk_size,
+                    products=products,
+                )
+            )
+        except IntegrityError as e:
+            raise ChunkAlreadyCommitted(digest=digest, chunk_index=chunk_index) from e
+
+    async def delete(self, session: AsyncSession, digest: str) -> None:
+        await session.execute(delete(self.model).where(self.model.digest == digest))
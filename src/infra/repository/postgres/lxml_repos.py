@@ -1,9 +1,11 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any
+from functools import cached_property
+from itertools import repeat
+from typing import Any, Iterable
 
-from sqlalchemy import select, update, delete
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import select, update, delete, bindparam, func, any_
+from sqlalchemy.dialects.postgresql import insert, ARRAY
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -20,6 +22,8 @@ from src.domain.entities.base_lxml import (
     BaseLxmlEntity,
     ProductQuery,
     ProductEntityWithoutCategoryId,
+    ProductColumnsEntity,
+    ProductDeltaEntity,
 )
 from src.domain.entities.lxml_entities import (
     CategoryEntity,
@@ -28,12 +32,24 @@ from src.domain.entities.lxml_entities import (
 from src.infra.db.postgres.models.lxml_models import Product, Category
 from src.infra.exceptions.exceptions import SQLException
 from src.infra.repository.postgres.base_postgres import PostgresRepo
+from src.infra.repository.postgres.copy_loader import ProductCopyLoader
+from src.infra.repository.postgres.daily_aggregates_repo import (
+    DailyAggregateRepository,
+)
 
 logger = get_logger(__name__)
 
+# asyncpg ограничивает число параметров запроса 32767
+DELETE_CHUNK_SIZE = 10_000
+# 8 параметров на строку products вместе с id, created_at и updated_at,
+# столько строк попадает в один INSERT ... VALUES
+UPSERT_CHUNK_SIZE = 4_000
+
 
 @dataclass(eq=False)
 class ProductRepository(PostgresRepo):
+    # Дневные агрегаты меняются в той же транзакции, что и products
+    aggregates: DailyAggregateRepository | None = None
 
     async def get(
         self,
@@ -63,17 +79,20 @@ class ProductRepository(PostgresRepo):
             .values(**entity.to_dict())
             .returning(self.model.__table__.columns)
         )
+        created = query.mappings().fetchone()
+        await self.refresh_aggregates(session=session, rows=[created])
 
-        return convert_from_model_to_product_entity_with_id(query.mappings().fetchone())
+        return convert_from_model_to_product_entity_with_id(created)
 
     async def create_or_update(
         self, session: AsyncSession, entity: ProductEntityWithCategoryId
     ):
+        # Конфликт откатывает только точку сохранения, а не всю транзакцию
         try:
-            created = await self.create_one(session=session, entity=entity)
+            async with session.begin_nested():
+                created = await self.create_one(session=session, entity=entity)
             return created
         except IntegrityError:
-            await session.rollback()
             updated = await self.update_one(
                 session=session,
                 entity=ProductEntityWithoutCategoryId(
@@ -106,8 +125,111 @@ class ProductRepository(PostgresRepo):
             .values(quantity=self.model.quantity + entity.quantity.quantity)
             .returning(self.model.__table__.columns)
         )
+        updated = updated_model.mappings().all()
+        await self.refresh_aggregates(session=session, rows=updated)
         return convert_from_model_to_product_entity_with_id(
-            updated_model.mappings().fetchone()
+            updated[0] if updated else None
+        )
+
+    async def refresh_aggregates(self, session: AsyncSession, rows) -> None:
+        # Одиночные правки пересчитывают агрегаты своей даты целиком
+        if self.aggregates is not None:
+            await self.aggregates.refresh_dates(
+                session=session,
+                sale_dates=(row["sale_date"] for row in rows if row is not None),
+            )
+
+    async def bulk_upsert(
+        self,
+        session: AsyncSession,
+        rows: Iterable[dict[str, Any]],
+        chunk_size: int = UPSERT_CHUNK_SIZE,
+    ) -> list[Any]:
+        """
+        rows - словари product, category_id, sale_date, quantity, price.
+        Одна строка VALUES на продукт, chunk_size строк на запрос; количество
+        существующих строк увеличивается. Возвращает id записанных строк.
+        """
+        # ON CONFLICT DO UPDATE не может изменить одну строку дважды за запрос
+        merged: dict[tuple, dict[str, Any]] = {}
+        for row in rows:
+            key = (row["product"], row["category_id"], row["sale_date"])
+            if key in merged:
+                merged[key]["quantity"] += row["quantity"]
+            else:
+                merged[key] = dict(row)
+        values = list(merged.values())
+        if not values:
+            return []
+
+        # Один и тот же запрос на каждый вызов: SQLAlchemy режет параметры
+        # на страницы по chunk_size строк (insertmanyvalues), а полные страницы
+        # дают одинаковый SQL и переиспользуют подготовленное выражение
+        result = await session.execute(
+            self.upsert_query,
+            values,
+            execution_options={"insertmanyvalues_page_size": chunk_size},
+        )
+        upserted = result.tuples().all()
+        ids = [product_id for product_id, *_ in upserted]
+
+        if self.aggregates is not None:
+            changes = []
+            for _, product, category_id, sale_date, price in upserted:
+                quantity = merged[(product, category_id, sale_date)]["quantity"]
+                # У существующей строки цена не меняется: выручка считается
+                # по сохранённой цене, которую вернул RETURNING
+                changes.append(
+                    (sale_date, product, category_id, quantity, price * quantity)
+                )
+            await self.aggregates.add_changes(session=session, changes=changes)
+
+        logger.debug(
+            f"Upserted {len(ids)} products in {-(-len(values) // chunk_size)} statements"
+        )
+        return ids
+
+    @cached_property
+    def upsert_query(self):
+        query = insert(self.model.__table__)
+        return (
+            query.on_conflict_do_update(
+                index_elements=["product", "category_id", "sale_date"],
+                set_={
+                    "quantity": self.model.quantity + query.excluded.quantity,
+                    "updated_at": query.excluded.updated_at,
+                },
+            )
+            .returning(
+                self.model.id,
+                self.model.product,
+                self.model.category_id,
+                self.model.sale_date,
+                self.model.price,
+            )
+            .execution_options(statement_name="products_upsert")
+        )
+
+    async def create_or_update_columns(
+        self,
+        session: AsyncSession,
+        entity: ProductColumnsEntity,
+        category_ids: dict[str, Any],
+    ) -> list[Any]:
+        return await self.bulk_upsert(
+            session=session,
+            rows=(
+                {
+                    "product": product,
+                    "category_id": category_ids[category],
+                    "sale_date": entity.sale_date,
+                    "quantity": quantity,
+                    "price": price,
+                }
+                for product, category, quantity, price in zip(
+                    entity.products, entity.categories, entity.quantities, entity.prices
+                )
+            ),
         )
 
     async def delete_one(
@@ -118,7 +240,11 @@ class ProductRepository(PostgresRepo):
             .filter_by(**entity.to_dict())
             .returning(self.model.__table__.columns)
         )
-        return convert_from_model_to_product_entity_with_id(query.mappings().fetchone())
+        deleted = query.mappings().all()
+        await self.refresh_aggregates(session=session, rows=deleted)
+        return convert_from_model_to_product_entity_with_id(
+            deleted[0] if deleted else None
+        )
 
 
 @dataclass(eq=False)
@@ -179,14 +305,48 @@ class CategoryRepository(PostgresRepo):
         entity: CategoryEntity,
     ) -> CategoryModelWithId | None:
         try:
-            inserted = await self.create_one(session=session, entity=entity)
+            async with session.begin_nested():
+                inserted = await self.create_one(session=session, entity=entity)
             return inserted
         except IntegrityError:
-            await session.rollback()
             return await self.update_one(
                 session=session, entity=entity, change_entity=entity
             )
 
+    async def get_or_create_ids(
+        self, session: AsyncSession, names: set[str]
+    ) -> dict[str, Any]:
+        if not names:
+            return {}
+
+        await session.execute(
+            self.insert_names_query, [{"name": name} for name in names]
+        )
+        categories = await session.execute(
+            self.ids_by_names_query, {"names": list(names)}
+        )
+        return dict(categories.tuples().all())
+
+    @cached_property
+    def insert_names_query(self):
+        return (
+            insert(self.model.__table__)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .execution_options(statement_name="categories_insert")
+        )
+
+    @cached_property
+    def ids_by_names_query(self):
+        # = ANY(массив), а не IN: текст запроса не зависит от числа имён
+        return (
+            select(self.model.name, self.model.id)
+            .where(
+                self.model.name
+                == any_(bindparam("names", type_=ARRAY(self.model.name.type)))
+            )
+            .execution_options(statement_name="categories_ids")
+        )
+
     async def delete_one(
         self, session: AsyncSession, entity: CategoryEntity
     ) -> CategoryModelWithId | None:
@@ -204,6 +364,7 @@ class CategoryRepository(PostgresRepo):
 class ProductCategoryRepository:
     product_repository: ProductRepository
     category_repository: CategoryRepository
+    copy_loader: ProductCopyLoader | None = None
 
     async def get_products_with_category(
         self,
@@ -254,3 +415,250 @@ class ProductCategoryRepository:
 
         except SQLException as e:
             raise e.message
+
+    async def create_category_and_products(
+        self,
+        session,
+        entities: list[BaseLxmlEntity],
+        category_ids: dict[str, Any] | None = None,
+    ):
+        try:
+            if category_ids is None:
+                category_ids = await self.category_repository.get_or_create_ids(
+                    session=session,
+                    names={entity.category_name for entity in entities},
+                )
+            ids = await self.product_repository.bulk_upsert(
+                session=session,
+                rows=(
+                    {
+                        "product": entity.product.name,
+                        "category_id": category_ids[entity.category_name],
+                        "sale_date": entity.sale_date,
+                        "quantity": entity.quantity.quantity,
+                        "price": entity.price.price,
+                    }
+                    for entity in entities
+                ),
+            )
+            return len(ids)
+
+        except SQLException as e:
+            raise e.message
+
+    async def copy_category_and_products(
+        self,
+        session,
+        entities: list[BaseLxmlEntity],
+        category_ids: dict[str, Any] | None = None,
+    ):
+        try:
+            if category_ids is None:
+                category_ids = await self.category_repository.get_or_create_ids(
+                    session=session,
+                    names={entity.category_name for entity in entities},
+                )
+            return await self.copy_loader.load(
+                session=session,
+                records=(
+                    (
+                        entity.product.name,
+                        category_ids[entity.category_name],
+                        entity.sale_date,
+                        entity.quantity.quantity,
+                        entity.price.price,
+                    )
+                    for entity in entities
+                ),
+            )
+
+        except SQLException as e:
+            raise e.message
+
+    async def stage_category_and_products(
+        self,
+        session,
+        digest: str,
+        first_ordinal: int,
+        entities: list[BaseLxmlEntity],
+        category_ids: dict[str, Any] | None = None,
+    ):
+        try:
+            if category_ids is None:
+                category_ids = await self.category_repository.get_or_create_ids(
+                    session=session,
+                    names={entity.category_name for entity in entities},
+                )
+            await self.copy_loader.stage(
+                session=session,
+                digest=digest,
+                first_ordinal=first_ordinal,
+                records=(
+                    (
+                        entity.product.name,
+                        category_ids[entity.category_name],
+                        entity.sale_date,
+                        entity.quantity.quantity,
+                        entity.price.price,
+                    )
+                    for entity in entities
+                ),
+            )
+            return len(entities)
+
+        except SQLException as e:
+            raise e.message
+
+    async def merge_staged_products(self, session, digest: str):
+        try:
+            return await self.copy_loader.merge_staged(session=session, digest=digest)
+
+        except SQLException as e:
+            raise e.message
+
+    async def discard_staged_products(self, session, digest: str) -> None:
+        await self.copy_loader.discard_staged(session=session, digest=digest)
+
+    async def copy_category_and_product_columns(
+        self,
+        session,
+        entity: ProductColumnsEntity,
+        category_ids: dict[str, Any] | None = None,
+    ):
+        try:
+            if category_ids is None:
+                category_ids = await self.category_repository.get_or_create_ids(
+                    session=session, names=set(entity.categories)
+                )
+            return await self.copy_loader.load(
+                session=session,
+                records=zip(
+                    entity.products,
+                    map(category_ids.__getitem__, entity.categories),
+                    repeat(entity.sale_date),
+                    entity.quantities,
+                    entity.prices,
+                ),
+            )
+
+        except SQLException as e:
+            raise e.message
+
+    async def create_category_and_product_columns(
+        self,
+        session,
+        entity: ProductColumnsEntity,
+        category_ids: dict[str, Any] | None = None,
+    ):
+        try:
+            if category_ids is None:
+                category_ids = await self.category_repository.get_or_create_ids(
+                    session=session, names=set(entity.categories)
+                )
+            ids = await self.product_repository.create_or_update_columns(
+                session=session, entity=entity, category_ids=category_ids
+            )
+            return len(ids)
+
+        except SQLException as e:
+            raise e.message
+
+    async def lock_sale_date(self, session, sale_date) -> None:
+        # Две дельты за одну дату не должны читать одно и то же состояние
+        await session.execute(
+            select(
+                func.pg_advisory_xact_lock(
+                    func.hashtext(f"products:{sale_date.isoformat()}")
+                )
+            )
+        )
+
+    async def get_sale_date_state(
+        self, session, sale_date
+    ) -> dict[tuple[str, str], tuple[Any, int, float]]:
+        result = await session.execute(
+            select(
+                self.product_repository.model.product,
+                self.category_repository.model.name,
+                self.product_repository.model.id,
+                self.product_repository.model.quantity,
+                self.product_repository.model.price,
+            )
+            .join(Category, Product.category_id == Category.id)  # noqa
+            .where(self.product_repository.model.sale_date == sale_date)
+        )
+        return {
+            (product, category): (product_id, quantity, price)
+            for product, category, product_id, quantity, price in result.tuples()
+        }
+
+    async def apply_delta(
+        self,
+        session,
+        entity: ProductDeltaEntity,
+        category_ids: dict[str, Any] | None = None,
+    ):
+        try:
+            table = self.product_repository.model.__table__
+
+            if entity.inserts:
+                if category_ids is None:
+                    category_ids = await self.category_repository.get_or_create_ids(
+                        session=session,
+                        names={product.category_name for product in entity.inserts},
+                    )
+                await session.execute(
+                    insert(table),
+                    [
+                        {
+                            "product": product.product.name,
+                            "category_id": category_ids[product.category_name],
+                            "sale_date": entity.sale_date,
+                            "quantity": product.quantity.quantity,
+                            "price": product.price.price,
+                        }
+                        for product in entity.inserts
+                    ],
+                )
+
+            if entity.updates:
+                # Условие на дату оставляет в плане одну секцию products
+                await session.execute(
+                    update(table)
+                    .where(
+                        table.c.id == bindparam("b_id"),
+                        table.c.sale_date == entity.sale_date,
+                    )
+                    .values(
+                        quantity=bindparam("b_quantity"),
+                        price=bindparam("b_price"),
+                        updated_at=datetime.now(),
+                    ),
+                    [
+                        {
+                            "b_id": product_id,
+                            "b_quantity": product.quantity.quantity,
+                            "b_price": product.price.price,
+                        }
+                        for product_id, product in entity.updates
+                    ],
+                )
+
+            for start in range(0, len(entity.deletes), DELETE_CHUNK_SIZE):
+                await session.execute(
+                    delete(table).where(
+                        table.c.id.in_(entity.deletes[start : start + DELETE_CHUNK_SIZE]),
+                        table.c.sale_date == entity.sale_date,
+                    )
+                )
+
+            # Дата уже заблокирована lock_sale_date и прочитана целиком
+            if len(entity) and self.product_repository.aggregates is not None:
+                await self.product_repository.aggregates.refresh_dates(
+                    session=session, sale_dates=[entity.sale_date]
+                )
+
+            return len(entity)
+
+        except SQLException as e:
+            raise e.message
@@ -0,0 +1,86 @@
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from sqlalchemy import select, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.common.settings.logger import get_logger
+
+logger = get_logger(__name__)
+
+MONTH_SUFFIX = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    year, index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, index + 1, 1)
+
+
+@dataclass(eq=False)
+class PartitionRepository:
+    """
+    Месячные секции таблицы, секционированной RANGE (sale_date):
+    products_y2024m01 хранит даты с 2024-01-01 по 2024-01-31.
+    """
+
+    model: Any
+
+    @property
+    def table_name(self) -> str:
+        return self.model.__tablename__
+
+    def partition_name(self, month: date) -> str:
+        return f"{self.table_name}_y{month.year}m{month.month:02d}"
+
+    async def lock(self, session: AsyncSession) -> None:
+        # Секции создают и удаляют API, воркеры и beat, DDL выполняется по очереди
+        await session.execute(
+            select(
+                func.pg_advisory_xact_lock(
+                    func.hashtext(f"partitions:{self.table_name}")
+                )
+            )
+        )
+
+    async def get_months(self, session: AsyncSession) -> dict[date, str]:
+        result = await session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = CAST(:parent AS regclass)"
+            ),
+            {"parent": self.table_name},
+        )
+        months = {}
+        for name in result.scalars():
+            if match := MONTH_SUFFIX.search(name):
+                months[date(int(match[1]), int(match[2]), 1)] = name
+        return months
+
+    async def create_month(self, session: AsyncSession, month: date) -> str:
+        name = self.partition_name(month)
+        await session.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{self.table_name}" '
+                f"FOR VALUES FROM ('{month.isoformat()}') "
+                f"TO ('{add_months(month, 1).isoformat()}')"
+            )
+        )
+        logger.info(f"Created partition {name}")
+        return name
+
+    async def drop_month(self, session: AsyncSession, month: date) -> str:
+        # Секция отсоединяется и удаляется целиком, без DELETE по строкам
+        name = self.partition_name(month)
+        await session.execute(
+            text(f'ALTER TABLE "{self.table_name}" DETACH PARTITION "{name}"')
+        )
+        await session.execute(text(f'DROP TABLE "{name}"'))
+        logger.info(f"Dropped partition {name}")
+        return name
@@ -1,8 +1,17 @@
 from dataclasses import dataclass
 from datetime import date
+from functools import cached_property
 from typing import Any
 
-from sqlalchemy import select, func
+from sqlalchemy import (
+    select,
+    bindparam,
+    literal_column,
+    union_all,
+    null,
+    Date,
+    String,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.common.settings.logger import get_logger
@@ -12,15 +21,22 @@ logger = get_logger(__name__)
 
 @dataclass(eq=False)
 class QueryRepository:
+    """
+    Запросы строятся один раз на репозиторий, дата передаётся параметром
+    input_date: текст запроса не меняется и берётся из кэшей SQLAlchemy и asyncpg.
+    Итоги за дату читаются из дневных агрегатов, а не суммируются по products.
+    """
+
     product_model: Any
     category_model: Any
+    revenue_model: Any
+    product_sales_model: Any
+    category_revenue_model: Any
 
     async def get_date_total_revenue(self, session: AsyncSession, input_date: date):
-
-        query = select(
-            func.sum(self.product_model.price * self.product_model.quantity) / 100
-        ).where(self.product_model.sale_date == input_date)
-        result = await session.execute(query)
+        result = await session.execute(
+            self.total_revenue_query, {"input_date": input_date}
+        )
         total_revenue = result.scalar()
         return total_revenue
 
@@ -29,17 +45,9 @@ class QueryRepository:
     ):
 
         logger.debug(f"Executing top three products query for date: {input_date}")
-        query = (
-            select(
-                self.product_model.product,
-                func.sum(self.product_model.quantity / 100).label("total_sales"),
-            )
-            .where(self.product_model.sale_date == input_date)
-            .group_by(self.product_model.product)
-            .order_by(func.sum(self.product_model.quantity).desc())
-            .limit(3)
+        result = await session.execute(
+            self.top_three_products_query, {"input_date": input_date}
         )
-        result = await session.execute(query)
         top_products = result.scalars().fetchall()
         return top_products
 
@@ -47,18 +55,103 @@ class QueryRepository:
         self, session: AsyncSession, input_date: date
     ):
         query = await session.execute(
+            self.category_distribution_query, {"input_date": input_date}
+        )
+        category_distribution = query.fetchall()
+        return category_distribution
+
+    async def get_date_summary(self, session: AsyncSession, input_date: date):
+        """
+        Выручка, три лучших товара и выручка по категориям одним запросом:
+        одно соединение и один снимок данных на все три ответа.
+        """
+        result = await session.execute(self.summary_query, {"input_date": input_date})
+
+        total_revenue, top_products, category_distribution = None, [], []
+        for kind, name, value in result.tuples():
+            if kind == SUMMARY_TOTAL:
+                total_revenue = value
+            elif kind == SUMMARY_TOP:
+                top_products.append(name)
+            else:
+                category_distribution.append((name, value))
+        logger.debug(
+            f"Summary for {input_date}: {len(top_products)} top products, "
+            f"{len(category_distribution)} categories"
+        )
+        return total_revenue, top_products, category_distribution
+
+    @cached_property
+    def summary_query(self):
+        # Ветки UNION ALL размечены kind. Топ товаров упорядочен по value и
+        # имени так же, как top_three_products_query
+        total = select(
+            summary_kind(SUMMARY_TOTAL),
+            null().label("name"),
+            self.total_revenue_query.selected_columns[0].label("value"),
+        ).where(self.revenue_model.sale_date == input_date_param())
+
+        top_products = self.top_three_products_query.subquery("top_products")
+        top = select(summary_kind(SUMMARY_TOP), *top_products.c)
+
+        categories = self.category_distribution_query.subquery("categories_revenue")
+        category = select(summary_kind(SUMMARY_CATEGORY), *categories.c)
+
+        summary = union_all(total, top, category).subquery("summary")
+        return (
+            select(summary.c.kind, summary.c.name, summary.c.value)
+            .order_by(summary.c.kind, summary.c.value.desc(), summary.c.name)
+            .execution_options(statement_name="date_summary")
+        )
+
+    @cached_property
+    def total_revenue_query(self):
+        return (
+            select(self.revenue_model.revenue / 100)
+            .where(self.revenue_model.sale_date == input_date_param())
+            .execution_options(statement_name="date_total_revenue")
+        )
+
+    @cached_property
+    def top_three_products_query(self):
+        return (
+            select(
+                self.product_sales_model.product,
+                (self.product_sales_model.quantity / 100).label("total_sales"),
+            )
+            .where(self.product_sales_model.sale_date == input_date_param())
+            .order_by(
+                self.product_sales_model.quantity.desc(),
+                self.product_sales_model.product,
+            )
+            .limit(3)
+            .execution_options(statement_name="date_top_three_products")
+        )
+
+    @cached_property
+    def category_distribution_query(self):
+        return (
             select(
                 self.category_model.name,
-                func.sum(
-                    self.product_model.price * self.product_model.quantity / 100
-                ).label("category_revenue"),
+                (self.category_revenue_model.revenue / 100).label("category_revenue"),
             )
             .join(
-                self.product_model,
-                self.product_model.category_id == self.category_model.id,
+                self.category_revenue_model,
+                self.category_revenue_model.category_id == self.category_model.id,
             )
-            .where(self.product_model.sale_date == input_date)
-            .group_by(self.category_model.name)
+            .where(self.category_revenue_model.sale_date == input_date_param())
+            .execution_options(statement_name="date_category_distribution")
         )
-        category_distribution = query.fetchall()
-        return category_distribution
+
+
+SUMMARY_TOTAL = "total"
+SUMMARY_TOP = "top"
+SUMMARY_CATEGORY = "category"
+
+
+def summary_kind(kind: str):
+    return literal_column(f"'{kind}'", String).label("kind")
+
+
+def input_date_param():
+    return bindparam("input_date", type_=Date)
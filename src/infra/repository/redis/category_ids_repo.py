@@ -0,0 +1,47 @@
+import uuid
+from dataclasses import dataclass
+from typing import Iterable
+
+from redis import Redis
+
+from src.common.settings.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(eq=False)
+class CategoryIdsRepository:
+    """Общий для всех воркеров кэш name -> id категорий в одном хэше Redis."""
+
+    client: Redis
+    ttl: int
+    key: str = "category_ids"
+
+    def get_many(self, names: Iterable[str]) -> dict[str, uuid.UUID]:
+        names = list(names)
+        if not names:
+            return {}
+
+        values = self.client.hmget(self.key, names)
+        return {
+            name: uuid.UUID(value.decode("utf-8"))
+            for name, value in zip(names, values)
+            if value is not None
+        }
+
+    def set_many(self, category_ids: dict[str, uuid.UUID]) -> None:
+        if not category_ids:
+            return
+
+        pipeline = self.client.pipeline()
+        pipeline.hset(
+            self.key,
+            mapping={name: str(category_id) for name, category_id in category_ids.items()},
+        )
+        pipeline.expire(self.key, self.ttl)
+        pipeline.execute()
+
+    def delete_many(self, names: Iterable[str]) -> None:
+        names = list(names)
+        if names:
+            self.client.hdel(self.key, *names)
@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+from functools import cached_property
+
+from redis import Redis
+
+from src.common.settings.logger import get_logger
+
+logger = get_logger(__name__)
+
+PROCESSED = "processed"
+IN_FLIGHT = "in_flight"
+
+# Ключ меняется, только если в нём всё ещё значение этой задачи: после
+# истечения TTL ключ мог захватить повторно присланный фид
+IF_OWNER_EXTEND = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+IF_OWNER_SET = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+IF_OWNER_DELETE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass(eq=False)
+class FeedDigestRepository:
+    client: Redis
+    processed_ttl: int
+    in_flight_ttl: int
+    prefix: str = "feed_digest"
+
+    def get_key(self, digest: str) -> str:
+        return f"{self.prefix}:{digest}"
+
+    def get_state(self, digest: str) -> str | None:
+        state = self.client.get(self.get_key(digest))
+        if not state:
+            return None
+        state = state.decode("utf-8")
+        # Токен задачи наружу не отдаётся: in_flight:<task id>
+        return state.rsplit(":", 1)[0] if state.startswith(IN_FLIGHT) else state
+
+    def acquire(self, digest: str, owner: str, token: str) -> str | None:
+        """
+        None - фид наш, иначе текущее состояние: processed или in_flight:<task id>.
+        token отличает эту попытку от других задач с тем же owner.
+        """
+        key = self.get_key(digest)
+        value = in_flight_value(owner=owner, token=token)
+        if self.client.set(key, value, nx=True, ex=self.in_flight_ttl):
+            logger.debug(f"Feed digest {digest} acquired by {owner}")
+            return None
+        return self.get_state(digest) or self.acquire(
+            digest=digest, owner=owner, token=token
+        )
+
+    def extend(self, digest: str, owner: str, token: str) -> bool:
+        return bool(
+            self.extend_script(
+                keys=[self.get_key(digest)],
+                args=[in_flight_value(owner=owner, token=token), self.in_flight_ttl],
+            )
+        )
+
+    def mark_processed(self, digest: str, owner: str, token: str) -> bool:
+        return bool(
+            self.set_script(
+                keys=[self.get_key(digest)],
+                args=[
+                    in_flight_value(owner=owner, token=token),
+                    PROCESSED,
+                    self.processed_ttl,
+                ],
+            )
+        )
+
+    def release(self, digest: str, owner: str, token: str) -> bool:
+        return bool(
+            self.delete_script(
+                keys=[self.get_key(digest)],
+                args=[in_flight_value(owner=owner, token=token)],
+            )
+        )
+
+    @cached_property
+    def extend_script(self):
+        return self.client.register_script(IF_OWNER_EXTEND)
+
+    @cached_property
+    def set_script(self):
+        return self.client.register_script(IF_OWNER_SET)
+
+    @cached_property
+    def delete_script(self):
+        return self.client.register_script(IF_OWNER_DELETE)
+
+
+def in_flight_value(owner: str, token: str) -> str:
+    return f"{IN_FLIGHT}:{owner}:{token}"
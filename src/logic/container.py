@@ -9,18 +9,36 @@ from src.common.settings.config_dev import DevProjectSettings, get_dev_settings
 from src.infra.celery.redis import RedisClient
 from src.infra.db.mongo.db import AsyncMongoClient
 from src.infra.db.postgres.db import AsyncPostgresClient
+from src.infra.db.postgres.models.aggregate_models import (
+    DailyRevenue,
+    DailyProductSales,
+    DailyCategoryRevenue,
+)
+from src.infra.db.postgres.models.feed_models import FeedProgress, FeedStagedProduct
 from src.infra.db.postgres.models.lxml_models import Product, Category
 from src.infra.repository.mongo.gpt_answers_repo import GPTAnswersRepo
+from src.infra.repository.postgres.copy_loader import ProductCopyLoader
+from src.infra.repository.postgres.daily_aggregates_repo import (
+    DailyAggregateRepository,
+)
+from src.infra.repository.postgres.feed_progress_repo import FeedProgressRepository
 from src.infra.repository.postgres.lxml_repos import (
     ProductRepository,
     CategoryRepository,
     ProductCategoryRepository,
 )
+from src.infra.repository.postgres.partitions_repo import PartitionRepository
 from src.infra.repository.postgres.raw_sql import QueryRepository
+from src.infra.repository.redis.category_ids_repo import CategoryIdsRepository
+from src.infra.repository.redis.feed_digest_repo import FeedDigestRepository
 from src.logic.other.gpt_service import QuerySQLService
 from src.logic.other.http_client import get_http_client, HttpClient
+from src.logic.other.ingestion import IngestionScheduler
+from src.logic.repo_service.aggregate_service import DailyAggregateService
+from src.logic.repo_service.category_resolver import CategoryIdResolver
 from src.logic.repo_service.category_service import CategoryService
 from src.logic.repo_service.mongo_service import MongoService
+from src.logic.repo_service.partition_service import ProductPartitionService
 from src.logic.repo_service.product_category_service import ProductCategoryService
 from src.logic.repo_service.product_service import ProductService
 from src.logic.use_case.gpt_usecase import GPTUseCase
@@ -47,6 +65,32 @@ def _init_container() -> Container:
     )
     settings: ProjectSettings = container.resolve(ProjectSettings)
 
+    def resolve_redis() -> Redis:
+        return redis.Redis(host=settings.redis_host, port=settings.redis_port)
+
+    container.register(RedisClient, factory=resolve_redis, scope=Scope.singleton)
+    redis_client: Redis = container.resolve(RedisClient)
+
+    container.register(
+        FeedDigestRepository,
+        instance=FeedDigestRepository(
+            client=redis_client,
+            processed_ttl=settings.feed_digest_ttl,
+            in_flight_ttl=settings.feed_in_flight_ttl,
+        ),
+        scope=Scope.singleton,
+    )
+    feed_digest_repo = container.resolve(FeedDigestRepository)
+
+    container.register(
+        CategoryIdsRepository,
+        instance=CategoryIdsRepository(
+            client=redis_client, ttl=settings.category_cache_ttl
+        ),
+        scope=Scope.singleton,
+    )
+    category_ids_repo = container.resolve(CategoryIdsRepository)
+
     container.register(
         AsyncPostgresClient,
         instance=AsyncPostgresClient(settings=settings),
@@ -55,9 +99,21 @@ def _init_container() -> Container:
 
     async_postgres_client: AsyncPostgresClient = container.resolve(AsyncPostgresClient)
 
+    container.register(
+        DailyAggregateRepository,
+        instance=DailyAggregateRepository(
+            revenue_model=DailyRevenue,
+            product_sales_model=DailyProductSales,
+            category_revenue_model=DailyCategoryRevenue,
+            product_model=Product,
+        ),
+        scope=Scope.singleton,
+    )
+    aggregate_repo = container.resolve(DailyAggregateRepository)
+
     container.register(
         ProductRepository,
-        instance=ProductRepository(model=Product),
+        instance=ProductRepository(model=Product, aggregates=aggregate_repo),
         scope=Scope.singleton,
     )
 
@@ -69,17 +125,50 @@ def _init_container() -> Container:
 
     container.register(
         QueryRepository,
-        factory=lambda: QueryRepository(product_model=Product, category_model=Category),
+        factory=lambda: QueryRepository(
+            product_model=Product,
+            category_model=Category,
+            revenue_model=DailyRevenue,
+            product_sales_model=DailyProductSales,
+            category_revenue_model=DailyCategoryRevenue,
+        ),
+    )
+
+    container.register(
+        ProductCopyLoader,
+        factory=lambda: ProductCopyLoader(
+            product_model=Product,
+            aggregates=aggregate_repo,
+            staged_model=FeedStagedProduct,
+        ),
+        scope=Scope.singleton,
+    )
+
+    container.register(
+        FeedProgressRepository,
+        factory=lambda: FeedProgressRepository(model=FeedProgress),
+        scope=Scope.singleton,
+    )
+
+    container.register(
+        PartitionRepository,
+        factory=lambda: PartitionRepository(model=Product),
+        scope=Scope.singleton,
     )
 
     query_repo = container.resolve(QueryRepository)
+    partition_repo = container.resolve(PartitionRepository)
+    feed_progress_repo = container.resolve(FeedProgressRepository)
+    copy_loader = container.resolve(ProductCopyLoader)
     product_repo = container.resolve(ProductRepository)
     category_repo = container.resolve(CategoryRepository)
 
     container.register(
         ProductCategoryRepository,
         factory=lambda: ProductCategoryRepository(
-            product_repository=product_repo, category_repository=category_repo
+            product_repository=product_repo,
+            category_repository=category_repo,
+            copy_loader=copy_loader,
         ),
         scope=Scope.singleton,
     )
@@ -91,6 +180,7 @@ def _init_container() -> Container:
         factory=lambda: AsyncMongoClient(
             settings=settings, collection=settings.mongo_collection
         ),
+        scope=Scope.singleton,
     )
     mongo_client = container.resolve(AsyncMongoClient)
 
@@ -117,16 +207,34 @@ def _init_container() -> Container:
     )
 
     container.register(LXMLParser, factory=lambda: LXMLParser, scope=Scope.singleton)
-    container.register(HttpClient, factory=get_http_client)
+    container.register(
+        HttpClient,
+        instance=get_http_client(settings=settings),
+        scope=Scope.singleton,
+    )
 
     query_sql_service = container.resolve(QuerySQLService)
     lxml_parse = container.resolve(LXMLParser)
     httpx_client: HttpClient = container.resolve(HttpClient)
 
+    container.register(
+        CategoryIdResolver,
+        instance=CategoryIdResolver(
+            repository=category_repo,
+            session=async_postgres_client.get_async_session,
+            cache=category_ids_repo,
+            max_size=settings.category_cache_size,
+        ),
+        scope=Scope.singleton,
+    )
+    category_resolver = container.resolve(CategoryIdResolver)
+
     container.register(
         CategoryService,
         instance=CategoryService(
-            repository=category_repo, session=async_postgres_client.get_async_session
+            repository=category_repo,
+            session=async_postgres_client.get_async_session,
+            category_resolver=category_resolver,
         ),
     )
     container.register(
@@ -135,11 +243,42 @@ def _init_container() -> Container:
             repository=product_repo, session=async_postgres_client.get_async_session
         ),
     )
+    container.register(
+        ProductPartitionService,
+        instance=ProductPartitionService(
+            repository=partition_repo,
+            session=async_postgres_client.get_async_session,
+            months_ahead=settings.products_partitions_ahead,
+            retention_months=settings.products_retention_months,
+        ),
+        scope=Scope.singleton,
+    )
+    partition_service = container.resolve(ProductPartitionService)
+
+    container.register(
+        DailyAggregateService,
+        instance=DailyAggregateService(
+            repository=aggregate_repo,
+            session=async_postgres_client.get_async_session,
+        ),
+        scope=Scope.singleton,
+    )
+
     container.register(
         ProductCategoryService,
         instance=ProductCategoryService(
             repository=product_category_repo,
             session=async_postgres_client.get_async_session,
+            copy_threshold=settings.copy_loader_threshold,
+            category_resolver=category_resolver,
+            progress_repository=feed_progress_repo,
+            chunk_size=settings.ingest_chunk_size,
+            chunk_retries=settings.ingest_chunk_retries,
+            scheduler=IngestionScheduler(
+                concurrency=settings.ingest_concurrency,
+                queue_size=settings.ingest_queue_size,
+            ),
+            partition_service=partition_service,
         ),
     )
     product_category_service = container.resolve(ProductCategoryService)
@@ -171,12 +310,11 @@ def _init_container() -> Container:
         instance=ParseAndCreateProductCategoryUseCase(
             parser=lxml_parse,
             product_service_usecase=product_service_usecase,
+            http_client=httpx_client,
+            digest_repository=feed_digest_repo,
+            parser_engine=settings.parser_engine,
+            max_download_size=settings.feed_max_download_size,
         ),
     )
 
-    def resolve_redis() -> Redis:
-        return redis.Redis(host=settings.redis_host, port=settings.redis_port)
-
-    container.register(RedisClient, factory=resolve_redis, scope=Scope.singleton)
-
     return container
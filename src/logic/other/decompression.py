@@ -0,0 +1,200 @@
+import bz2
+import gzip
+import hashlib
+import lzma
+import mmap
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+from src.common.settings.logger import get_logger
+
+try:
+    import zstandard
+except ImportError:  # zstd - опциональная зависимость
+    zstandard = None
+
+logger = get_logger(__name__)
+
+MAGIC_NUMBERS = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+MAGIC_LENGTH = max(map(len, MAGIC_NUMBERS))
+
+CONTENT_ENCODINGS = {
+    "identity": "identity",
+    "gzip": "gzip",
+    "x-gzip": "gzip",
+    "deflate": "deflate",
+    "bzip2": "bz2",
+    "x-bzip2": "bz2",
+    "xz": "xz",
+    "zstd": "zstd",
+}
+
+ACCEPT_ENCODING = "gzip, deflate, zstd" if zstandard else "gzip, deflate"
+
+
+def detect_compression(head: bytes) -> str:
+    for magic, compression in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return compression
+    return "identity"
+
+
+def detect_file_compression(path: str | Path) -> str:
+    with open(path, "rb") as file:
+        return detect_compression(file.read(MAGIC_LENGTH))
+
+
+def open_compressed(path: str | Path, compression: str) -> BinaryIO:
+    match compression:
+        case "gzip":
+            return gzip.open(path, "rb")
+        case "bz2":
+            return bz2.open(path, "rb")
+        case "xz":
+            return lzma.open(path, "rb")
+        case "zstd":
+            if zstandard is None:
+                raise ValueError(
+                    "zstd compressed feed requires the 'zstandard' package"
+                )
+            return zstandard.open(path, "rb")
+        case _:
+            return open(path, "rb")
+
+
+@contextmanager
+def open_feed(path: str | Path) -> Iterator[str | BinaryIO]:
+    """
+    Источник для etree.iterparse: несжатый файл отдаётся libxml2 по имени
+    и читается им напрямую, сжатый - распаковывающим file-like объектом.
+    """
+    compression = detect_file_compression(path)
+    logger.debug(f"Feed file {path} compression: {compression}")
+    if compression == "identity":
+        yield str(path)
+        return
+
+    with open_compressed(path, compression) as file:
+        yield file
+
+
+def feed_digest(path: str | Path) -> str:
+    """
+    sha256 распакованного фида: сжатый файл, тот же фид без сжатия и фид,
+    скачанный по URL, получают один и тот же digest.
+    """
+    with open_compressed(path, detect_file_compression(path)) as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+@contextmanager
+def map_feed(path: str | Path) -> Iterator[mmap.mmap]:
+    """
+    Весь фид одним буфером (для sharded_parsing): файл отображается в память
+    через mmap без копирования в Python. Сжатый фид пришлось бы распаковать
+    в память целиком, поэтому он не принимается - его читает потоковый разбор.
+    """
+    compression = detect_file_compression(path)
+    if compression != "identity":
+        raise ValueError(
+            f"Sharded parsing needs an uncompressed feed file, {path} is {compression}"
+        )
+
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+@dataclass(eq=False)
+class StreamDecompressor:
+    """
+    Потоковая распаковка фида кусками.
+    encoding - значение Content-Encoding, без него формат определяется
+    по magic bytes в начале потока.
+    """
+
+    encoding: str | None = None
+    _compression: str | None = field(init=False, default=None)
+    _decompressor: Any = field(init=False, default=None, repr=False)
+    _head: bytes = field(init=False, default=b"", repr=False)
+
+    def __post_init__(self):
+        if self.encoding:
+            encoding = self.encoding.strip().lower()
+            if encoding not in CONTENT_ENCODINGS:
+                raise ValueError(f"Unsupported content encoding {self.encoding!r}")
+            self._set_compression(CONTENT_ENCODINGS[encoding])
+
+    @property
+    def compression(self) -> str | None:
+        return self._compression
+
+    def decompress(self, data: bytes) -> bytes:
+        if self._compression is None:
+            self._head += data
+            if len(self._head) < MAGIC_LENGTH:
+                return b""
+            data, self._head = self._head, b""
+            self._set_compression(detect_compression(data))
+
+        return self._decompress(data)
+
+    def flush(self) -> bytes:
+        if self._compression is None:
+            data, self._head = self._head, b""
+            self._set_compression(detect_compression(data))
+            return self._decompress(data)
+
+        if self._compression in ("gzip", "deflate"):
+            return self._decompressor.flush()
+        return b""
+
+    def _set_compression(self, compression: str) -> None:
+        self._compression = compression
+        self._decompressor = self._new_decompressor()
+        logger.debug(f"Feed compression: {compression}")
+
+    def _new_decompressor(self):
+        match self._compression:
+            case "gzip":
+                return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+            case "deflate":
+                # zlib-обёртка или gzip, определяется zlib автоматически
+                return zlib.decompressobj(wbits=zlib.MAX_WBITS | 32)
+            case "bz2":
+                return bz2.BZ2Decompressor()
+            case "xz":
+                return lzma.LZMADecompressor()
+            case "zstd":
+                if zstandard is None:
+                    raise ValueError(
+                        "zstd compressed feed requires the 'zstandard' package"
+                    )
+                return zstandard.ZstdDecompressor().decompressobj()
+            case _:
+                return None
+
+    def _decompress(self, data: bytes) -> bytes:
+        if self._decompressor is None:
+            return data
+
+        result = []
+        while data:
+            # gzip/bz2/xz допускают несколько склеенных потоков подряд
+            if getattr(self._decompressor, "eof", False):
+                self._decompressor = self._new_decompressor()
+            result.append(self._decompressor.decompress(data))
+            data = (
+                self._decompressor.unused_data
+                if getattr(self._decompressor, "eof", False)
+                else b""
+            )
+        return b"".join(result)
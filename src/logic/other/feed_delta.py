@@ -0,0 +1,45 @@
+from datetime import date
+from typing import Any, Iterable
+
+from src.common.settings.logger import get_logger
+from src.domain.entities.base_lxml import BaseLxmlEntity, ProductDeltaEntity
+
+logger = get_logger(__name__)
+
+
+def diff_date_products(
+    sale_date: date,
+    stored: dict[tuple[str, str], tuple[Any, int, float]],
+    entities: Iterable[BaseLxmlEntity],
+) -> ProductDeltaEntity:
+    """
+    stored - текущее состояние даты: (product, category) -> (id, quantity, price).
+    Новый фид за ту же дату заменяет это состояние, в дельту попадают
+    только изменившиеся строки.
+    """
+    delta = ProductDeltaEntity(sale_date=sale_date)
+    seen = set()
+
+    for entity in entities:
+        key = (entity.product.name, entity.category_name)
+        seen.add(key)
+
+        current = stored.get(key)
+        if current is None:
+            delta.inserts.append(entity)
+            continue
+
+        product_id, quantity, price = current
+        if quantity != entity.quantity.quantity or price != entity.price.price:
+            delta.updates.append((product_id, entity))
+
+    delta.deletes.extend(
+        product_id for key, (product_id, _, _) in stored.items() if key not in seen
+    )
+
+    logger.info(
+        f"Delta for {sale_date}: {len(delta.inserts)} inserts, "
+        f"{len(delta.updates)} updates, {len(delta.deletes)} deletes "
+        f"of {len(stored)} stored products"
+    )
+    return delta
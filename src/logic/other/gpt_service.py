@@ -69,3 +69,19 @@ class QuerySQLService:
         except Exception as e:
             logger.error(f"Exception occurred : {e}")
             raise
+
+    async def get_date_summary(self, input_date: date):
+        try:
+            logger.info(f"Getting summary for date: {input_date}")
+            async with self.session() as session:
+                summary = await self.repository.get_date_summary(
+                    session=session, input_date=input_date
+                )
+                logger.debug(f"Summary for {input_date}: {summary}")
+                return summary
+        except SQLAlchemyError as e:
+            logger.error(f"Error getting summary for date {input_date}: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Exception occurred : {e}")
+            raise
@@ -1,18 +1,72 @@
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
 from http import HTTPStatus
-from typing import Any
+from typing import Any, AsyncIterator
 from httpx._exceptions import HTTPError  # noqa
 
-from httpx import AsyncClient, RequestError
+from httpx import AsyncClient, Limits, RequestError, Timeout
 
+from src.common.settings.config import ProjectSettings
 from src.common.settings.logger import get_logger
+from src.logic.other.decompression import StreamDecompressor, ACCEPT_ENCODING
+
+try:
+    import h2  # noqa
+except ImportError:  # pragma: no cover - HTTP/2 не обязателен
+    h2 = None
 
 logger = get_logger(__name__)
 
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class DownloadTooLargeError(HTTPError):
+    def __init__(self, url: str, max_size: int):
+        super().__init__(f"Download from {url} exceeds {max_size} bytes")
+
 
 @dataclass(eq=False)
 class HttpClient:
-    client = AsyncClient
+    """
+    Один AsyncClient с пулом keep-alive соединений на процесс: повторные
+    запросы к GPT и источникам фидов не делают новое TLS-рукопожатие.
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 5.0
+    timeout: float = 100
+    connect_timeout: float = 10
+    http2: bool = False
+    _client: AsyncClient | None = field(init=False, default=None, repr=False)
+
+    @property
+    def client(self) -> AsyncClient:
+        if self._client is None:
+            http2 = self.http2
+            if http2 and h2 is None:
+                logger.warning("HTTP/2 requested but h2 is not installed, using HTTP/1.1")
+                http2 = False
+
+            self._client = AsyncClient(
+                limits=Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                timeout=Timeout(self.timeout, connect=self.connect_timeout),
+                http2=http2,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+
+    def reset_after_fork(self) -> None:
+        # Соединения родителя после fork не переиспользуем
+        self._client = None
 
     async def make_post_request(
         self,
@@ -25,21 +79,18 @@ class HttpClient:
         )
 
         try:
-            async with self.client() as client:
-                result = await client.post(
-                    url=url, json=json, headers=headers, timeout=100
-                )
+            result = await self.client.post(url=url, json=json, headers=headers)
 
-                if result.status_code == HTTPStatus.OK:
-                    logger.info(
-                        f"POST request successful. URL: {url}, Status Code: {result.status_code}, Response: {result.json()}"
-                    )
-                else:
-                    logger.warning(
-                        f"POST request failed. URL: {url}, Status Code: {result.status_code}, Response: {result.text[:50]}..."
-                    )
+            if result.status_code == HTTPStatus.OK:
+                logger.info(
+                    f"POST request successful. URL: {url}, Status Code: {result.status_code}, Response: {result.json()}"
+                )
+            else:
+                logger.warning(
+                    f"POST request failed. URL: {url}, Status Code: {result.status_code}, Response: {result.text[:50]}..."
+                )
 
-                return result
+            return result
 
         except RequestError as e:
             logger.error(
@@ -55,13 +106,86 @@ class HttpClient:
     async def make_get_request_and_download(
         self, url: str, headers: dict[str, Any] | None = None
     ) -> str:
-        response = await self.client().get(url=url, headers=headers)
+        response = await self.client.get(url=url, headers=headers)
         if response.status_code >= 400:
             logger.exception(f"can't get request by {url=}, {response.status_code=}")
             raise HTTPError
 
         return response.text
 
+    async def stream_download(
+        self,
+        url: str,
+        headers: dict[str, Any] | None = None,
+        max_size: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Тело читается сырым и распаковывается по мере поступления:
+        по Content-Encoding, а без него - по magic bytes (например, .xml.gz).
+        max_size ограничивает размер уже распакованных данных.
+        """
+        headers = {"Accept-Encoding": ACCEPT_ENCODING, **(headers or {})}
+        async with self.client.stream("GET", url=url, headers=headers) as response:
+            if response.status_code >= 400:
+                logger.error(f"can't get request by {url=}, {response.status_code=}")
+                raise HTTPError(f"can't get request by {url=}")
+
+            logger.debug(f"Streaming download started. URL: {url}")
+            decompressor = StreamDecompressor(
+                encoding=response.headers.get("Content-Encoding")
+            )
+            downloaded = 0
+
+            async for chunk in response.aiter_raw(DOWNLOAD_CHUNK_SIZE):
+                if data := decompressor.decompress(chunk):
+                    downloaded = check_download_size(
+                        url=url, downloaded=downloaded + len(data), max_size=max_size
+                    )
+                    yield data
+            if data := decompressor.flush():
+                check_download_size(
+                    url=url, downloaded=downloaded + len(data), max_size=max_size
+                )
+                yield data
+
+    async def download_to_file(
+        self,
+        url: str,
+        path: str,
+        headers: dict[str, Any] | None = None,
+        max_size: int | None = None,
+    ) -> int:
+        # Недокачанный файл удаляется, чтобы его не приняли за целый фид
+        written = 0
+        try:
+            with open(path, "wb") as file:
+                async for data in self.stream_download(
+                    url=url, headers=headers, max_size=max_size
+                ):
+                    file.write(data)
+                    written += len(data)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+
+        logger.info(f"Downloaded {written} bytes from {url} to {path}")
+        return written
+
+
+def check_download_size(url: str, downloaded: int, max_size: int | None) -> int:
+    if max_size is not None and downloaded > max_size:
+        logger.error(f"Download from {url} exceeds {max_size} bytes")
+        raise DownloadTooLargeError(url=url, max_size=max_size)
+    return downloaded
+
 
-def get_http_client() -> HttpClient:
-    return HttpClient()
+def get_http_client(settings: ProjectSettings) -> HttpClient:
+    return HttpClient(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+        timeout=settings.http_timeout,
+        connect_timeout=settings.http_connect_timeout,
+        http2=settings.http2,
+    )
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, TypeVar
+
+from src.common.settings.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(eq=False)
+class IngestionProgress:
+    batches_queued: int = 0
+    batches_acked: int = 0
+    products_queued: int = 0
+    products_acked: int = 0
+    # Строк, которые реально записал persist (после слияния дублей)
+    rows_written: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def queue(self, size: int) -> None:
+        self.batches_queued += 1
+        self.products_queued += size
+
+    def ack(self, size: int, written: int) -> None:
+        self.batches_acked += 1
+        self.products_acked += size
+        self.rows_written += written
+
+    def to_dict(self) -> dict[str, Any]:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "batches_queued": self.batches_queued,
+            "batches_acked": self.batches_acked,
+            "products_queued": self.products_queued,
+            "products_acked": self.products_acked,
+            "rows_written": self.rows_written,
+            "seconds": round(elapsed, 3),
+            "products_per_second": round(
+                self.products_acked / elapsed if elapsed else 0.0, 1
+            ),
+        }
+
+
+@dataclass(eq=False)
+class IngestionScheduler:
+    """
+    Между разбором и записью стоит очередь на queue_size пачек: производитель
+    ждёт, пока писатели не освободят место, поэтому в памяти не больше
+    queue_size + concurrency пачек. concurrency пачек пишутся одновременно,
+    каждая подтверждается (ack) после коммита.
+    """
+
+    concurrency: int = 4
+    queue_size: int = 8
+
+    async def run(
+        self,
+        batches: Iterable[tuple[int, list[T]]] | AsyncIterable[tuple[int, list[T]]],
+        persist: Callable[[int, list[T]], Awaitable[int]],
+        on_ack: Callable[[IngestionProgress], Any] | None = None,
+    ) -> IngestionProgress:
+        """batches - пары (номер пачки, пачка), persist возвращает число записанных строк."""
+        queue: asyncio.Queue[tuple[int, list[T]] | None] = asyncio.Queue(
+            maxsize=self.queue_size
+        )
+        progress = IngestionProgress()
+
+        async def produce() -> None:
+            async for index, batch in iterate(batches):
+                await queue.put((index, batch))
+                progress.queue(len(batch))
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def consume() -> None:
+            while (item := await queue.get()) is not None:
+                index, batch = item
+                written = await persist(index, batch)
+                progress.ack(size=len(batch), written=written)
+                logger.debug(f"Batch {index} acknowledged: {progress.to_dict()}")
+                if on_ack is not None:
+                    on_ack(progress)
+
+        tasks = [asyncio.create_task(produce())] + [
+            asyncio.create_task(consume()) for _ in range(self.concurrency)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Первая ошибка останавливает и разбор, и остальных писателей
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        logger.info(f"Ingestion finished: {progress.to_dict()}")
+        return progress
+
+
+async def iterate(items: Iterable[T] | AsyncIterable[T]):
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
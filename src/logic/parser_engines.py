@@ -0,0 +1,278 @@
+import asyncio
+import datetime
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import AsyncIterator, Iterator
+
+from lxml import etree
+
+from src.common.settings.logger import get_logger
+from src.domain.entities.base_lxml import BaseLxmlEntity
+from src.logic.xml_parser import LXMLParser, add_product, get_sale_date
+
+logger = get_logger(__name__)
+
+PRODUCT_FIELDS = frozenset(("name", "quantity", "price", "category"))
+# Байт за раз подаётся в XMLParser при потоковом разборе файла
+FEED_READ_SIZE = 64 * 1024
+
+
+class BaseParserEngine(ABC):
+    """
+    Движок разбора фида. parse принимает то же, что etree.parse (имя файла
+    или бинарный file-like объект), incremental возвращает парсер с feed/close.
+    """
+
+    name: str
+
+    @abstractmethod
+    def parse(self, source, tag: str = "product") -> [BaseLxmlEntity]: ...
+
+    @abstractmethod
+    def incremental(self, tag: str = "product"): ...
+
+    def batches(
+        self, source, tag: str = "product", batch_size: int = 10_000
+    ) -> Iterator[list[BaseLxmlEntity]]:
+        # Движок без потокового разбора отдаёт пачки только после всего фида
+        products = list(self.parse(source=source, tag=tag))
+        for start in range(0, len(products), batch_size):
+            yield products[start : start + batch_size]
+
+    async def iter_batches(
+        self, source, tag: str = "product", batch_size: int = 10_000
+    ) -> AsyncIterator[list[BaseLxmlEntity]]:
+        """
+        batches в отдельном потоке: event loop не блокируется, а следующая
+        пачка разбирается, пока предыдущая пишется в базу.
+        """
+        loop = asyncio.get_running_loop()
+        # Весь разбор в одном потоке: объекты lxml не передаются между потоками
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feed-parser")
+        batches = self.batches(source=source, tag=tag, batch_size=batch_size)
+        try:
+            while (
+                batch := await loop.run_in_executor(executor, next, batches, None)
+            ) is not None:
+                yield batch
+        finally:
+            executor.submit(batches.close)
+            executor.shutdown(wait=False)
+
+
+class TreeParserEngine(BaseParserEngine):
+    # Для каждого <product> строится элемент дерева, поля читаются через findtext
+    name = "tree"
+
+    def parse(self, source, tag: str = "product") -> [BaseLxmlEntity]:
+        return LXMLParser.streaming_parsing(source=source, tag=tag)
+
+    def incremental(self, tag: str = "product"):
+        return LXMLParser.incremental_parsing(tag=tag)
+
+    def batches(
+        self, source, tag: str = "product", batch_size: int = 10_000
+    ) -> Iterator[list[BaseLxmlEntity]]:
+        return LXMLParser.batch_parsing(source=source, tag=tag, batch_size=batch_size)
+
+
+class TargetParserEngine(BaseParserEngine):
+    # libxml2 вызывает методы ProductsTarget напрямую, элементы не создаются
+    name = "target"
+
+    def parse(self, source, tag: str = "product") -> [BaseLxmlEntity]:
+        try:
+            logger.info("Starting target XML parsing.")
+            target = ProductsTarget(tag=tag)
+            try:
+                etree.parse(source, etree.XMLParser(target=target))
+            except etree.XMLSyntaxError as e:
+                logger.error(f"XML syntax error: {e}")
+                raise ValueError("Invalid XML format.") from e
+
+            return target.result()
+
+        except ValueError as e:
+            logger.error(f"Value error during parsing: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error during XML parsing: {e}")
+            raise
+
+    def incremental(self, tag: str = "product") -> "IncrementalTargetParser":
+        return IncrementalTargetParser(tag=tag)
+
+    def batches(
+        self, source, tag: str = "product", batch_size: int = 10_000
+    ) -> Iterator[list[BaseLxmlEntity]]:
+        """
+        Файл подаётся в XMLParser по FEED_READ_SIZE байт, готовые продукты
+        забираются пачками по batch_size, не дожидаясь конца фида.
+        """
+        try:
+            logger.info("Starting target batch XML parsing.")
+            parser = self.incremental(tag=tag)
+            batches = 0
+
+            with open_source(source) as file:
+                while data := file.read(FEED_READ_SIZE):
+                    parser.feed(data)
+                    for batch in parser.take_batches(batch_size):
+                        batches += 1
+                        yield batch
+
+            parser.close()
+            for batch in parser.take_batches(batch_size, final=True):
+                batches += 1
+                yield batch
+            logger.info(f"Parsed feed into {batches} batches of up to {batch_size}.")
+
+        except ValueError as e:
+            logger.error(f"Value error during parsing: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error during XML parsing: {e}")
+            raise
+
+
+@dataclass(eq=False)
+class IncrementalTargetParser:
+    tag: str = "product"
+    _target: "ProductsTarget" = field(init=False, repr=False)
+    _parser: etree.XMLParser = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._target = ProductsTarget(tag=self.tag)
+        self._parser = etree.XMLParser(target=self._target)
+
+    def feed(self, data: bytes) -> None:
+        try:
+            self._parser.feed(data)
+        except etree.XMLSyntaxError as e:
+            logger.error(f"XML syntax error: {e}")
+            raise ValueError("Invalid XML format.") from e
+
+    def close(self) -> [BaseLxmlEntity]:
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError as e:
+            logger.error(f"XML syntax error: {e}")
+            raise ValueError("Invalid XML format.") from e
+        return self._target.result()
+
+    def take_batches(
+        self, batch_size: int, final: bool = False
+    ) -> Iterator[list[BaseLxmlEntity]]:
+        # Забранный продукт уходит из цели: его повтор дальше по фиду попадёт
+        # в следующую пачку, как у LXMLParser.batch_parsing
+        extracted_data = self._target.extracted_data
+        while len(extracted_data) >= batch_size or (final and extracted_data):
+            names = list(islice(extracted_data, batch_size))
+            yield [extracted_data.pop(name) for name in names]
+
+
+class ProductsTarget:
+    """
+    Цель для etree.XMLParser(target=...): собирает текст полей <product>
+    и добавляет продукт по закрывающему тегу. Как и findtext, берётся
+    только текст первого дочернего элемента с нужным именем.
+    """
+
+    __slots__ = (
+        "tag",
+        "extracted_data",
+        "sale_date",
+        "_depth",
+        "_product_depth",
+        "_fields",
+        "_field",
+        "_text",
+    )
+
+    def __init__(self, tag: str = "product"):
+        self.tag = tag
+        self.extracted_data: dict[str, BaseLxmlEntity] = {}
+        self.sale_date: datetime.date | None = None
+        self._depth = 0
+        self._product_depth: int | None = None
+        self._fields: dict[str, str] = {}
+        self._field: str | None = None
+        self._text: list[str] = []
+
+    def start(self, tag: str, attrib) -> None:
+        self._depth += 1
+
+        if self._depth == 1:
+            self.sale_date = get_sale_date(attrib.get("date"))
+        elif self._product_depth is None:
+            if tag == self.tag:
+                self._product_depth = self._depth
+                self._fields = {}
+        elif self._field is not None:
+            # Вложенный элемент внутри поля: findtext его текст не учитывает
+            self._fields[self._field] = "".join(self._text)
+            self._field = None
+        elif (
+            self._depth == self._product_depth + 1
+            and tag in PRODUCT_FIELDS
+            and tag not in self._fields
+        ):
+            self._field = tag
+            self._text = []
+
+    def data(self, data: str) -> None:
+        if self._field is not None:
+            self._text.append(data)
+
+    def end(self, tag: str) -> None:
+        if self._field is not None:
+            self._fields[self._field] = "".join(self._text)
+            self._field = None
+        elif self._depth == self._product_depth:
+            fields = self._fields
+            add_product(
+                extracted_data=self.extracted_data,
+                sale_date=self.sale_date,
+                name=fields.get("name"),
+                quantity=fields.get("quantity"),
+                price=fields.get("price"),
+                category=fields.get("category"),
+            )
+            self._product_depth = None
+
+        self._depth -= 1
+
+    def close(self) -> None: ...
+
+    def result(self) -> [BaseLxmlEntity]:
+        logger.info(f"Parsed and extracted {len(self.extracted_data)} products.")
+        return self.extracted_data.values()
+
+
+PARSER_ENGINES: dict[str, type[BaseParserEngine]] = {
+    TreeParserEngine.name: TreeParserEngine,
+    TargetParserEngine.name: TargetParserEngine,
+}
+
+
+@contextmanager
+def open_source(source):
+    # Имя файла открываем сами, file-like объект читаем как есть
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, "rb") as file:
+            yield file
+    else:
+        yield source
+
+
+def get_parser_engine(name: str) -> BaseParserEngine:
+    try:
+        return PARSER_ENGINES[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown parser engine '{name}', expected one of {list(PARSER_ENGINES)}"
+        ) from None
@@ -0,0 +1,37 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from src.common.settings.logger import get_logger
+from src.infra.repository.postgres.daily_aggregates_repo import (
+    DailyAggregateRepository,
+)
+
+logger = get_logger(__name__)
+
+
+@dataclass(eq=False)
+class DailyAggregateService:
+    repository: DailyAggregateRepository
+    session: "(_P: Any) -> Any"
+
+    async def rebuild(self) -> None:
+        async with self.session() as session:
+            try:
+                await self.repository.rebuild(session=session)
+            except Exception as e:
+                logger.error(f"Error rebuilding daily aggregates: {e}")
+                raise
+
+    async def check(self) -> list[date]:
+        """Даты, агрегаты которых разошлись с products."""
+        async with self.session() as session:
+            try:
+                mismatched = await self.repository.get_mismatched_dates(session=session)
+            except Exception as e:
+                logger.error(f"Error checking daily aggregates: {e}")
+                raise
+        if mismatched:
+            logger.warning(f"Daily aggregates mismatch products for dates: {mismatched}")
+        return mismatched
+
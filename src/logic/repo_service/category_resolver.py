@@ -0,0 +1,122 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from src.common.settings.logger import get_logger
+from src.infra.repository.postgres.lxml_repos import CategoryRepository
+from src.infra.repository.redis.category_ids_repo import CategoryIdsRepository
+
+logger = get_logger(__name__)
+
+
+@dataclass(eq=False)
+class CategoryIdResolver:
+    """
+    name -> id категорий для загрузки фидов: LRU процесса, затем хэш в Redis,
+    затем один запрос get_or_create_ids на все неизвестные имена фида.
+    Запрос идёт в отдельной транзакции, поэтому в кэш попадают только
+    закоммиченные id. Одновременные промахи по одному имени внутри процесса
+    ждут один запрос, между воркерами гонку снимает ON CONFLICT DO NOTHING.
+    """
+
+    repository: CategoryRepository
+    session: "(_P: Any) -> Any"
+    cache: CategoryIdsRepository | None = None
+    max_size: int = 1024
+    # Сколько секунд LRU верит id без Redis: удаление категории в другом
+    # процессе сбрасывает только Redis
+    local_ttl: float = 300
+    _local: OrderedDict = field(init=False, repr=False, default_factory=OrderedDict)
+    _pending: dict[str, asyncio.Future] = field(
+        init=False, repr=False, default_factory=dict
+    )
+
+    async def resolve(self, names: Iterable[str]) -> dict[str, uuid.UUID]:
+        category_ids, missing = self.get_local(set(names))
+
+        if missing and self.cache is not None:
+            cached = self.cache.get_many(missing)
+            self.remember(cached)
+            category_ids.update(cached)
+            missing -= cached.keys()
+
+        if missing:
+            category_ids.update(await self.fetch(missing))
+        return category_ids
+
+    def invalidate(self, names: Iterable[str]) -> None:
+        names = list(names)
+        for name in names:
+            self._local.pop(name, None)
+        if self.cache is not None:
+            self.cache.delete_many(names)
+
+    def get_local(self, names: set[str]) -> tuple[dict[str, uuid.UUID], set[str]]:
+        now = time.monotonic()
+        category_ids = {}
+        missing = set()
+
+        for name in names:
+            cached = self._local.get(name)
+            if cached is not None and cached[1] > now:
+                self._local.move_to_end(name)
+                category_ids[name] = cached[0]
+            else:
+                missing.add(name)
+        return category_ids, missing
+
+    def remember(self, category_ids: dict[str, uuid.UUID]) -> None:
+        expires_at = time.monotonic() + self.local_ttl
+        for name, category_id in category_ids.items():
+            self._local[name] = (category_id, expires_at)
+            self._local.move_to_end(name)
+
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    async def fetch(self, names: set[str]) -> dict[str, uuid.UUID]:
+        loop = asyncio.get_running_loop()
+        waiting = {
+            name: self._pending[name]
+            for name in names
+            if name in self._pending and self._pending[name].get_loop() is loop
+        }
+        own = names - waiting.keys()
+        category_ids = {}
+
+        if own:
+            futures = {name: loop.create_future() for name in own}
+            self._pending.update(futures)
+            try:
+                logger.debug(f"Resolving {len(own)} categories in database")
+                async with self.session() as session:
+                    created = await self.repository.get_or_create_ids(
+                        session=session, names=own
+                    )
+            except BaseException as e:
+                for future in futures.values():
+                    if isinstance(e, Exception):
+                        future.set_exception(e)
+                        # Исключение получит вызывающий, ожидающих может и не быть
+                        future.exception()
+                    else:
+                        future.cancel()
+                raise
+            finally:
+                for name in own:
+                    if self._pending.get(name) is futures[name]:
+                        del self._pending[name]
+
+            for name, future in futures.items():
+                future.set_result(created[name])
+            if self.cache is not None:
+                self.cache.set_many(created)
+            self.remember(created)
+            category_ids.update(created)
+
+        for name, future in waiting.items():
+            category_ids[name] = await future
+        return category_ids
@@ -6,6 +6,7 @@ from src.common.settings.logger import get_logger
 from src.domain.entities.base_lxml import CategoryModelWithId
 from src.domain.entities.lxml_entities import CategoryEntity, CategoryQuery
 from src.infra.repository.postgres.lxml_repos import CategoryRepository
+from src.logic.repo_service.category_resolver import CategoryIdResolver
 
 logger = get_logger(__name__)
 
@@ -14,6 +15,11 @@ logger = get_logger(__name__)
 class CategoryService:
     repository: CategoryRepository
     session: "(_P: Any) -> Any"
+    category_resolver: CategoryIdResolver | None = None
+
+    def invalidate(self, *names: str | None) -> None:
+        if self.category_resolver is not None:
+            self.category_resolver.invalidate(name for name in names if name)
 
     async def get(
         self,
@@ -77,7 +83,6 @@ class CategoryService:
                     logger.info(f"Successfully updated category: {category}")
                 else:
                     logger.warning(f"Category update returned None. Entity: {entity}")
-                return category
             except SQLAlchemyError as e:
                 logger.error(f"Error updating category {e}")
                 raise
@@ -85,6 +90,11 @@ class CategoryService:
                 logger.error(f"Exception occurred : {e}")
                 raise
 
+        # Кэш сбрасывается после коммита, иначе его успеют заполнить старым id
+        if category:
+            self.invalidate(entity.name, changed_entity.name)
+        return category
+
     async def delete_category(
         self,
         entity: CategoryEntity,
@@ -100,10 +110,13 @@ class CategoryService:
                     logger.info(f"Successfully deleted category: {category}")
                 else:
                     logger.warning(f"Category deletion returned None. Entity: {entity}")
-                return category
             except SQLAlchemyError as e:
                 logger.error(f"Error deleting category {e}")
                 raise
             except Exception as e:
                 logger.error(f"Exception occurred : {e}")
                 raise
+
+        if category:
+            self.invalidate(entity.name)
+        return category
@@ -0,0 +1,72 @@
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Iterable
+
+from src.common.settings.logger import get_logger
+from src.infra.repository.postgres.partitions_repo import (
+    PartitionRepository,
+    month_start,
+    add_months,
+)
+
+logger = get_logger(__name__)
+
+
+@dataclass(eq=False)
+class ProductPartitionService:
+    repository: PartitionRepository
+    session: "(_P: Any) -> Any"
+    # Секции создаются заранее на текущий и months_ahead следующих месяцев
+    months_ahead: int = 3
+    # Хранятся текущий и retention_months предыдущих месяцев, None - все
+    retention_months: int | None = None
+    _known: set[date] = field(init=False, default_factory=set, repr=False)
+
+    async def ensure_partitions(self, sale_dates: Iterable[date]) -> list[str]:
+        """Создаёт недостающие секции для дат; уже виденные месяцы не проверяются."""
+        months = {month_start(sale_date) for sale_date in sale_dates} - self._known
+        if not months:
+            return []
+
+        created = []
+        async with self.session() as session:
+            try:
+                await self.repository.lock(session=session)
+                existing = await self.repository.get_months(session=session)
+                for month in sorted(months - existing.keys()):
+                    created.append(
+                        await self.repository.create_month(session=session, month=month)
+                    )
+            except Exception as e:
+                logger.error(f"Error creating partitions for {sorted(months)}: {e}")
+                raise
+        self._known |= months
+        return created
+
+    async def maintain(self, today: date | None = None) -> dict[str, list[str]]:
+        first = month_start(today or date.today())
+        created = await self.ensure_partitions(
+            add_months(first, months) for months in range(self.months_ahead + 1)
+        )
+
+        dropped = []
+        if self.retention_months is not None:
+            cutoff = add_months(first, -self.retention_months)
+            async with self.session() as session:
+                try:
+                    await self.repository.lock(session=session)
+                    existing = await self.repository.get_months(session=session)
+                    for month in sorted(existing):
+                        if month < cutoff:
+                            dropped.append(
+                                await self.repository.drop_month(
+                                    session=session, month=month
+                                )
+                            )
+                            self._known.discard(month)
+                except Exception as e:
+                    logger.error(f"Error dropping partitions before {cutoff}: {e}")
+                    raise
+
+        logger.info(f"Partitions maintained: created={created}, dropped={dropped}")
+        return {"created": created, "dropped": dropped}
@@ -1,5 +1,9 @@
-from dataclasses import dataclass
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, AsyncIterable, Awaitable, Iterable, Callable
 
+from sqlalchemy.exc import DBAPIError, DataError, IntegrityError, ProgrammingError
 
 from src.common.filters.pagination import PaginationFilters
 from src.common.settings.logger import get_logger
@@ -7,17 +11,64 @@ from src.domain.entities.base_lxml import (
     ProductEntityWithCategoryId,
     ProductModelWithId,
     BaseLxmlEntity,
+    ProductColumnsEntity,
+    ProductDeltaEntity,
 )
-from src.infra.exceptions.exceptions import SQLException
+from src.infra.exceptions.exceptions import SQLException, ChunkAlreadyCommitted
+from src.infra.repository.postgres.feed_progress_repo import FeedProgressRepository
 from src.infra.repository.postgres.lxml_repos import ProductCategoryRepository
+from src.logic.other.feed_delta import diff_date_products
+from src.logic.other.ingestion import IngestionScheduler, IngestionProgress
+from src.logic.repo_service.category_resolver import CategoryIdResolver
+from src.logic.repo_service.partition_service import ProductPartitionService
 
 logger = get_logger(__name__)
 
+# Секунды, умножаются на номер попытки
+CHUNK_RETRY_DELAY = 1
+# Размер пачки при потоковой записи, если chunk_size не задан
+DEFAULT_BATCH_SIZE = 10_000
+
+
+def is_retryable(error: Exception) -> bool:
+    # Ошибки в самих данных повтор не исправит, в отличие от обрыва
+    # соединения, дедлока или ошибки сериализации
+    if isinstance(error, (IntegrityError, DataError, ProgrammingError)):
+        return False
+    return isinstance(error, (DBAPIError, ConnectionError, TimeoutError))
+
 
 @dataclass(eq=False)
 class ProductCategoryService:
     repository: ProductCategoryRepository
     session: "(_P: Any) -> Any"
+    # С этого числа продуктов фид грузится через COPY, None - всегда INSERT
+    copy_threshold: int | None = None
+    category_resolver: CategoryIdResolver | None = None
+    progress_repository: FeedProgressRepository | None = None
+    # None - весь фид в одной транзакции
+    chunk_size: int | None = None
+    chunk_retries: int = 3
+    scheduler: IngestionScheduler = field(default_factory=IngestionScheduler)
+    partition_service: ProductPartitionService | None = None
+
+    async def resolve_categories(self, names: Iterable[str]) -> dict[str, Any] | None:
+        # Без резолвера категории создаются в транзакции самой загрузки
+        if self.category_resolver is None:
+            return None
+        return await self.category_resolver.resolve(names)
+
+    async def ensure_partitions(self, sale_dates: Iterable[date]) -> None:
+        # Секция месяца должна существовать до транзакции, которая пишет в неё
+        if self.partition_service is not None:
+            await self.partition_service.ensure_partitions(sale_dates)
+
+    def use_copy(self, size: int) -> bool:
+        return (
+            self.repository.copy_loader is not None
+            and self.copy_threshold is not None
+            and size >= self.copy_threshold
+        )
 
     async def get_products_with_category(
         self,
@@ -63,3 +114,350 @@ class ProductCategoryService:
             except Exception as e:
                 logger.error(f"Exception occurred : {e}")
                 raise
+
+    async def create_category_products(
+        self,
+        entities: list[BaseLxmlEntity],
+        digest: str | None = None,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ) -> int:
+        """
+        Пишет фид чанками по chunk_size продуктов, каждый в своей транзакции,
+        до scheduler.concurrency чанков одновременно. Если передан digest,
+        вместе с чанком коммитится отметка о нём, и повторная загрузка того же
+        фида пропускает уже записанные чанки.
+        """
+        logger.debug(f"Creating {len(entities)} products")
+        use_copy = self.use_copy(len(entities))
+
+        chunk_size, committed = await self.get_committed_chunks(digest)
+        chunk_size = chunk_size or self.chunk_size or max(len(entities), 1)
+        if committed:
+            logger.info(f"Feed {digest} already has {len(committed)} chunks committed")
+
+        chunks = (
+            (index, entities[start : start + chunk_size])
+            for index, start in enumerate(range(0, len(entities), chunk_size))
+            if index not in committed
+        )
+        return await self.write_chunks(
+            chunks=chunks,
+            persist=lambda index, chunk: self.create_chunk(
+                entities=chunk,
+                use_copy=use_copy,
+                digest=digest,
+                chunk_index=index,
+                chunk_size=chunk_size,
+            ),
+            on_progress=on_progress,
+        )
+
+    async def create_category_product_batches(
+        self,
+        make_batches: Callable[[int], AsyncIterable[list[BaseLxmlEntity]]],
+        digest: str | None = None,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ) -> int:
+        """
+        make_batches(batch_size) отдаёт пачки по мере разбора фида. Пачки
+        сразу пишутся чанками в staging, а в products фид переносится одним
+        запросом после конца разбора: оборванный или битый фид туда не попадёт.
+        Размер пачки берётся из прогресса, чтобы номера чанков совпали при повторе.
+        """
+        if digest is None or not self.can_stage():
+            # Без staging фид собирается целиком и пишется после разбора
+            entities = await merge_batches(
+                make_batches(self.chunk_size or DEFAULT_BATCH_SIZE)
+            )
+            return await self.create_category_products(
+                entities=entities, digest=digest, on_progress=on_progress
+            )
+
+        chunk_size, committed = await self.get_committed_chunks(digest)
+        chunk_size = chunk_size or self.chunk_size or DEFAULT_BATCH_SIZE
+        if committed:
+            logger.info(f"Feed {digest} already has {len(committed)} chunks staged")
+
+        async def chunks():
+            index = 0
+            async for batch in make_batches(chunk_size):
+                if index not in committed:
+                    yield index, batch
+                index += 1
+
+        try:
+            await self.write_chunks(
+                chunks=chunks(),
+                persist=lambda index, chunk: self.stage_chunk(
+                    entities=chunk,
+                    digest=digest,
+                    chunk_index=index,
+                    chunk_size=chunk_size,
+                ),
+                on_progress=on_progress,
+            )
+        except ValueError:
+            # Битый фид целиком не загрузится, накопленные строки не нужны
+            await self.discard_staged(digest)
+            raise
+        return await self.merge_staged(digest)
+
+    async def create_category_product_columns(
+        self,
+        entity: ProductColumnsEntity,
+        digest: str | None = None,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ) -> int:
+        """
+        То же, что create_category_products, но для колонок: чанки - срезы
+        колонок, отметки прогресса и повтор с места сбоя те же.
+        """
+        logger.debug(
+            f"Creating {len(entity)} products from columns. Sale date: {entity.sale_date}"
+        )
+        use_copy = self.use_copy(len(entity))
+
+        chunk_size, committed = await self.get_committed_chunks(digest)
+        chunk_size = chunk_size or self.chunk_size or max(len(entity), 1)
+        if committed:
+            logger.info(f"Feed {digest} already has {len(committed)} chunks committed")
+
+        chunks = (
+            (index, entity.chunk(start, start + chunk_size))
+            for index, start in enumerate(range(0, len(entity), chunk_size))
+            if index not in committed
+        )
+        return await self.write_chunks(
+            chunks=chunks,
+            persist=lambda index, chunk: self.create_columns_chunk(
+                entity=chunk,
+                use_copy=use_copy,
+                digest=digest,
+                chunk_index=index,
+                chunk_size=chunk_size,
+            ),
+            on_progress=on_progress,
+        )
+
+    async def write_chunks(
+        self,
+        chunks: Iterable[tuple[int, Any]] | AsyncIterable[tuple[int, Any]],
+        persist: Callable[[int, Any], Awaitable[int]],
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ) -> int:
+        progress = await self.scheduler.run(
+            batches=chunks, persist=persist, on_ack=on_progress
+        )
+        return progress.rows_written
+
+    async def create_chunk(
+        self,
+        entities: list[BaseLxmlEntity],
+        use_copy: bool,
+        digest: str | None,
+        chunk_index: int,
+        chunk_size: int,
+    ) -> int:
+        await self.ensure_partitions(entity.sale_date for entity in entities)
+        # Категории создаются отдельными запросами до записи и COPY, и INSERT:
+        # одна новая категория в параллельных чанках видна каждому из них
+        category_ids = await self.resolve_categories(
+            entity.category_name for entity in entities
+        )
+
+        async def write(session) -> int:
+            if use_copy:
+                return await self.repository.copy_category_and_products(
+                    entities=entities, session=session, category_ids=category_ids
+                )
+            return await self.repository.create_category_and_products(
+                entities=entities, session=session, category_ids=category_ids
+            )
+
+        return await self.commit_chunk(
+            write=write,
+            digest=digest,
+            chunk_index=chunk_index,
+            chunk_size=chunk_size,
+            products=len(entities),
+        )
+
+    async def stage_chunk(
+        self,
+        entities: list[BaseLxmlEntity],
+        digest: str,
+        chunk_index: int,
+        chunk_size: int,
+    ) -> int:
+        await self.ensure_partitions(entity.sale_date for entity in entities)
+        category_ids = await self.resolve_categories(
+            entity.category_name for entity in entities
+        )
+        return await self.commit_chunk(
+            # Номер строки в фиде: пачки, кроме последней, ровно по chunk_size
+            write=lambda session: self.repository.stage_category_and_products(
+                session=session,
+                digest=digest,
+                first_ordinal=chunk_index * chunk_size,
+                entities=entities,
+                category_ids=category_ids,
+            ),
+            digest=digest,
+            chunk_index=chunk_index,
+            chunk_size=chunk_size,
+            products=len(entities),
+        )
+
+    async def create_columns_chunk(
+        self,
+        entity: ProductColumnsEntity,
+        use_copy: bool,
+        digest: str | None,
+        chunk_index: int,
+        chunk_size: int,
+    ) -> int:
+        await self.ensure_partitions([entity.sale_date])
+        category_ids = await self.resolve_categories(entity.categories)
+
+        async def write(session) -> int:
+            if use_copy:
+                return await self.repository.copy_category_and_product_columns(
+                    entity=entity, session=session, category_ids=category_ids
+                )
+            return await self.repository.create_category_and_product_columns(
+                entity=entity, session=session, category_ids=category_ids
+            )
+
+        return await self.commit_chunk(
+            write=write,
+            digest=digest,
+            chunk_index=chunk_index,
+            chunk_size=chunk_size,
+            products=len(entity),
+        )
+
+    async def commit_chunk(
+        self,
+        write: Callable[[Any], Awaitable[int]],
+        digest: str | None,
+        chunk_index: int,
+        chunk_size: int,
+        products: int,
+    ) -> int:
+        """write(session) пишет чанк, отметка о нём коммитится в той же транзакции."""
+        for attempt in range(1, self.chunk_retries + 1):
+            try:
+                async with self.session() as session:
+                    # Отметка идёт первой: второй писатель того же чанка
+                    # ждёт на уникальном индексе, а не пишет продукты
+                    if digest is not None and self.progress_repository is not None:
+                        await self.progress_repository.mark_chunk(
+                            session=session,
+                            digest=digest,
+                            chunk_index=chunk_index,
+                            chunk_size=chunk_size,
+                            products=products,
+                        )
+                    created = await write(session)
+                return created
+            except ChunkAlreadyCommitted as e:
+                logger.info(f"{e.message}, skipping")
+                return 0
+            except SQLException as e:
+                logger.error(f"Error creating products {e.message}")
+                raise
+            except Exception as e:
+                if attempt == self.chunk_retries or not is_retryable(e):
+                    logger.error(f"Chunk {chunk_index} failed: {e}")
+                    raise
+                logger.warning(
+                    f"Chunk {chunk_index} failed "
+                    f"(attempt {attempt}/{self.chunk_retries}), retrying: {e}"
+                )
+                await asyncio.sleep(CHUNK_RETRY_DELAY * attempt)
+
+    def can_stage(self) -> bool:
+        copy_loader = self.repository.copy_loader
+        return copy_loader is not None and copy_loader.staged_model is not None
+
+    async def merge_staged(self, digest: str) -> int:
+        async with self.session() as session:
+            try:
+                return await self.repository.merge_staged_products(
+                    session=session, digest=digest
+                )
+            except SQLException as e:
+                logger.error(f"Error merging staged feed {digest}: {e.message}")
+                raise
+
+    async def discard_staged(self, digest: str) -> None:
+        # Вместе с прогрессом, чтобы повтор того же фида начал с нуля
+        async with self.session() as session:
+            await self.repository.discard_staged_products(
+                session=session, digest=digest
+            )
+            if self.progress_repository is not None:
+                await self.progress_repository.delete(session=session, digest=digest)
+
+    async def get_committed_chunks(
+        self, digest: str | None
+    ) -> tuple[int | None, set[int]]:
+        if digest is None or self.progress_repository is None:
+            return None, set()
+        async with self.session() as session:
+            return await self.progress_repository.get_committed_chunks(
+                session=session, digest=digest
+            )
+
+    async def forget_feed_progress(self, digest: str) -> None:
+        # Вызывается, когда фид целиком записан и отмечен в FeedDigestRepository
+        if self.progress_repository is None:
+            return
+        async with self.session() as session:
+            await self.progress_repository.delete(session=session, digest=digest)
+
+    async def replace_sale_date_products(
+        self, sale_date: date, entities: list[BaseLxmlEntity]
+    ) -> ProductDeltaEntity:
+        logger.debug(f"Applying delta of {len(entities)} products. Sale date: {sale_date}")
+        await self.ensure_partitions([sale_date])
+        category_ids = await self.resolve_categories(
+            entity.category_name for entity in entities
+        )
+        async with self.session() as session:
+
+            try:
+                await self.repository.lock_sale_date(
+                    session=session, sale_date=sale_date
+                )
+                stored = await self.repository.get_sale_date_state(
+                    session=session, sale_date=sale_date
+                )
+                delta = diff_date_products(
+                    sale_date=sale_date, stored=stored, entities=entities
+                )
+                await self.repository.apply_delta(
+                    session=session, entity=delta, category_ids=category_ids
+                )
+                return delta
+            except SQLException as e:
+                logger.error(f"Error applying products delta {e.message}")
+                raise
+            except Exception as e:
+                logger.error(f"Exception occurred : {e}")
+                raise
+
+
+async def merge_batches(
+    batches: AsyncIterable[list[BaseLxmlEntity]],
+) -> list[BaseLxmlEntity]:
+    # Повторы из разных пачек сливаются как при разборе всего фида:
+    # количество складывается, категория и цена остаются от первого
+    merged: dict[str, BaseLxmlEntity] = {}
+    async for batch in batches:
+        for entity in batch:
+            if (first := merged.get(entity.product.name)) is None:
+                merged[entity.product.name] = entity
+            else:
+                first.quantity.quantity += entity.quantity.quantity
+    return list(merged.values())
@@ -1,4 +1,3 @@
-import asyncio
 from dataclasses import dataclass
 from datetime import date
 
@@ -26,18 +25,8 @@ class GPTUseCase:
     async def get_summary(self, input_date: date):
         try:
             logger.info(f"Fetching summary for date: {input_date}")
-            total_revenue = self.service.get_date_total_revenue(input_date=input_date)
-            top_three_products = self.service.get_date_top_three_products(
-                input_date=input_date
-            )
-            top_categories = self.service.get_category_distribution_date(
-                input_date=input_date
-            )
-            result = await asyncio.gather(
-                total_revenue,
-                top_three_products,
-                top_categories,
-            )
+            # Один запрос и одно соединение вместо трёх параллельных сессий
+            result = await self.service.get_date_summary(input_date=input_date)
             logger.info(f"Summary fetched successfully for date: {input_date}")
             return result
         except Exception as e:
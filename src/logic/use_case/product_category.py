@@ -1,19 +1,35 @@
 import asyncio
+import hashlib
+import io
+import re
+import uuid
 from dataclasses import dataclass
+from typing import Any, AsyncIterable, Awaitable, Callable
 
 from src.common.settings.logger import get_logger
 from src.domain.entities.base_lxml import (
     BaseLxmlEntity,
+    ProductColumnsEntity,
 )
 
 from src.infra.exceptions.exceptions import SQLException
+from src.infra.repository.redis.feed_digest_repo import FeedDigestRepository
 
+from src.logic.other.decompression import open_feed, map_feed, feed_digest
+from src.logic.other.http_client import HttpClient
+from src.logic.other.ingestion import IngestionProgress
+from src.logic.parser_engines import get_parser_engine
 from src.logic.repo_service.product_category_service import ProductCategoryService
 from src.logic.xml_parser import LXMLParser
 
 
 logger = get_logger(__name__)
 
+# XPath вида //product выбирает те же элементы, что iterparse(tag="product")
+SIMPLE_XPATH = re.compile(r"//([A-Za-z_][\w.-]*)")
+# Секунды, не чаще этого in-flight ключ фида продлевается во время загрузки
+MIN_EXTEND_INTERVAL = 1
+
 
 @dataclass(eq=False)
 class CreateProductCategoryUseCase:
@@ -30,37 +46,385 @@ class CreateProductCategoryUseCase:
             logger.error(f"Unexpected error while processing entity {entity}: {e}")
             raise
 
+    async def create_products_category_usecase(
+        self,
+        entities: list[BaseLxmlEntity],
+        digest: str | None = None,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ):
+        try:
+            return await self.service.create_category_products(
+                entities=entities, digest=digest, on_progress=on_progress
+            )
+        except SQLException as e:
+            logger.error(f"SQL error while creating products or categories: {e.message}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error while creating {len(entities)} products: {e}")
+            raise
+
+    async def create_product_batches_usecase(
+        self,
+        make_batches: Callable[[int], AsyncIterable[list[BaseLxmlEntity]]],
+        digest: str | None = None,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ):
+        try:
+            return await self.service.create_category_product_batches(
+                make_batches=make_batches, digest=digest, on_progress=on_progress
+            )
+        except SQLException as e:
+            logger.error(f"SQL error while creating products or categories: {e.message}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error while creating products in batches: {e}")
+            raise
+
+    async def create_product_columns_usecase(
+        self,
+        entity: ProductColumnsEntity,
+        digest: str | None = None,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ):
+        try:
+            return await self.service.create_category_product_columns(
+                entity=entity, digest=digest, on_progress=on_progress
+            )
+        except SQLException as e:
+            logger.error(f"SQL error while creating products or categories: {e.message}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error while creating {len(entity)} products: {e}")
+            raise
+
+    async def forget_feed_progress_usecase(self, digest: str):
+        try:
+            await self.service.forget_feed_progress(digest=digest)
+        except Exception as e:
+            # Фид уже записан, оставшаяся строка прогресса ничего не ломает
+            logger.warning(f"Could not delete progress of feed {digest}: {e}")
+
+    async def replace_sale_date_usecase(self, entities: list[BaseLxmlEntity]):
+        # Все товары одного фида относятся к одной дате
+        sale_date = entities[0].sale_date
+        try:
+            return await self.service.replace_sale_date_products(
+                sale_date=sale_date, entities=entities
+            )
+        except SQLException as e:
+            logger.error(f"SQL error while applying delta for {sale_date}: {e.message}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error while applying delta for {sale_date}: {e}")
+            raise
+
 
 @dataclass(eq=False)
 class ParseAndCreateProductCategoryUseCase:
     parser: LXMLParser
     product_service_usecase: CreateProductCategoryUseCase
+    http_client: HttpClient
+    digest_repository: FeedDigestRepository
+    parser_engine: str = "tree"
+    max_download_size: int | None = None
 
-    async def parse_and_create(self, lxml_data: str, element: str = "//product"):
+    async def parse_and_create(
+        self,
+        lxml_data: str,
+        element: str = "//product",
+        task_id: str | None = None,
+        delta: bool = False,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ):
         try:
-            entities: list[BaseLxmlEntity] | None = self.parser.parsing(
-                lxml_data=lxml_data, element=element
+            digest = hashlib.sha256(lxml_data.encode("utf-8")).hexdigest()
+            if not delta and (state := self.digest_repository.get_state(digest)):
+                return skip_feed(digest=digest, state=state)
+
+            tag = xpath_tag(element)
+            if tag is not None and not delta:
+                # Разбор идёт в отдельном потоке, готовые пачки сразу пишутся в staging
+                parser_engine = get_parser_engine(self.parser_engine)
+                source = io.BytesIO(lxml_data.encode("utf-8"))
+                return await self.run_once(
+                    digest=digest,
+                    task_id=task_id,
+                    write=lambda: self.create_batches(
+                        make_batches=lambda batch_size: parser_engine.iter_batches(
+                            source=source, tag=tag, batch_size=batch_size
+                        ),
+                        digest=digest,
+                        on_progress=on_progress,
+                    ),
+                )
+
+            # Произвольный XPath требует всего дерева, но не в event loop
+            entities: list[BaseLxmlEntity] | None = await asyncio.to_thread(
+                self.parser.parsing, lxml_data=lxml_data, element=element
+            )
+            return await self.create_once(
+                entities=entities,
+                digest=digest,
+                task_id=task_id,
+                delta=delta,
+                on_progress=on_progress,
             )
-            if len(entities) > 0:
-                batch = []
-                for entity in entities:
-                    batch.append(
-                        self.product_service_usecase.create_product_category_usecase(
-                            entity=entity
-                        )
+        except (ValueError, TypeError) as e:
+            logger.error(f"Error parsing data: {e}")
+            return f"Error occurred while parsing XML: {e}", None
+        except Exception as e:
+            logger.error(f"Unexpected error during parse and create operation: {e}")
+            return f"Unexpected error: {e}", None
+
+    async def download_parse_and_create(
+        self,
+        url: str,
+        tag: str = "product",
+        task_id: str | None = None,
+        delta: bool = False,
+        engine: str | None = None,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ):
+        try:
+            # Хэш считается по мере скачивания, поэтому повтор фида
+            # обнаруживается только после загрузки, но до записи в базу
+            digest = hashlib.sha256()
+            parser = get_parser_engine(engine or self.parser_engine).incremental(
+                tag=tag
+            )
+            async for chunk in self.http_client.stream_download(
+                url=url, max_size=self.max_download_size
+            ):
+                digest.update(chunk)
+                parser.feed(chunk)
+            entities: list[BaseLxmlEntity] = parser.close()
+            return await self.create_once(
+                entities=entities,
+                digest=digest.hexdigest(),
+                task_id=task_id,
+                delta=delta,
+                on_progress=on_progress,
+            )
+        except (ValueError, TypeError) as e:
+            logger.error(f"Error parsing data: {e}")
+            return f"Error occurred while parsing XML: {e}", None
+        except Exception as e:
+            logger.error(f"Unexpected error during download and create operation: {e}")
+            return f"Unexpected error: {e}", None
+
+    async def parse_file_and_create(
+        self,
+        path: str,
+        tag: str = "product",
+        sharded: bool = False,
+        task_id: str | None = None,
+        delta: bool = False,
+        engine: str | None = None,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+        columnar: bool = False,
+    ):
+        try:
+            if columnar and (sharded or delta):
+                raise ValueError("Columnar parsing can't be combined with sharded or delta")
+            digest = await asyncio.to_thread(feed_digest, path)
+            if not delta and (state := self.digest_repository.get_state(digest)):
+                return skip_feed(digest=digest, state=state)
+
+            if columnar:
+                # Колонки вместо сущности на продукт, пишутся теми же чанками
+                with open_feed(path) as source:
+                    columns: ProductColumnsEntity = await asyncio.to_thread(
+                        self.parser.columnar_parsing, source=source, tag=tag
+                    )
+                return await self.run_once(
+                    digest=digest,
+                    task_id=task_id,
+                    write=lambda: self.create_columns(
+                        entity=columns, digest=digest, on_progress=on_progress
+                    ),
+                )
+            if sharded:
+                with map_feed(path) as lxml_data:
+                    # Воркеры читают свои диапазоны из файла сами, а родитель
+                    # ждёт пул в отдельном потоке, не блокируя event loop
+                    entities: list[BaseLxmlEntity] = await asyncio.to_thread(
+                        self.parser.sharded_parsing,
+                        lxml_data=lxml_data,
+                        tag=tag,
+                        path=path,
+                    )
+            elif not delta:
+                # Разбор идёт в отдельном потоке, готовые пачки сразу пишутся в staging
+                parser_engine = get_parser_engine(engine or self.parser_engine)
+                with open_feed(path) as source:
+                    return await self.run_once(
+                        digest=digest,
+                        task_id=task_id,
+                        write=lambda: self.create_batches(
+                            make_batches=lambda batch_size: parser_engine.iter_batches(
+                                source=source, tag=tag, batch_size=batch_size
+                            ),
+                            digest=digest,
+                            on_progress=on_progress,
+                        ),
                     )
-                    if len(batch) == 100:
-                        await asyncio.gather(*batch)
-                if len(batch) > 0:
-                    await asyncio.gather(*batch)
-                    return (
-                        f"products {len(entities)=} succesfully created",
-                        entity.sale_date,
+            else:
+                parser_engine = get_parser_engine(engine or self.parser_engine)
+                with open_feed(path) as source:
+                    entities: list[BaseLxmlEntity] = await asyncio.to_thread(
+                        parser_engine.parse, source=source, tag=tag
                     )
-            return
+            return await self.create_once(
+                entities=entities,
+                digest=digest,
+                task_id=task_id,
+                delta=delta,
+                on_progress=on_progress,
+            )
         except (ValueError, TypeError) as e:
             logger.error(f"Error parsing data: {e}")
             return f"Error occurred while parsing XML: {e}", None
         except Exception as e:
-            logger.error(f"Unexpected error during parse and create operation: {e}")
+            logger.error(f"Unexpected error during parse file and create operation: {e}")
             return f"Unexpected error: {e}", None
+
+    async def create_once(
+        self,
+        entities: list[BaseLxmlEntity],
+        digest: str,
+        task_id: str | None,
+        delta: bool = False,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ):
+        if delta:
+            # Дельта заменяет состояние даты и идемпотентна сама по себе, а отметка
+            # "processed" пропустила бы возврат к прежнему фиду (A -> B -> A)
+            return await self.replace(entities=entities)
+        return await self.run_once(
+            digest=digest,
+            task_id=task_id,
+            write=lambda: self.create(
+                entities=entities, digest=digest, on_progress=on_progress
+            ),
+        )
+
+    async def run_once(
+        self,
+        digest: str,
+        task_id: str | None,
+        write: Callable[[], Awaitable[Any]],
+    ):
+        owner, token = task_id or "unknown", uuid.uuid4().hex
+        if state := self.digest_repository.acquire(
+            digest=digest, owner=owner, token=token
+        ):
+            return skip_feed(digest=digest, state=state)
+
+        heartbeat = asyncio.create_task(
+            self.keep_in_flight(digest=digest, owner=owner, token=token)
+        )
+        try:
+            result = await write()
+        except BaseException:
+            # Закоммиченные чанки остаются, повтор продолжит с места сбоя
+            self.digest_repository.release(digest=digest, owner=owner, token=token)
+            raise
+        finally:
+            heartbeat.cancel()
+
+        if self.digest_repository.mark_processed(
+            digest=digest, owner=owner, token=token
+        ):
+            await self.product_service_usecase.forget_feed_progress_usecase(digest)
+        else:
+            # Прогресс нужен задаче, которая захватила фид: по нему она
+            # пропустит уже записанные чанки
+            logger.warning(f"Feed {digest} was taken over by another task")
+        return result
+
+    async def keep_in_flight(self, digest: str, owner: str, token: str) -> None:
+        # Длинная загрузка продлевает ключ, пока он не истёк
+        interval = max(self.digest_repository.in_flight_ttl / 3, MIN_EXTEND_INTERVAL)
+        while True:
+            await asyncio.sleep(interval)
+            if not self.digest_repository.extend(
+                digest=digest, owner=owner, token=token
+            ):
+                logger.warning(f"Feed {digest} in-flight key lost, stop extending it")
+                return
+
+    async def create(
+        self,
+        entities: list[BaseLxmlEntity],
+        digest: str | None = None,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ):
+        entities = list(entities)
+        if len(entities) > 0:
+            # Категории и продукты пишутся пачками, см. ProductRepository.bulk_upsert
+            await self.product_service_usecase.create_products_category_usecase(
+                entities=entities, digest=digest, on_progress=on_progress
+            )
+            return (
+                f"products {len(entities)=} succesfully created",
+                entities[0].sale_date,
+            )
+        return
+
+    async def create_columns(
+        self,
+        entity: ProductColumnsEntity,
+        digest: str | None = None,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ):
+        if len(entity) > 0:
+            created = await self.product_service_usecase.create_product_columns_usecase(
+                entity=entity, digest=digest, on_progress=on_progress
+            )
+            return f"products {created=} succesfully created", entity.sale_date
+        return
+
+    async def create_batches(
+        self,
+        make_batches: Callable[[int], AsyncIterable[list[BaseLxmlEntity]]],
+        digest: str | None = None,
+        on_progress: Callable[[IngestionProgress], Any] | None = None,
+    ):
+        sale_dates = set()
+
+        async def batches(batch_size: int):
+            async for batch in make_batches(batch_size):
+                sale_dates.add(batch[0].sale_date)
+                yield batch
+
+        created = await self.product_service_usecase.create_product_batches_usecase(
+            make_batches=batches, digest=digest, on_progress=on_progress
+        )
+        if sale_dates:
+            return f"products {created=} succesfully created", sale_dates.pop()
+        return
+
+    async def replace(self, entities: list[BaseLxmlEntity]):
+        # Новый фид за дату заменяет сохранённое состояние: пишутся
+        # только добавленные, изменившиеся и пропавшие товары
+        entities = list(entities)
+        if len(entities) > 0:
+            delta = await self.product_service_usecase.replace_sale_date_usecase(
+                entities=entities
+            )
+            return (
+                f"products delta {len(delta)=} succesfully applied",
+                delta.sale_date,
+            )
+        return
+
+
+def xpath_tag(element: str) -> str | None:
+    match = SIMPLE_XPATH.fullmatch(element)
+    return match.group(1) if match else None
+
+
+def skip_feed(digest: str, state: str):
+    # Такой фид уже записан или прямо сейчас пишется другой задачей (in_flight:<task id>)
+    logger.info(f"Feed {digest} is already {state}, skipping")
+    return f"Feed already {state}", None
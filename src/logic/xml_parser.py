@@ -1,14 +1,26 @@
 import datetime
+import os
+import re
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from sys import intern
+from typing import Iterator, Callable, Any
 
 from lxml import etree
 
 from src.common.converters.converters import convert_into_kopeck
 from src.common.settings.logger import get_logger
-from src.domain.entities.base_lxml import BaseLxmlEntity
+from src.domain.entities.base_lxml import BaseLxmlEntity, ProductColumnsEntity
 from src.domain.entities.lxml_entities import ProductEntity, QuantityEntity, PriceEntity
 
 logger = get_logger(__name__)
 
+# Разделитель строк в упакованном результате шарда, в XML 1.0 он встречаться не может
+SHARD_SEPARATOR = "\x00"
+
 
 class LXMLParser:
 
@@ -25,93 +37,213 @@ class LXMLParser:
 
             logger.debug("XML parsed successfully. Extracting sale date.")
 
-            sale_date_str = root.attrib.get("date")
-            if not sale_date_str:
-                logger.warning("Missing 'date' attribute in XML root element.")
-                raise ValueError("Missing 'date' attribute in XML data.")
+            sale_date = get_sale_date(root.attrib.get("date"))
 
-            try:
-                sale_date = datetime.datetime.strptime(sale_date_str, "%Y-%m-%d").date()
-            except ValueError as e:
-                logger.error(
-                    f"Invalid date format: {sale_date_str}. Expected format YYYY-MM-DD."
+            elements = root.xpath(element)
+            extracted_data: dict[str, BaseLxmlEntity] = {}
+
+            for element in elements:
+                add_product(
+                    extracted_data=extracted_data,
+                    sale_date=sale_date,
+                    name=element.findtext("name"),
+                    quantity=element.findtext("quantity"),
+                    price=element.findtext("price"),
+                    category=element.findtext("category"),
                 )
-                raise ValueError(
-                    "Invalid 'date' attribute format. Expected 'YYYY-MM-DD'."
-                ) from e
 
-            logger.debug(f"Sale date extracted: {sale_date}")
+            logger.info(f"Parsed and extracted {len(extracted_data)} products.")
+            return extracted_data.values()
 
-            elements = root.xpath(element)
+        except ValueError as e:
+            logger.error(f"Value error during parsing: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error during XML parsing: {e}")
+            raise
+
+    @staticmethod
+    def streaming_parsing(source, tag: str = "product") -> [BaseLxmlEntity]:
+        """
+        source - имя файла или бинарный file-like объект, как у etree.iterparse.
+        Каждый <product> обрабатывается сразу после закрывающего тега и удаляется
+        из дерева, поэтому потребление памяти не зависит от размера фида.
+        """
+        try:
+            logger.info("Starting streaming XML parsing.")
             extracted_data: dict[str, BaseLxmlEntity] = {}
 
+            iterparse_products(
+                source=source,
+                tag=tag,
+                on_product=lambda sale_date, element: add_product(
+                    extracted_data=extracted_data,
+                    sale_date=sale_date,
+                    name=element.findtext("name"),
+                    quantity=element.findtext("quantity"),
+                    price=element.findtext("price"),
+                    category=element.findtext("category"),
+                ),
+            )
+
+            logger.info(f"Parsed and extracted {len(extracted_data)} products.")
+            return extracted_data.values()
+
+        except ValueError as e:
+            logger.error(f"Value error during parsing: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error during XML parsing: {e}")
+            raise
+
+    @staticmethod
+    def batch_parsing(
+        source, tag: str = "product", batch_size: int = 10_000
+    ) -> Iterator[list[BaseLxmlEntity]]:
+        """
+        То же, что streaming_parsing, но продукты отдаются пачками по batch_size
+        по ходу разбора. Повторы продукта сливаются только внутри пачки,
+        между пачками их сливает запись фида (create_category_product_batches).
+        """
+        try:
+            logger.info("Starting batch XML parsing.")
+            elements = ProductElements(source=source, tag=tag)
+            batch: dict[str, BaseLxmlEntity] = {}
+            batches = 0
+
             for element in elements:
-                current_element_name = element.findtext("name")
-                current_element_quantity = element.findtext("quantity")
-                current_element_price = element.findtext("price")
-                current_element_category = element.findtext("category")
-
-                logger.debug(f"Processing element: {current_element_name}")
-
-                # Пропускаем элемент, если обязательные данные отсутствуют
-                if (
-                    not current_element_name
-                    or current_element_quantity is None
-                    or current_element_price is None
-                ):
-                    logger.warning(
-                        f"Skipping element {current_element_name} due to missing data (name, quantity, or price)."
-                    )
-                    continue
-
-                # Преобразуем quantity в int, если возможно
-                try:
-                    current_element_quantity = int(current_element_quantity)
-                except (ValueError, TypeError):
-                    logger.warning(
-                        f"Invalid quantity value '{current_element_quantity}' for product '{current_element_name}'"
-                    )
-                    continue
-
-                # Преобразуем price в float, если возможно
-                try:
-                    current_element_price = float(current_element_price)
-                except (ValueError, TypeError):
-                    logger.warning(
-                        f"Invalid price value '{current_element_price}' for product '{current_element_name}'. Skipping."
-                    )
-                    continue
-
-                # Преобразуем цену в копейки
-                try:
-                    price_in_kopeck = convert_into_kopeck(current_element_price)
-                except Exception as e:
-                    logger.error(
-                        f"Error converting price for product {current_element_name}: {e}"
-                    )
-                    continue
-
-                # Обновляем количество или создаём новый объект, если продукта нет в данных
-                if current_element_name in extracted_data:
-                    extracted_data[
-                        current_element_name
-                    ].quantity.quantity += current_element_quantity
-                    logger.debug(
-                        f"Updated quantity for {current_element_name}: {extracted_data[current_element_name].quantity.quantity}"
+                add_product(
+                    extracted_data=batch,
+                    sale_date=elements.sale_date,
+                    name=element.findtext("name"),
+                    quantity=element.findtext("quantity"),
+                    price=element.findtext("price"),
+                    category=element.findtext("category"),
+                )
+                if len(batch) >= batch_size:
+                    batches += 1
+                    yield list(batch.values())
+                    batch = {}
+
+            if batch:
+                batches += 1
+                yield list(batch.values())
+            logger.info(f"Parsed feed into {batches} batches of up to {batch_size}.")
+
+        except ValueError as e:
+            logger.error(f"Value error during parsing: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error during XML parsing: {e}")
+            raise
+
+    @staticmethod
+    def columnar_parsing(source, tag: str = "product") -> ProductColumnsEntity:
+        """
+        То же, что streaming_parsing, но результат - колонки (имена, категории,
+        количества, цены в копейках) без отдельной сущности на каждый продукт.
+        """
+        try:
+            logger.info("Starting columnar XML parsing.")
+            accumulator = ProductColumnsAccumulator()
+
+            sale_date = iterparse_products(
+                source=source,
+                tag=tag,
+                on_product=lambda _, element: accumulator.add(
+                    name=element.findtext("name"),
+                    quantity=element.findtext("quantity"),
+                    price=element.findtext("price"),
+                    category=element.findtext("category"),
+                ),
+            )
+
+            columns = accumulator.to_entity(sale_date=sale_date)
+            logger.info(f"Parsed and extracted {len(columns)} products.")
+            return columns
+
+        except ValueError as e:
+            logger.error(f"Value error during parsing: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error during XML parsing: {e}")
+            raise
+
+    @staticmethod
+    def sharded_parsing(
+        lxml_data: bytes | str,
+        tag: str = "product",
+        workers: int | None = None,
+        min_shard_size: int = 4 * 1024 * 1024,
+        path: str | None = None,
+    ) -> [BaseLxmlEntity]:
+        """
+        Делит документ (bytes, str или mmap) по границам <product> на шарды
+        и парсит их в пуле процессов.
+        Границы ищутся по ходу разбора, в пуле не больше 2 * workers шардов.
+        Если передан path (lxml_data - его mmap), воркер сам читает свой
+        диапазон из файла, и родитель не копирует фид в байты шардов.
+        Воркеры возвращают агрегаты в упакованном виде (строки + array),
+        сущности собираются только в родительском процессе.
+        """
+        try:
+            logger.info("Starting sharded XML parsing.")
+            if isinstance(lxml_data, str):
+                lxml_data = lxml_data.encode("utf-8")
+            workers = workers or os.cpu_count() or 1
+
+            body = find_shards_body(lxml_data=lxml_data, tag=tag)
+            if body is None:
+                header, tail, bounds = lxml_data, b"", iter(())
+            else:
+                body_start, body_end = body
+                header, tail = lxml_data[:body_start], lxml_data[body_end:]
+                bounds = iter_shard_bounds(
+                    lxml_data=lxml_data,
+                    tag=tag,
+                    body_start=body_start,
+                    body_end=body_end,
+                    shard_size=max(
+                        min_shard_size, (body_end - body_start) // (workers * 4) + 1
+                    ),
+                )
+            try:
+                root = etree.fromstring(header + tail)
+            except etree.XMLSyntaxError as e:
+                logger.error(f"XML syntax error: {e}")
+                raise ValueError("Invalid XML format.") from e
+
+            sale_date = get_sale_date(root.attrib.get("date"))
+
+            if path is not None and body is not None:
+                shards = (
+                    FileShard(
+                        path=path,
+                        header_end=body_start,
+                        start=start,
+                        end=end,
+                        tail_start=body_end,
                     )
-                else:
-                    extracted_data[current_element_name] = BaseLxmlEntity(
+                    for start, end in bounds
+                )
+            else:
+                shards = (header + lxml_data[start:end] + tail for start, end in bounds)
+
+            extracted_data: dict[str, BaseLxmlEntity] = {}
+            shards_count = 0
+            for packed in map_shards(shards=shards, tag=tag, workers=workers):
+                shards_count += 1
+                for name, category, quantity, price in unpack_shard(packed):
+                    add_converted_product(
+                        extracted_data=extracted_data,
                         sale_date=sale_date,
-                        product=ProductEntity(current_element_name),
-                        quantity=QuantityEntity(current_element_quantity),
-                        price=PriceEntity(price_in_kopeck),
-                        category_name=current_element_category
-                        or "Unknown",  # Категория по умолчанию
-                    )
-                    logger.debug(
-                        f"Added new product to extracted data: {current_element_name}"
+                        name=name,
+                        quantity=quantity,
+                        price_in_kopeck=price,
+                        category=category,
                     )
 
+            logger.debug(f"Feed parsed in {shards_count} shards.")
             logger.info(f"Parsed and extracted {len(extracted_data)} products.")
             return extracted_data.values()
 
@@ -121,3 +253,388 @@ class LXMLParser:
         except Exception as e:
             logger.error(f"Error during XML parsing: {e}")
             raise
+
+    @staticmethod
+    def incremental_parsing(tag: str = "product") -> "IncrementalLXMLParser":
+        return IncrementalLXMLParser(tag=tag)
+
+
+@dataclass(eq=False)
+class IncrementalLXMLParser:
+    """
+    Парсер, которому документ скармливается кусками по мере скачивания:
+    feed(chunk) для каждого куска, close() после последнего.
+    """
+
+    tag: str = "product"
+    _parser: etree.XMLPullParser = field(init=False, repr=False)
+    _extracted_data: dict[str, BaseLxmlEntity] = field(
+        init=False, repr=False, default_factory=dict
+    )
+    _sale_date: datetime.date | None = field(init=False, default=None)
+
+    def __post_init__(self):
+        self._parser = etree.XMLPullParser(events=("end",), tag=self.tag)
+
+    def feed(self, data: bytes) -> None:
+        try:
+            self._parser.feed(data)
+        except etree.XMLSyntaxError as e:
+            logger.error(f"XML syntax error: {e}")
+            raise ValueError("Invalid XML format.") from e
+        self._read_events()
+
+    def close(self) -> [BaseLxmlEntity]:
+        try:
+            root = self._parser.close()
+        except etree.XMLSyntaxError as e:
+            logger.error(f"XML syntax error: {e}")
+            raise ValueError("Invalid XML format.") from e
+        self._read_events()
+
+        if self._sale_date is None:
+            get_sale_date(root.attrib.get("date"))
+
+        logger.info(f"Parsed and extracted {len(self._extracted_data)} products.")
+        return self._extracted_data.values()
+
+    def _read_events(self) -> None:
+        for _, element in self._parser.read_events():
+            if self._sale_date is None:
+                self._sale_date = get_sale_date(
+                    element.getroottree().getroot().attrib.get("date")
+                )
+
+            add_product(
+                extracted_data=self._extracted_data,
+                sale_date=self._sale_date,
+                name=element.findtext("name"),
+                quantity=element.findtext("quantity"),
+                price=element.findtext("price"),
+                category=element.findtext("category"),
+            )
+            free_element(element)
+
+
+@dataclass(eq=False)
+class ProductColumnsAccumulator:
+    products: list[str] = field(default_factory=list)
+    categories: list[str] = field(default_factory=list)
+    quantities: array = field(default_factory=lambda: array("q"))
+    prices: array = field(default_factory=lambda: array("q"))
+    _index: dict[str, int] = field(default_factory=dict, repr=False)
+
+    def add(
+        self,
+        name: str | None,
+        quantity: str | None,
+        price: str | None,
+        category: str | None,
+    ) -> None:
+        values = convert_product(name=name, quantity=quantity, price=price)
+        if values is None:
+            return
+
+        self.add_converted(
+            name=name,
+            quantity=values[0],
+            price_in_kopeck=values[1],
+            category=category or "Unknown",  # Категория по умолчанию
+        )
+
+    def add_converted(
+        self, name: str, quantity: int, price_in_kopeck: int, category: str
+    ) -> None:
+        position = self._index.get(name)
+        if position is None:
+            name = intern(name)
+            self._index[name] = len(self.products)
+            self.products.append(name)
+            self.categories.append(intern(category))
+            self.quantities.append(quantity)
+            self.prices.append(price_in_kopeck)
+        else:
+            self.quantities[position] += quantity
+
+    def pack(self) -> tuple[str, str, bytes, bytes]:
+        return (
+            SHARD_SEPARATOR.join(self.products),
+            SHARD_SEPARATOR.join(self.categories),
+            self.quantities.tobytes(),
+            self.prices.tobytes(),
+        )
+
+    def to_entity(self, sale_date: datetime.date) -> ProductColumnsEntity:
+        return ProductColumnsEntity(
+            sale_date=sale_date,
+            products=self.products,
+            categories=self.categories,
+            quantities=self.quantities,
+            prices=self.prices,
+        )
+
+
+@dataclass(eq=False)
+class ProductElements:
+    """
+    Элементы <product> из etree.iterparse по одному. Элемент освобождается,
+    когда потребитель запросил следующий, sale_date известна после первого.
+    """
+
+    source: Any
+    tag: str = "product"
+    sale_date: datetime.date | None = field(init=False, default=None)
+
+    def __iter__(self) -> Iterator[etree._Element]:
+        context = etree.iterparse(self.source, events=("end",), tag=self.tag)
+
+        try:
+            for _, element in context:
+                if self.sale_date is None:
+                    self.sale_date = get_sale_date(
+                        element.getroottree().getroot().attrib.get("date")
+                    )
+
+                yield element
+                free_element(element)
+        except etree.XMLSyntaxError as e:
+            logger.error(f"XML syntax error: {e}")
+            raise ValueError("Invalid XML format.") from e
+
+        if self.sale_date is None:
+            # В фиде нет ни одного продукта, но дату всё равно проверяем
+            self.sale_date = get_sale_date(context.root.attrib.get("date"))
+
+
+def iterparse_products(
+    source, tag: str, on_product: Callable[[datetime.date, etree._Element], Any]
+) -> datetime.date:
+    elements = ProductElements(source=source, tag=tag)
+    for element in elements:
+        on_product(elements.sale_date, element)
+    return elements.sale_date
+
+
+def get_sale_date(sale_date_str: str | None) -> datetime.date:
+    if not sale_date_str:
+        logger.warning("Missing 'date' attribute in XML root element.")
+        raise ValueError("Missing 'date' attribute in XML data.")
+
+    try:
+        sale_date = datetime.datetime.strptime(sale_date_str, "%Y-%m-%d").date()
+    except ValueError as e:
+        logger.error(
+            f"Invalid date format: {sale_date_str}. Expected format YYYY-MM-DD."
+        )
+        raise ValueError(
+            "Invalid 'date' attribute format. Expected 'YYYY-MM-DD'."
+        ) from e
+
+    logger.debug(f"Sale date extracted: {sale_date}")
+    return sale_date
+
+
+def add_product(
+    extracted_data: dict[str, BaseLxmlEntity],
+    sale_date: datetime.date,
+    name: str | None,
+    quantity: str | None,
+    price: str | None,
+    category: str | None,
+) -> None:
+    values = convert_product(name=name, quantity=quantity, price=price)
+    if values is None:
+        return
+
+    add_converted_product(
+        extracted_data=extracted_data,
+        sale_date=sale_date,
+        name=name,
+        quantity=values[0],
+        price_in_kopeck=values[1],
+        category=category,
+    )
+
+
+def convert_product(
+    name: str | None, quantity: str | None, price: str | None
+) -> tuple[int, int] | None:
+    logger.debug(f"Processing element: {name}")
+
+    # Пропускаем элемент, если обязательные данные отсутствуют
+    if not name or quantity is None or price is None:
+        logger.warning(
+            f"Skipping element {name} due to missing data (name, quantity, or price)."
+        )
+        return
+
+    # Преобразуем quantity в int, если возможно
+    try:
+        quantity = int(quantity)
+    except (ValueError, TypeError):
+        logger.warning(f"Invalid quantity value '{quantity}' for product '{name}'")
+        return
+
+    # Преобразуем price в float, если возможно
+    try:
+        price = float(price)
+    except (ValueError, TypeError):
+        logger.warning(
+            f"Invalid price value '{price}' for product '{name}'. Skipping."
+        )
+        return
+
+    # Преобразуем цену в копейки
+    try:
+        price_in_kopeck = convert_into_kopeck(price)
+    except Exception as e:
+        logger.error(f"Error converting price for product {name}: {e}")
+        return
+
+    return quantity, price_in_kopeck
+
+
+def add_converted_product(
+    extracted_data: dict[str, BaseLxmlEntity],
+    sale_date: datetime.date,
+    name: str,
+    quantity: int,
+    price_in_kopeck: int,
+    category: str | None,
+) -> None:
+    # Обновляем количество или создаём новый объект, если продукта нет в данных
+    if name in extracted_data:
+        extracted_data[name].quantity.quantity += quantity
+        logger.debug(
+            f"Updated quantity for {name}: {extracted_data[name].quantity.quantity}"
+        )
+    else:
+        extracted_data[name] = BaseLxmlEntity(
+            sale_date=sale_date,
+            product=ProductEntity(intern(name)),
+            quantity=QuantityEntity(quantity),
+            price=PriceEntity(price_in_kopeck),
+            category_name=intern(category or "Unknown"),  # Категория по умолчанию
+        )
+        logger.debug(f"Added new product to extracted data: {name}")
+
+
+@dataclass(frozen=True)
+class FileShard:
+    """
+    Шард фида на диске. В воркер передаются только смещения, заголовок,
+    свой диапазон продуктов и хвост документа воркер читает из файла сам.
+    """
+
+    path: str
+    header_end: int
+    start: int
+    end: int
+    tail_start: int
+
+    def read(self) -> bytes:
+        with open(self.path, "rb") as file:
+            header = file.read(self.header_end)
+            file.seek(self.start)
+            body = file.read(self.end - self.start)
+            file.seek(self.tail_start)
+            return header + body + file.read()
+
+
+def find_shards_body(lxml_data: bytes, tag: str) -> tuple[int, int] | None:
+    # Продукты идут от первого открывающего до последнего закрывающего тега
+    first = shard_start_pattern(tag).search(lxml_data)
+    closing_tag = b"</%s>" % tag.encode()
+    last = lxml_data.rfind(closing_tag)
+    if first is None or last < first.start():
+        return None
+    return first.start(), last + len(closing_tag)
+
+
+def iter_shard_bounds(
+    lxml_data: bytes, tag: str, body_start: int, body_end: int, shard_size: int
+) -> Iterator[tuple[int, int]]:
+    # Каждый шард - самостоятельный документ: заголовок + часть продуктов + хвост
+    start_pattern = shard_start_pattern(tag)
+    start = body_start
+    while start < body_end:
+        match = start_pattern.search(lxml_data, start + shard_size, body_end)
+        end = match.start() if match else body_end
+        yield start, end
+        start = end
+
+
+def shard_start_pattern(tag: str) -> re.Pattern:
+    return re.compile(rb"<%s[\s/>]" % re.escape(tag.encode()))
+
+
+def map_shards(
+    shards: Iterator[bytes | FileShard], tag: str, workers: int
+) -> Iterator[tuple[str, str, bytes, bytes]]:
+    """
+    parse_shard для шардов по порядку. В пул отдаётся не больше 2 * workers
+    шардов сразу, следующий шард строится, когда забран самый старый результат.
+    """
+    first = list(islice(shards, 2))
+    shards = chain(first, shards)
+    if workers == 1 or len(first) < 2:
+        for shard in shards:
+            yield parse_shard(shard, tag)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for shard in shards:
+                pending.append(executor.submit(parse_shard, shard, tag))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+
+def parse_shard(shard: bytes | FileShard, tag: str) -> tuple[str, str, bytes, bytes]:
+    if isinstance(shard, FileShard):
+        shard = shard.read()
+    try:
+        root = etree.fromstring(shard)
+    except etree.XMLSyntaxError as e:
+        # Исключения lxml плохо переживают pickle, отдаём в родителя ValueError
+        raise ValueError(f"Invalid XML format. {e}") from None
+
+    accumulator = ProductColumnsAccumulator()
+    for element in root.iter(tag):
+        accumulator.add(
+            name=element.findtext("name"),
+            quantity=element.findtext("quantity"),
+            price=element.findtext("price"),
+            category=element.findtext("category"),
+        )
+    return accumulator.pack()
+
+
+def unpack_shard(
+    packed: tuple[str, str, bytes, bytes]
+) -> Iterator[tuple[str, str, int, int]]:
+    names, categories, packed_quantities, packed_prices = packed
+    quantities = array("q")
+    quantities.frombytes(packed_quantities)
+    prices = array("q")
+    prices.frombytes(packed_prices)
+    return zip(
+        names.split(SHARD_SEPARATOR),
+        categories.split(SHARD_SEPARATOR),
+        quantities,
+        prices,
+    )
+
+
+def free_element(element: etree._Element) -> None:
+    # Освобождаем уже обработанный элемент и его предшественников
+    element.clear(keep_tail=True)
+    while element.getprevious() is not None:
+        del element.getparent()[0]
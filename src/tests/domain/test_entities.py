@@ -1,5 +1,9 @@
+import datetime
+from array import array
+
 import pytest
 
+from src.domain.entities.base_lxml import ProductColumnsEntity
 from src.domain.entities.lxml_entities import (
     ProductEntity,
     QuantityEntity,
@@ -12,6 +16,7 @@ from src.domain.exceptions.entities import (
     ProductLengthTooLongException,
     TooSmallQuantityException,
     TooSmallPriceException,
+    ColumnsLengthMismatchException,
 )
 
 
@@ -74,3 +79,72 @@ async def test_category_creation():
 async def test_product_id_creation():
     category = ProductIdEntity(product_id=123)
     assert category.product_id == 123
+
+
+@pytest.mark.asyncio
+async def test_product_columns_creation():
+    columns = ProductColumnsEntity(
+        sale_date=datetime.date(2024, 1, 1),
+        products=["A", "B"],
+        categories=["C", "C"],
+        quantities=array("q", [1, 2]),
+        prices=array("q", [0, 100]),
+    )
+    assert len(columns) == 2
+
+
+@pytest.mark.asyncio
+async def test_product_columns_length_mismatch():
+    with pytest.raises(ColumnsLengthMismatchException):
+        ProductColumnsEntity(
+            sale_date=datetime.date(2024, 1, 1),
+            products=["A", "B"],
+            categories=["C"],
+            quantities=array("q", [1, 2]),
+            prices=array("q", [0, 100]),
+        )
+
+
+@pytest.mark.asyncio
+async def test_product_columns_quantity_too_small():
+    with pytest.raises(TooSmallQuantityException):
+        ProductColumnsEntity(
+            sale_date=datetime.date(2024, 1, 1),
+            products=["A", "B"],
+            categories=["C", "C"],
+            quantities=array("q", [1, 0]),
+            prices=array("q", [0, 100]),
+        )
+
+
+@pytest.mark.asyncio
+async def test_product_columns_price_too_small():
+    with pytest.raises(TooSmallPriceException):
+        ProductColumnsEntity(
+            sale_date=datetime.date(2024, 1, 1),
+            products=["A", "B"],
+            categories=["C", "C"],
+            quantities=array("q", [1, 2]),
+            prices=array("q", [-1, 100]),
+        )
+
+
+@pytest.mark.asyncio
+async def test_entities_without_dict():
+    product = ProductEntity(name="Some product")
+
+    assert not hasattr(product, "__dict__")
+    with pytest.raises(AttributeError):
+        product.unknown = 1
+
+
+@pytest.mark.asyncio
+async def test_quantity_from_trusted_skips_validation():
+    quantity = QuantityEntity.from_trusted(quantity=0)
+    assert quantity.quantity == 0
+
+
+@pytest.mark.asyncio
+async def test_product_id_from_trusted_defaults():
+    product_id = ProductIdEntity.from_trusted()
+    assert product_id.product_id is not None
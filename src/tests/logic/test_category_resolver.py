@@ -0,0 +1,70 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+
+import pytest
+
+from src.logic.repo_service.category_resolver import CategoryIdResolver
+
+
+class CategoryRepositoryDouble:
+    def __init__(self):
+        self.ids = {}
+        self.calls = []
+
+    async def get_or_create_ids(self, session, names):
+        self.calls.append(set(names))
+        # Даём другим задачам шанс прийти с тем же промахом
+        await asyncio.sleep(0)
+        return {name: self.ids.setdefault(name, uuid.uuid4()) for name in names}
+
+
+@asynccontextmanager
+async def session():
+    yield None
+
+
+@pytest.fixture()
+def repository():
+    return CategoryRepositoryDouble()
+
+
+@pytest.mark.asyncio
+async def test_resolver_caches_ids(repository):
+    resolver = CategoryIdResolver(repository=repository, session=session)
+
+    first = await resolver.resolve(["Food", "Home", "Food"])
+    second = await resolver.resolve({"Food", "Home"})
+
+    assert first == second == repository.ids
+    assert repository.calls == [{"Food", "Home"}]
+
+
+@pytest.mark.asyncio
+async def test_resolver_coalesces_concurrent_misses(repository):
+    resolver = CategoryIdResolver(repository=repository, session=session)
+
+    results = await asyncio.gather(
+        resolver.resolve({"Food"}), resolver.resolve({"Food", "Home"})
+    )
+
+    assert results[0]["Food"] == results[1]["Food"]
+    assert repository.calls == [{"Food"}, {"Home"}]
+
+
+@pytest.mark.asyncio
+async def test_resolver_lru_and_invalidate(repository):
+    resolver = CategoryIdResolver(repository=repository, session=session, max_size=2)
+
+    await resolver.resolve({"Food"})
+    await resolver.resolve({"Home"})
+    await resolver.resolve({"Toys"})
+    await resolver.resolve({"Toys", "Home"})
+    assert len(repository.calls) == 3
+
+    await resolver.resolve({"Food"})
+    assert repository.calls[-1] == {"Food"}
+
+    resolver.invalidate(["Toys"])
+    await resolver.resolve({"Toys"})
+    assert repository.calls[-1] == {"Toys"}
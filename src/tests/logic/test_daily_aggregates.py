@@ -0,0 +1,163 @@
+import datetime
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import select, func
+
+from src.infra.db.postgres.models.aggregate_models import (
+    DailyRevenue,
+    DailyProductSales,
+    DailyCategoryRevenue,
+)
+from src.infra.db.postgres.models.lxml_models import Product, Category
+from src.infra.repository.postgres.copy_loader import ProductCopyLoader
+from src.infra.repository.postgres.daily_aggregates_repo import (
+    DailyAggregateRepository,
+)
+from src.infra.repository.postgres.lxml_repos import (
+    CategoryRepository,
+    ProductRepository,
+)
+from src.infra.repository.postgres.partitions_repo import (
+    PartitionRepository,
+    month_start,
+)
+from src.infra.repository.postgres.raw_sql import QueryRepository
+from src.logic.repo_service.aggregate_service import DailyAggregateService
+
+SALE_DATE = datetime.date(2024, 2, 10)
+
+
+class AggregateRepositoryDouble:
+    def __init__(self, mismatched=()):
+        self.mismatched = list(mismatched)
+        self.rebuilt = False
+
+    async def rebuild(self, session):
+        self.rebuilt = True
+        self.mismatched = []
+
+    async def get_mismatched_dates(self, session):
+        return self.mismatched
+
+
+class SummarySessionDouble:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = 0
+
+    async def execute(self, query, params):
+        self.executed += 1
+        return self
+
+    def tuples(self):
+        return iter(self.rows)
+
+
+def make_service(repository):
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    return DailyAggregateService(repository=repository, session=session)
+
+
+@pytest.mark.asyncio
+async def test_rebuild_clears_mismatched_dates():
+    repository = AggregateRepositoryDouble(mismatched=[SALE_DATE])
+    service = make_service(repository)
+
+    assert await service.check() == [SALE_DATE]
+    await service.rebuild()
+
+    assert repository.rebuilt
+    assert await service.check() == []
+
+
+@pytest.mark.asyncio
+async def test_date_summary_split_from_single_result():
+    repository = QueryRepository(
+        product_model=Product,
+        category_model=Category,
+        revenue_model=DailyRevenue,
+        product_sales_model=DailyProductSales,
+        category_revenue_model=DailyCategoryRevenue,
+    )
+    session = SummarySessionDouble(
+        [
+            ("category", "Books", 12.5),
+            ("category", "Toys", 7.5),
+            ("top", "Novel", 0.3),
+            ("top", "Puzzle", 0.2),
+            ("total", None, 20.0),
+        ]
+    )
+
+    summary = await repository.get_date_summary(session=session, input_date=SALE_DATE)
+
+    assert summary == (20.0, ["Novel", "Puzzle"], [("Books", 12.5), ("Toys", 7.5)])
+    assert session.executed == 1
+
+
+@pytest.mark.asyncio
+async def test_aggregates_follow_product_writes(db_session, get_container):
+    product_repo: ProductRepository = get_container.resolve(ProductRepository)
+    copy_loader: ProductCopyLoader = get_container.resolve(ProductCopyLoader)
+    aggregate_repo: DailyAggregateRepository = get_container.resolve(
+        DailyAggregateRepository
+    )
+    query_repo: QueryRepository = get_container.resolve(QueryRepository)
+
+    await get_container.resolve(PartitionRepository).create_month(
+        session=db_session, month=month_start(SALE_DATE)
+    )
+    category_ids = await get_container.resolve(CategoryRepository).get_or_create_ids(
+        session=db_session, names={"Aggregate category"}
+    )
+    rows = [
+        {
+            "product": f"Aggregate product {number}",
+            "category_id": category_ids["Aggregate category"],
+            "sale_date": SALE_DATE,
+            "quantity": number + 1,
+            "price": 10.0 * (number + 1),
+        }
+        for number in range(5)
+    ]
+    try:
+        # Один и тот же товар приходит и через upsert, и через COPY
+        await product_repo.bulk_upsert(session=db_session, rows=rows)
+        await copy_loader.load(
+            session=db_session,
+            records=[
+                (row["product"], row["category_id"], SALE_DATE, 1, row["price"])
+                for row in rows[:2]
+            ],
+        )
+
+        expected = await db_session.execute(
+            select(func.sum(Product.price * Product.quantity) / 100).where(
+                Product.sale_date == SALE_DATE
+            )
+        )
+        total = await query_repo.get_date_total_revenue(
+            session=db_session, input_date=SALE_DATE
+        )
+        assert total == pytest.approx(expected.scalar())
+
+        top = await query_repo.get_date_top_three_products(
+            session=db_session, input_date=SALE_DATE
+        )
+        assert top[0] == "Aggregate product 4"
+
+        summary = await query_repo.get_date_summary(
+            session=db_session, input_date=SALE_DATE
+        )
+        assert summary[0] == pytest.approx(total)
+        assert summary[1] == list(top)
+        assert summary[2] == [
+            ("Aggregate category", pytest.approx(total)),
+        ]
+        assert await aggregate_repo.get_mismatched_dates(session=db_session) == []
+    finally:
+        await db_session.rollback()
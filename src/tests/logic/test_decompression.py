@@ -0,0 +1,105 @@
+import bz2
+import gzip
+import hashlib
+import lzma
+import zlib
+
+import pytest
+
+from src.logic.other.decompression import (
+    StreamDecompressor,
+    open_feed,
+    map_feed,
+    feed_digest,
+)
+
+FEED = b'<sales_data date="2024-01-01"><products>' + b"<product/>" * 500 + (
+    b"</products></sales_data>"
+)
+
+
+def decompress_by_chunks(decompressor: StreamDecompressor, data: bytes, size: int):
+    result = [
+        decompressor.decompress(data[start : start + size])
+        for start in range(0, len(data), size)
+    ]
+    result.append(decompressor.flush())
+    return b"".join(result)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "compress, compression",
+    [
+        (gzip.compress, "gzip"),
+        (bz2.compress, "bz2"),
+        (lzma.compress, "xz"),
+        (lambda data: data, "identity"),
+    ],
+)
+async def test_detect_by_magic_bytes(compress, compression):
+    decompressor = StreamDecompressor()
+
+    assert decompress_by_chunks(decompressor, compress(FEED), 3) == FEED
+    assert decompressor.compression == compression
+
+
+@pytest.mark.asyncio
+async def test_content_encoding_deflate():
+    decompressor = StreamDecompressor(encoding="deflate")
+
+    assert decompress_by_chunks(decompressor, zlib.compress(FEED), 100) == FEED
+
+
+@pytest.mark.asyncio
+async def test_concatenated_gzip_members():
+    data = gzip.compress(FEED[:100]) + gzip.compress(FEED[100:])
+
+    assert decompress_by_chunks(StreamDecompressor(), data, 7) == FEED
+
+
+@pytest.mark.asyncio
+async def test_short_identity_stream():
+    assert decompress_by_chunks(StreamDecompressor(), b"<a/>", 2) == b"<a/>"
+
+
+@pytest.mark.asyncio
+async def test_unsupported_content_encoding():
+    with pytest.raises(ValueError):
+        StreamDecompressor(encoding="br")
+
+
+@pytest.mark.asyncio
+async def test_open_feed_plain_file_by_name(tmp_path):
+    path = tmp_path / "feed.xml"
+    path.write_bytes(FEED)
+
+    with open_feed(path) as source:
+        assert source == str(path)
+
+    with map_feed(path) as buffer:
+        assert buffer[:] == FEED
+
+
+@pytest.mark.asyncio
+async def test_open_feed_compressed_file(tmp_path):
+    path = tmp_path / "feed.xml.xz"
+    path.write_bytes(lzma.compress(FEED))
+
+    with open_feed(path) as source:
+        assert source.read() == FEED
+
+    with pytest.raises(ValueError):
+        with map_feed(path):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_feed_digest_of_decompressed_payload(tmp_path):
+    plain, compressed = tmp_path / "feed.xml", tmp_path / "feed.xml.gz"
+    plain.write_bytes(FEED)
+    compressed.write_bytes(gzip.compress(FEED))
+
+    # Тот же digest, что у фида из строки или скачанного по URL
+    expected = hashlib.sha256(FEED).hexdigest()
+    assert feed_digest(plain) == feed_digest(compressed) == expected
@@ -0,0 +1,67 @@
+import datetime
+
+import pytest
+
+from src.domain.entities.base_lxml import BaseLxmlEntity
+from src.domain.entities.lxml_entities import ProductEntity, QuantityEntity, PriceEntity
+from src.logic.other.feed_delta import diff_date_products
+
+SALE_DATE = datetime.date(2024, 1, 1)
+
+
+def make_product(name: str, category: str, quantity: int, price: float):
+    return BaseLxmlEntity(
+        product=ProductEntity(name=name),
+        sale_date=SALE_DATE,
+        quantity=QuantityEntity(quantity=quantity),
+        price=PriceEntity(price=price),
+        category_name=category,
+    )
+
+
+@pytest.mark.asyncio
+async def test_diff_date_products_only_changed_rows():
+    stored = {
+        ("Milk", "Food"): ("id-1", 2, 9900),
+        ("Bread", "Food"): ("id-2", 1, 4500),
+        ("Soap", "Home"): ("id-3", 5, 12000),
+    }
+    milk = make_product("Milk", "Food", 2, 9900)
+    bread = make_product("Bread", "Food", 3, 4500)
+    tea = make_product("Tea", "Food", 1, 30000)
+    soap_in_other_category = make_product("Soap", "Bath", 5, 12000)
+
+    delta = diff_date_products(
+        sale_date=SALE_DATE,
+        stored=stored,
+        entities=[milk, bread, tea, soap_in_other_category],
+    )
+
+    assert delta.sale_date == SALE_DATE
+    assert delta.inserts == [tea, soap_in_other_category]
+    assert delta.updates == [("id-2", bread)]
+    assert delta.deletes == ["id-3"]
+    assert len(delta) == 4
+
+
+@pytest.mark.asyncio
+async def test_diff_date_products_same_feed_is_empty():
+    stored = {("Milk", "Food"): ("id-1", 2, 9900)}
+
+    delta = diff_date_products(
+        sale_date=SALE_DATE,
+        stored=stored,
+        entities=[make_product("Milk", "Food", 2, 9900)],
+    )
+
+    assert len(delta) == 0
+
+
+@pytest.mark.asyncio
+async def test_diff_date_products_empty_state_inserts_everything():
+    entities = [make_product("Milk", "Food", 2, 9900)]
+
+    delta = diff_date_products(sale_date=SALE_DATE, stored={}, entities=entities)
+
+    assert delta.inserts == entities
+    assert not delta.updates and not delta.deletes
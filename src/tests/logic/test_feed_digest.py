@@ -0,0 +1,159 @@
+import asyncio
+import gzip
+
+import pytest
+
+from src.domain.entities.base_lxml import ProductDeltaEntity
+from src.logic.use_case import product_category
+from src.logic.use_case.product_category import ParseAndCreateProductCategoryUseCase
+from src.logic.xml_parser import LXMLParser
+
+
+class FeedDigestRepositoryDouble:
+    def __init__(self, in_flight_ttl: float = 0.03):
+        self.in_flight_ttl = in_flight_ttl
+        # (состояние, токен владельца)
+        self.value: tuple[str, str | None] | None = None
+        self.extended = 0
+
+    def get_state(self, digest):
+        return self.value[0] if self.value is not None else None
+
+    def owned(self, token: str) -> bool:
+        return self.value is not None and self.value[1] == token
+
+    def acquire(self, digest, owner, token):
+        if self.value is not None:
+            return self.value[0]
+        self.value = (f"in_flight:{owner}", token)
+
+    def extend(self, digest, owner, token):
+        if self.owned(token):
+            self.extended += 1
+            return True
+        return False
+
+    def mark_processed(self, digest, owner, token):
+        if self.owned(token):
+            self.value = ("processed", None)
+            return True
+        return False
+
+    def release(self, digest, owner, token):
+        if self.owned(token):
+            self.value = None
+            return True
+        return False
+
+
+class ProductCategoryUseCaseDouble:
+    def __init__(self):
+        self.replaced = []
+        self.created = []
+
+    async def create_product_batches_usecase(self, make_batches, digest, on_progress):
+        async for batch in make_batches(10):
+            self.created.extend(entity.product.name for entity in batch)
+        return len(self.created)
+
+    async def forget_feed_progress_usecase(self, digest):
+        pass
+
+    async def replace_sale_date_usecase(self, entities):
+        self.replaced.append([entity.product.name for entity in entities])
+        return ProductDeltaEntity(
+            sale_date=entities[0].sale_date, inserts=[], updates=[], deletes=[]
+        )
+
+
+def make_usecase(digest_repository):
+    return ParseAndCreateProductCategoryUseCase(
+        parser=LXMLParser,
+        product_service_usecase=ProductCategoryUseCaseDouble(),
+        http_client=None,
+        digest_repository=digest_repository,
+    )
+
+
+@pytest.fixture(autouse=True)
+def fast_extend(monkeypatch):
+    monkeypatch.setattr(product_category, "MIN_EXTEND_INTERVAL", 0)
+
+
+@pytest.mark.asyncio
+async def test_long_ingestion_keeps_feed_in_flight():
+    repository = FeedDigestRepositoryDouble()
+    usecase = make_usecase(repository)
+
+    async def write():
+        await asyncio.sleep(0.05)
+        return "written"
+
+    assert await usecase.run_once(digest="abc", task_id="t1", write=write) == "written"
+    assert repository.extended >= 1
+    assert repository.value == ("processed", None)
+
+
+@pytest.mark.asyncio
+async def test_expired_run_does_not_touch_new_owner_key():
+    repository = FeedDigestRepositoryDouble()
+    usecase = make_usecase(repository)
+
+    async def write(fail: bool):
+        # Ключ истёк, и тот же фид захватила другая задача
+        repository.value = ("in_flight:t2", "other")
+        if fail:
+            raise ConnectionError("connection lost")
+        return "written"
+
+    assert await usecase.run_once(
+        digest="abc", task_id="t1", write=lambda: write(fail=False)
+    ) == "written"
+    assert repository.value == ("in_flight:t2", "other")
+
+    repository.value = None
+    with pytest.raises(ConnectionError):
+        await usecase.run_once(digest="abc", task_id="t1", write=lambda: write(fail=True))
+    assert repository.value == ("in_flight:t2", "other")
+
+
+@pytest.mark.asyncio
+async def test_delta_feeds_bypass_digest():
+    repository = FeedDigestRepositoryDouble()
+    usecase = make_usecase(repository)
+    feeds = {
+        name: (
+            '<sales_data date="2024-01-01"><products><product><name>%s</name>'
+            "<quantity>1</quantity><price>1</price></product></products></sales_data>"
+            % name
+        )
+        for name in ("A", "B")
+    }
+
+    # Исправление и возврат к прежнему фиду за ту же дату
+    for name in ("A", "B", "A"):
+        message, _ = await usecase.parse_and_create(feeds[name], delta=True)
+        assert "delta" in message
+
+    assert usecase.product_service_usecase.replaced == [["A"], ["B"], ["A"]]
+    assert repository.value is None
+
+
+@pytest.mark.asyncio
+async def test_compressed_file_dedupes_with_plain_file(tmp_path):
+    repository = FeedDigestRepositoryDouble()
+    usecase = make_usecase(repository)
+    feed = (
+        b'<sales_data date="2024-01-01"><products><product><name>A</name>'
+        b"<quantity>1</quantity><price>1</price></product></products></sales_data>"
+    )
+    plain, compressed = tmp_path / "feed.xml", tmp_path / "feed.xml.gz"
+    plain.write_bytes(feed)
+    compressed.write_bytes(gzip.compress(feed))
+
+    message, _ = await usecase.parse_file_and_create(str(plain))
+    assert "created" in message
+    message, _ = await usecase.parse_file_and_create(str(compressed))
+
+    assert message == "Feed already processed"
+    assert usecase.product_service_usecase.created == ["A"]
@@ -0,0 +1,55 @@
+import gzip
+
+import httpx
+import pytest
+
+from src.logic.other.http_client import HttpClient, DownloadTooLargeError
+
+FEED = b'<sales_data date="2024-01-01"><products/></sales_data>' * 100
+
+
+async def stream(data: bytes):
+    for start in range(0, len(data), 1000):
+        yield data[start : start + 1000]
+
+
+def make_client(handler) -> HttpClient:
+    http_client = HttpClient()
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return http_client
+
+
+@pytest.mark.asyncio
+async def test_stream_download_reuses_client_and_decompresses():
+    http_client = make_client(
+        lambda request: httpx.Response(
+            200,
+            content=stream(gzip.compress(FEED)),
+            headers={"Content-Encoding": "gzip"},
+        )
+    )
+    client = http_client.client
+
+    chunks = [chunk async for chunk in http_client.stream_download("http://feed")]
+
+    assert b"".join(chunks) == FEED
+    assert http_client.client is client
+    await http_client.close()
+
+
+@pytest.mark.asyncio
+async def test_download_to_file_max_size(tmp_path):
+    http_client = make_client(
+        lambda request: httpx.Response(200, content=stream(FEED))
+    )
+    path = tmp_path / "feed.xml"
+
+    written = await http_client.download_to_file("http://feed", str(path))
+    assert written == len(FEED) and path.read_bytes() == FEED
+
+    with pytest.raises(DownloadTooLargeError):
+        await http_client.download_to_file(
+            "http://feed", str(path), max_size=len(FEED) - 1
+        )
+    assert not path.exists()
+    await http_client.close()
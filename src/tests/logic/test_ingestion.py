@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from src.logic.other.ingestion import IngestionScheduler
+
+
+@pytest.mark.asyncio
+async def test_scheduler_bounds_concurrency_and_queue():
+    scheduler = IngestionScheduler(concurrency=2, queue_size=1)
+    produced, acks = [], []
+    state = {"active": 0, "max_active": 0, "max_ahead": 0}
+
+    def batches():
+        for index in range(6):
+            produced.append(index)
+            yield index, [index] * 3
+
+    async def persist(index, batch):
+        state["active"] += 1
+        state["max_active"] = max(state["max_active"], state["active"])
+        # Сколько пачек разобрано, но ещё не подтверждено
+        state["max_ahead"] = max(state["max_ahead"], len(produced) - len(acks))
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return len(batch)
+
+    progress = await scheduler.run(
+        batches=batches(),
+        persist=persist,
+        on_ack=lambda progress: acks.append(progress.batches_acked),
+    )
+
+    assert progress.batches_acked == progress.batches_queued == 6
+    assert progress.products_acked == progress.rows_written == 18
+    assert acks == [1, 2, 3, 4, 5, 6]
+    assert state["max_active"] == 2
+    # concurrency пишутся, queue_size ждут в очереди, ещё одна у производителя
+    assert state["max_ahead"] <= 2 + 1 + 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_stops_on_persist_error():
+    scheduler = IngestionScheduler(concurrency=2, queue_size=1)
+    produced = []
+
+    async def batches():
+        for index in range(100):
+            produced.append(index)
+            yield index, [index]
+
+    async def persist(index, batch):
+        if index == 1:
+            raise RuntimeError("write failed")
+        await asyncio.sleep(0.01)
+        return 1
+
+    with pytest.raises(RuntimeError, match="write failed"):
+        await scheduler.run(batches=batches(), persist=persist)
+
+    assert len(produced) < 10
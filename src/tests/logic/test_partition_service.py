@@ -0,0 +1,77 @@
+import datetime
+from contextlib import asynccontextmanager
+
+import pytest
+
+from src.infra.repository.postgres.partitions_repo import add_months
+from src.logic.repo_service.partition_service import ProductPartitionService
+
+
+class PartitionRepositoryDouble:
+    def __init__(self, months=()):
+        self.months = set(months)
+        self.lookups = 0
+
+    async def lock(self, session):
+        pass
+
+    async def get_months(self, session):
+        self.lookups += 1
+        return {month: f"products_{month:%Y_%m}" for month in self.months}
+
+    async def create_month(self, session, month):
+        self.months.add(month)
+        return f"products_{month:%Y_%m}"
+
+    async def drop_month(self, session, month):
+        self.months.remove(month)
+        return f"products_{month:%Y_%m}"
+
+
+def make_service(repository, **kwargs):
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    return ProductPartitionService(repository=repository, session=session, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_add_months_crosses_years():
+    assert add_months(datetime.date(2024, 11, 1), 3) == datetime.date(2025, 2, 1)
+    assert add_months(datetime.date(2024, 1, 1), -1) == datetime.date(2023, 12, 1)
+
+
+@pytest.mark.asyncio
+async def test_partitions_created_once_per_month():
+    repository = PartitionRepositoryDouble(months={datetime.date(2024, 1, 1)})
+    service = make_service(repository)
+
+    created = await service.ensure_partitions(
+        [datetime.date(2024, 1, 15), datetime.date(2024, 2, 3)]
+    )
+    await service.ensure_partitions([datetime.date(2024, 2, 28)])
+
+    assert created == ["products_2024_02"]
+    # Месяцы, которые уже проверялись, не запрашиваются повторно
+    assert repository.lookups == 1
+
+
+@pytest.mark.asyncio
+async def test_maintain_creates_ahead_and_drops_expired():
+    repository = PartitionRepositoryDouble(
+        months={datetime.date(2023, 12, 1), datetime.date(2024, 3, 1)}
+    )
+    service = make_service(repository, months_ahead=2, retention_months=2)
+
+    result = await service.maintain(today=datetime.date(2024, 3, 20))
+
+    assert result == {
+        "created": ["products_2024_04", "products_2024_05"],
+        "dropped": ["products_2023_12"],
+    }
+    assert sorted(repository.months) == [
+        datetime.date(2024, 3, 1),
+        datetime.date(2024, 4, 1),
+        datetime.date(2024, 5, 1),
+    ]
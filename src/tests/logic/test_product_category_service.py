@@ -0,0 +1,402 @@
+import asyncio
+import datetime
+from array import array
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import OperationalError, IntegrityError
+
+from src.domain.entities.base_lxml import BaseLxmlEntity, ProductColumnsEntity
+from src.domain.entities.lxml_entities import ProductEntity, QuantityEntity, PriceEntity
+from src.infra.db.postgres.db import AsyncPostgresClient
+from src.infra.exceptions.exceptions import ChunkAlreadyCommitted
+from src.logic.other.ingestion import IngestionScheduler
+from src.logic.repo_service import product_category_service
+from src.logic.repo_service.product_category_service import ProductCategoryService
+
+
+class ProductCategoryRepositoryDouble:
+    copy_loader = None
+
+    def __init__(self, failures: list[Exception] | None = None):
+        self.chunks = []
+        self.failures = failures or []
+
+    async def create_category_and_products(self, session, entities, category_ids):
+        if self.failures:
+            raise self.failures.pop(0)
+        session.append(("chunk", [entity.product.name for entity in entities]))
+        return len(entities)
+
+    async def create_category_and_product_columns(self, session, entity, category_ids):
+        session.append(("chunk", list(entity.products)))
+        return len(entity)
+
+
+class FeedProgressRepositoryDouble:
+    def __init__(self, chunk_size: int | None = None, committed: set | None = None):
+        self.chunk_size = chunk_size
+        self.committed = committed or set()
+
+    async def get_committed_chunks(self, session, digest):
+        return self.chunk_size, set(self.committed)
+
+    async def mark_chunk(self, session, digest, chunk_index, chunk_size, products):
+        # Уникальный индекс (digest, chunk_index)
+        if chunk_index in self.committed:
+            raise ChunkAlreadyCommitted(digest=digest, chunk_index=chunk_index)
+        session.append(("progress", chunk_index))
+
+    async def delete(self, session, digest):
+        self.committed = set()
+
+
+class StagingRepositoryDouble(ProductCategoryRepositoryDouble):
+    copy_loader = SimpleNamespace(staged_model="feed_staged_products")
+
+    def __init__(self, staged: dict | None = None):
+        super().__init__()
+        # ordinal -> (product, category, quantity)
+        self.staged = staged or {}
+        self.merged = []
+
+    async def stage_category_and_products(
+        self, session, digest, first_ordinal, entities, category_ids
+    ):
+        session.append(
+            (
+                "staged",
+                {
+                    first_ordinal + number: (
+                        entity.product.name,
+                        entity.category_name,
+                        entity.quantity.quantity,
+                    )
+                    for number, entity in enumerate(entities)
+                },
+            )
+        )
+        return len(entities)
+
+    async def merge_staged_products(self, session, digest):
+        # Как ProductCopyLoader.merge_staged: категория у первой строки продукта
+        rows = {}
+        for ordinal in sorted(self.staged):
+            name, category, quantity = self.staged[ordinal]
+            if name in rows:
+                rows[name] = (name, rows[name][1], rows[name][2] + quantity)
+            else:
+                rows[name] = (name, category, quantity)
+        self.staged = {}
+        self.merged.extend(rows.values())
+        return len(rows)
+
+    async def discard_staged_products(self, session, digest):
+        self.staged = {}
+
+
+def make_service(repository, progress, commits):
+    @asynccontextmanager
+    async def session():
+        # Изменения транзакции видны только после выхода без исключения
+        pending = []
+        yield pending
+        for change in pending:
+            commits.append(change)
+            if change[0] == "chunk":
+                repository.chunks.append(change[1])
+            elif change[0] == "staged":
+                repository.staged.update(change[1])
+            else:
+                progress.committed.add(change[1])
+
+    return ProductCategoryService(
+        repository=repository,
+        session=session,
+        progress_repository=progress,
+        chunk_size=2,
+        chunk_retries=2,
+        scheduler=IngestionScheduler(concurrency=2, queue_size=1),
+    )
+
+
+def make_product(name: str, category: str = "Food") -> BaseLxmlEntity:
+    return BaseLxmlEntity(
+        product=ProductEntity(name=name),
+        sale_date=datetime.date(2024, 1, 1),
+        quantity=QuantityEntity(quantity=1),
+        price=PriceEntity(price=100),
+        category_name=category,
+    )
+
+
+def make_products(count: int) -> list[BaseLxmlEntity]:
+    return [make_product(f"Product {number}") for number in range(count)]
+
+
+def batches_of(batches):
+    async def make_batches(batch_size):
+        for batch in batches:
+            if isinstance(batch, Exception):
+                raise batch
+            yield batch
+
+    return make_batches
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(product_category_service, "CHUNK_RETRY_DELAY", 0)
+
+
+@pytest.mark.asyncio
+async def test_feed_written_in_chunks_with_progress():
+    repository, progress, commits = (
+        ProductCategoryRepositoryDouble(),
+        FeedProgressRepositoryDouble(),
+        [],
+    )
+    service = make_service(repository, progress, commits)
+
+    acks = []
+    created = await service.create_category_products(
+        make_products(5),
+        digest="abc",
+        on_progress=lambda state: acks.append(state.batches_acked),
+    )
+
+    assert created == 5
+    # Чанки пишутся параллельно и могут завершиться в любом порядке
+    assert sorted(len(chunk) for chunk in repository.chunks) == [1, 2, 2]
+    assert progress.committed == {0, 1, 2}
+    assert acks == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_feed_resumes_after_committed_chunks():
+    repository, progress, commits = (
+        ProductCategoryRepositoryDouble(),
+        FeedProgressRepositoryDouble(chunk_size=2, committed={0, 2}),
+        [],
+    )
+    service = make_service(repository, progress, commits)
+
+    created = await service.create_category_products(make_products(5), digest="abc")
+
+    assert created == 2
+    assert repository.chunks == [["Product 2", "Product 3"]]
+    assert progress.committed == {0, 1, 2}
+
+
+@pytest.mark.asyncio
+async def test_chunk_committed_by_another_writer_rolled_back():
+    repository, progress, commits = (
+        ProductCategoryRepositoryDouble(),
+        FeedProgressRepositoryDouble(),
+        [],
+    )
+    service = make_service(repository, progress, commits)
+    get_committed_chunks = progress.get_committed_chunks
+
+    async def committed_meanwhile(session, digest):
+        # Второй писатель того же фида успел закоммитить чанк 1
+        chunk_size, committed = await get_committed_chunks(session, digest)
+        progress.committed.add(1)
+        return chunk_size, committed
+
+    progress.get_committed_chunks = committed_meanwhile
+
+    created = await service.create_category_products(make_products(5), digest="abc")
+
+    assert created == 3
+    assert sorted(repository.chunks) == [["Product 0", "Product 1"], ["Product 4"]]
+    assert progress.committed == {0, 1, 2}
+
+
+@pytest.mark.asyncio
+async def test_chunk_retried_only_on_transient_errors():
+    transient = OperationalError("INSERT", {}, ConnectionError("connection lost"))
+    repository, progress, commits = (
+        ProductCategoryRepositoryDouble(failures=[transient]),
+        FeedProgressRepositoryDouble(),
+        [],
+    )
+    service = make_service(repository, progress, commits)
+
+    assert await service.create_category_products(make_products(3), digest="abc") == 3
+
+    progress.committed = set()
+    repository.failures = [IntegrityError("INSERT", {}, Exception("duplicate"))]
+    with pytest.raises(IntegrityError):
+        await service.create_category_products(make_products(3), digest="def")
+
+
+@pytest.mark.asyncio
+async def test_feed_batches_resume_with_stored_chunk_size():
+    repository, progress, commits = (
+        StagingRepositoryDouble(
+            staged={number: (f"Product {number}", "Food", 1) for number in range(3)}
+        ),
+        FeedProgressRepositoryDouble(chunk_size=3, committed={0}),
+        [],
+    )
+    service = make_service(repository, progress, commits)
+    products = make_products(5)
+
+    async def make_batches(batch_size):
+        for start in range(0, len(products), batch_size):
+            yield products[start : start + batch_size]
+
+    created = await service.create_category_product_batches(
+        make_batches, digest="abc"
+    )
+
+    # Пачки режутся по размеру из прогресса, а не по chunk_size сервиса
+    assert [change[1] for change in commits if change[0] == "staged"] == [
+        {3: ("Product 3", "Food", 1), 4: ("Product 4", "Food", 1)}
+    ]
+    assert created == 5
+    assert progress.committed == {0, 1}
+
+
+@pytest.mark.asyncio
+async def test_feed_batches_merged_after_parse_like_whole_feed():
+    repository, progress, commits = (
+        StagingRepositoryDouble(),
+        FeedProgressRepositoryDouble(),
+        [],
+    )
+    service = make_service(repository, progress, commits)
+    make_batches = batches_of(
+        [
+            [make_product("A", "Food"), make_product("B")],
+            [make_product("A", "Toys"), make_product("C")],
+        ]
+    )
+
+    created = await service.create_category_product_batches(make_batches, digest="abc")
+
+    # Пока идёт разбор, в products ничего не пишется
+    assert repository.chunks == []
+    assert created == 3
+    assert repository.merged == [("A", "Food", 2), ("B", "Food", 1), ("C", "Food", 1)]
+
+
+@pytest.mark.asyncio
+async def test_broken_feed_batches_discarded():
+    repository, progress, commits = (
+        StagingRepositoryDouble(),
+        FeedProgressRepositoryDouble(),
+        [],
+    )
+    service = make_service(repository, progress, commits)
+    make_batches = batches_of(
+        [[make_product("A"), make_product("B")], ValueError("Invalid XML format.")]
+    )
+
+    with pytest.raises(ValueError):
+        await service.create_category_product_batches(make_batches, digest="abc")
+
+    assert repository.merged == []
+    assert repository.staged == {}
+    assert progress.committed == set()
+
+
+@pytest.mark.asyncio
+async def test_feed_batches_without_staging_written_after_parse():
+    repository, progress, commits = (
+        ProductCategoryRepositoryDouble(),
+        FeedProgressRepositoryDouble(),
+        [],
+    )
+    service = make_service(repository, progress, commits)
+    make_batches = batches_of(
+        [[make_product("A"), make_product("B")], ValueError("Invalid XML format.")]
+    )
+
+    with pytest.raises(ValueError):
+        await service.create_category_product_batches(make_batches, digest="abc")
+    assert repository.chunks == []
+
+    make_batches = batches_of(
+        [[make_product("A"), make_product("B")], [make_product("A", "Toys")]]
+    )
+    assert await service.create_category_product_batches(make_batches) == 2
+    assert repository.chunks == [["A", "B"]]
+
+
+@pytest.mark.asyncio
+async def test_feed_columns_resume_after_committed_chunks():
+    repository, progress, commits = (
+        ProductCategoryRepositoryDouble(),
+        FeedProgressRepositoryDouble(chunk_size=2, committed={1}),
+        [],
+    )
+    service = make_service(repository, progress, commits)
+    products = make_products(5)
+    columns = ProductColumnsEntity(
+        sale_date=products[0].sale_date,
+        products=[entity.product.name for entity in products],
+        categories=[entity.category_name for entity in products],
+        quantities=array("q", [1] * len(products)),
+        prices=array("q", [100] * len(products)),
+    )
+
+    created = await service.create_category_product_columns(columns, digest="abc")
+
+    assert created == 3
+    assert sorted(repository.chunks) == [["Product 0", "Product 1"], ["Product 4"]]
+    assert progress.committed == {0, 1, 2}
+
+
+class SessionDouble(list):
+    committed = False
+    rolled_back = False
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        self.rolled_back = True
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_cancelled_chunk_not_committed():
+    session = SessionDouble()
+    client = AsyncPostgresClient(settings=None)
+    client._sessionmaker = lambda: session
+    writing = asyncio.Event()
+
+    class BlockedRepositoryDouble(ProductCategoryRepositoryDouble):
+        async def create_category_and_products(self, session, entities, category_ids):
+            writing.set()
+            await asyncio.Event().wait()
+
+    service = ProductCategoryService(
+        repository=BlockedRepositoryDouble(),
+        session=client.get_async_session,
+        progress_repository=FeedProgressRepositoryDouble(),
+    )
+    chunk = asyncio.create_task(
+        service.create_chunk(
+            entities=make_products(2),
+            use_copy=False,
+            digest="abc",
+            chunk_index=0,
+            chunk_size=2,
+        )
+    )
+
+    # Отметка чанка уже в транзакции, продукты ещё не записаны
+    await writing.wait()
+    assert session == [("progress", 0)]
+    chunk.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await chunk
+
+    assert session.rolled_back
+    assert not session.committed
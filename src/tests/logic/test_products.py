@@ -1,6 +1,7 @@
 import datetime
 
 import pytest
+from sqlalchemy import select
 
 from src.domain.entities.base_lxml import ProductEntityWithCategoryId
 from src.domain.entities.lxml_entities import (
@@ -9,10 +10,16 @@ from src.domain.entities.lxml_entities import (
     QuantityEntity,
     PriceEntity,
 )
+from src.infra.db.postgres.models.lxml_models import Product
+from src.infra.repository.postgres.copy_loader import ProductCopyLoader
 from src.infra.repository.postgres.lxml_repos import (
     CategoryRepository,
     ProductRepository,
 )
+from src.infra.repository.postgres.partitions_repo import (
+    PartitionRepository,
+    month_start,
+)
 
 
 @pytest.mark.asyncio
@@ -41,3 +48,134 @@ async def test_create_category_and_product(db_session, get_container):
     assert result.price == 100
 
     # TODO finish tests
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_products(db_session, get_container):
+    product_repo: ProductRepository = get_container.resolve(ProductRepository)
+    category_repo: CategoryRepository = get_container.resolve(CategoryRepository)
+
+    await get_container.resolve(PartitionRepository).create_month(
+        session=db_session, month=month_start(datetime.date.today())
+    )
+    category_ids = await category_repo.get_or_create_ids(
+        session=db_session, names={"Bulk category"}
+    )
+    rows = [
+        {
+            "product": f"Bulk product {number % 3}",
+            "category_id": category_ids["Bulk category"],
+            "sale_date": datetime.date.today(),
+            "quantity": 1,
+            "price": 100,
+        }
+        for number in range(9)
+    ]
+
+    ids = await product_repo.bulk_upsert(session=db_session, rows=rows, chunk_size=2)
+    assert len(ids) == 3
+
+    ids_again = await product_repo.bulk_upsert(session=db_session, rows=rows[:3])
+    assert sorted(ids_again) == sorted(ids)
+
+
+@pytest.mark.asyncio
+async def test_copy_and_bulk_upsert_keep_first_price(db_session, get_container):
+    product_repo: ProductRepository = get_container.resolve(ProductRepository)
+    copy_loader: ProductCopyLoader = get_container.resolve(ProductCopyLoader)
+    sale_date = datetime.date.today()
+
+    await get_container.resolve(PartitionRepository).create_month(
+        session=db_session, month=month_start(sale_date)
+    )
+    category_ids = await get_container.resolve(CategoryRepository).get_or_create_ids(
+        session=db_session, names={"Price category"}
+    )
+    # Повтор продукта в фиде с другой ценой: оба пути берут первую
+    prices = [300, 100, 200]
+    try:
+        await product_repo.bulk_upsert(
+            session=db_session,
+            rows=[
+                {
+                    "product": "Upsert price product",
+                    "category_id": category_ids["Price category"],
+                    "sale_date": sale_date,
+                    "quantity": 1,
+                    "price": price,
+                }
+                for price in prices
+            ],
+        )
+        await copy_loader.load(
+            session=db_session,
+            records=[
+                (
+                    "Copy price product",
+                    category_ids["Price category"],
+                    sale_date,
+                    1,
+                    price,
+                )
+                for price in prices
+            ],
+        )
+
+        stored = await db_session.execute(
+            select(Product.product, Product.price, Product.quantity).where(
+                Product.product.in_(["Upsert price product", "Copy price product"])
+            )
+        )
+        assert sorted(stored.tuples()) == [
+            ("Copy price product", 300, 3),
+            ("Upsert price product", 300, 3),
+        ]
+    finally:
+        await db_session.rollback()
+
+
+@pytest.mark.asyncio
+async def test_staged_feed_merged_once_like_whole_feed(db_session, get_container):
+    copy_loader: ProductCopyLoader = get_container.resolve(ProductCopyLoader)
+    sale_date = datetime.date.today()
+
+    await get_container.resolve(PartitionRepository).create_month(
+        session=db_session, month=month_start(sale_date)
+    )
+    category_ids = await get_container.resolve(CategoryRepository).get_or_create_ids(
+        session=db_session, names={"Staged first", "Staged second"}
+    )
+    try:
+        # Повтор продукта во второй пачке с другой категорией и ценой
+        await copy_loader.stage(
+            session=db_session,
+            digest="staged-feed",
+            first_ordinal=0,
+            records=[
+                ("Staged product", category_ids["Staged first"], sale_date, 1, 300)
+            ],
+        )
+        await copy_loader.stage(
+            session=db_session,
+            digest="staged-feed",
+            first_ordinal=2,
+            records=[
+                ("Staged product", category_ids["Staged second"], sale_date, 2, 100)
+            ],
+        )
+
+        merged = [
+            await copy_loader.merge_staged(session=db_session, digest="staged-feed")
+            for _ in range(2)
+        ]
+        # Второй merge не находит строк: их забрал первый
+        assert merged == [1, 0]
+
+        stored = await db_session.execute(
+            select(Product.category_id, Product.price, Product.quantity).where(
+                Product.product == "Staged product"
+            )
+        )
+        assert list(stored.tuples()) == [(category_ids["Staged first"], 300, 3)]
+    finally:
+        await db_session.rollback()
@@ -0,0 +1,94 @@
+import datetime
+
+import pytest
+from sqlalchemy import select, text
+
+from src.infra.db.postgres.models.lxml_models import Product
+from src.infra.repository.postgres.lxml_repos import (
+    CategoryRepository,
+    ProductRepository,
+)
+from src.infra.repository.postgres.partitions_repo import (
+    PartitionRepository,
+    month_start,
+)
+from src.infra.repository.postgres.raw_sql import QueryRepository
+
+SALE_DATE = datetime.date(2024, 1, 15)
+CATEGORIES = [f"Plan category {number}" for number in range(20)]
+
+
+async def fill_plan_dataset(session, container) -> dict[str, object]:
+    await container.resolve(PartitionRepository).create_month(
+        session=session, month=month_start(SALE_DATE)
+    )
+    category_ids = await container.resolve(CategoryRepository).get_or_create_ids(
+        session=session, names=set(CATEGORIES)
+    )
+    # Месяц данных: по 500 товаров на каждый день января
+    await container.resolve(ProductRepository).bulk_upsert(
+        session=session,
+        rows=(
+            {
+                "product": f"Plan product {number}",
+                "category_id": category_ids[CATEGORIES[number % len(CATEGORIES)]],
+                "sale_date": SALE_DATE.replace(day=day),
+                "quantity": number % 7 + 1,
+                "price": number % 100 + 1,
+            }
+            for day in range(1, 32)
+            for number in range(500)
+        ),
+    )
+    await session.execute(text("ANALYZE products"))
+    await session.execute(text("ANALYZE categories"))
+    # Последовательное чтение остаётся возможным, но только при отсутствии индекса
+    await session.execute(text("SET LOCAL enable_seqscan = off"))
+    return category_ids
+
+
+async def explain(session, query) -> dict:
+    compiled = query.compile(
+        dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    return result.scalar_one()[0]["Plan"]
+
+
+def sequential_scans(plan: dict) -> list[str]:
+    scans = []
+    if plan["Node Type"] == "Seq Scan":
+        scans.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        scans.extend(sequential_scans(child))
+    return scans
+
+
+@pytest.mark.asyncio
+async def test_products_queries_use_indexes(db_session, get_container):
+    category_ids = await fill_plan_dataset(db_session, get_container)
+    query_repo: QueryRepository = get_container.resolve(QueryRepository)
+    category_repo: CategoryRepository = get_container.resolve(CategoryRepository)
+
+    queries = {
+        "total_revenue": query_repo.total_revenue_query.params(input_date=SALE_DATE),
+        "top_three_products": query_repo.top_three_products_query.params(
+            input_date=SALE_DATE
+        ),
+        "category_distribution": query_repo.category_distribution_query.params(
+            input_date=SALE_DATE
+        ),
+        "summary": query_repo.summary_query.params(input_date=SALE_DATE),
+        "category_ids": category_repo.ids_by_names_query.params(
+            names=CATEGORIES[:3]
+        ),
+        "category_products": select(Product.id).where(
+            Product.category_id == category_ids[CATEGORIES[0]]
+        ),
+    }
+    try:
+        for name, query in queries.items():
+            plan = await explain(db_session, query)
+            assert sequential_scans(plan) == [], f"{name} falls back to Seq Scan"
+    finally:
+        await db_session.rollback()
@@ -0,0 +1,58 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, select, literal, text
+from sqlalchemy.dialects import postgresql
+
+from src.infra.db.postgres.db import StatementCacheStats
+from src.infra.db.postgres.models.aggregate_models import (
+    DailyRevenue,
+    DailyProductSales,
+    DailyCategoryRevenue,
+)
+from src.infra.db.postgres.models.lxml_models import Product, Category
+from src.infra.repository.postgres.raw_sql import QueryRepository
+
+
+@pytest.mark.asyncio
+async def test_statement_cache_stats_count_hits_by_name():
+    engine = create_engine("sqlite://")
+    stats = StatementCacheStats()
+    stats.listen(engine)
+    named = select(literal(1)).execution_options(statement_name="one")
+
+    with engine.connect() as connection:
+        for _ in range(3):
+            connection.execute(named)
+        connection.execute(text("SELECT 2"))
+
+    assert stats.to_dict()["one"] == {"hits": 2, "misses": 1, "hit_rate": 0.6667}
+    assert stats.to_dict()["other"] == {"hits": 0, "misses": 1, "hit_rate": 0.0}
+
+
+@pytest.mark.asyncio
+async def test_daily_queries_built_once_with_date_parameter():
+    repository = QueryRepository(
+        product_model=Product,
+        category_model=Category,
+        revenue_model=DailyRevenue,
+        product_sales_model=DailyProductSales,
+        category_revenue_model=DailyCategoryRevenue,
+    )
+    dialect = postgresql.asyncpg.dialect()
+    days = [datetime.date(2024, 1, 1), datetime.date(2024, 1, 2)]
+
+    for query in (
+        repository.total_revenue_query,
+        repository.top_three_products_query,
+        repository.category_distribution_query,
+        repository.summary_query,
+    ):
+        compiled = [
+            query.params(input_date=day).compile(dialect=dialect) for day in days
+        ]
+        # Дата приходит параметром, текст запроса одинаков для всех дней
+        assert str(compiled[0]) == str(compiled[1])
+        assert [statement.params["input_date"] for statement in compiled] == days
+
+    assert repository.total_revenue_query is repository.total_revenue_query
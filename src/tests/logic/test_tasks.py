@@ -0,0 +1,50 @@
+from unittest.mock import create_autospec
+
+import pytest
+
+from src.logic.use_case.product_category import ParseAndCreateProductCategoryUseCase
+
+
+@pytest.fixture()
+def tasks():
+    # Модуль задач при импорте собирает контейнер из настроек окружения
+    from src.infra.celery import tasks
+
+    return tasks
+
+
+@pytest.fixture()
+def usecase():
+    # autospec проверяет аргументы вызова по настоящей сигнатуре use case
+    usecase = create_autospec(ParseAndCreateProductCategoryUseCase, instance=True)
+    usecase.parse_and_create.return_value = ("skipped", None)
+    usecase.download_parse_and_create.return_value = ("skipped", None)
+    usecase.parse_file_and_create.return_value = ("skipped", None)
+    return usecase
+
+
+def test_tasks_call_usecase_with_its_signature(tasks, usecase):
+    assert (
+        tasks.start_parse_xml_and_save_products.run(
+            "<sales_data/>", delta=True, parse_and_create_usecase=usecase
+        )
+        == "skipped"
+    )
+    assert (
+        tasks.start_download_parse_and_save_products.run(
+            "http://feeds/feed.xml",
+            delta=True,
+            engine="target",
+            parse_and_create_usecase=usecase,
+        )
+        == "skipped"
+    )
+    assert (
+        tasks.start_parse_xml_file_and_save_products.run(
+            "feed.xml", engine="target", columnar=True, parse_and_create_usecase=usecase
+        )
+        == "skipped"
+    )
+
+    usecase.download_parse_and_create.assert_awaited_once()
+    usecase.parse_file_and_create.assert_awaited_once()
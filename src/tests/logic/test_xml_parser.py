@@ -0,0 +1,261 @@
+import datetime
+import io
+from pathlib import Path
+
+import pytest
+
+from src.logic.other.decompression import map_feed
+from src.logic import parser_engines
+from src.logic.parser_engines import PARSER_ENGINES, get_parser_engine
+from src.logic.xml_parser import LXMLParser
+
+FEED_PATH = Path(__file__).parents[3] / "fill_test_db.xml"
+
+
+def to_rows(entities):
+    return sorted(
+        (
+            entity.product.name,
+            entity.sale_date,
+            entity.quantity.quantity,
+            entity.price.price,
+            entity.category_name,
+        )
+        for entity in entities
+    )
+
+
+@pytest.fixture()
+def feed_text() -> str:
+    return FEED_PATH.read_text(encoding="utf-8")
+
+
+@pytest.mark.asyncio
+async def test_streaming_parsing_same_as_parsing(feed_text):
+    expected = to_rows(LXMLParser.parsing(lxml_data=feed_text))
+
+    assert to_rows(LXMLParser.streaming_parsing(str(FEED_PATH))) == expected
+    assert (
+        to_rows(LXMLParser.streaming_parsing(io.BytesIO(feed_text.encode("utf-8"))))
+        == expected
+    )
+
+
+@pytest.mark.asyncio
+async def test_streaming_parsing_sums_duplicates():
+    feed = (
+        b'<sales_data date="2024-01-01"><products>'
+        b"<product><name>A</name><quantity>2</quantity><price>1.5</price>"
+        b"<category>C</category></product>"
+        b"<product><name>A</name><quantity>3</quantity><price>9</price></product>"
+        b"<product><name>B</name><quantity>x</quantity><price>1</price></product>"
+        b"</products></sales_data>"
+    )
+
+    assert to_rows(LXMLParser.streaming_parsing(io.BytesIO(feed))) == [
+        ("A", datetime.date(2024, 1, 1), 5, 150, "C")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_streaming_parsing_missing_date():
+    with pytest.raises(ValueError):
+        LXMLParser.streaming_parsing(io.BytesIO(b"<sales_data><products/></sales_data>"))
+
+
+@pytest.mark.asyncio
+async def test_streaming_parsing_invalid_xml():
+    with pytest.raises(ValueError):
+        LXMLParser.streaming_parsing(io.BytesIO(b'<sales_data date="2024-01-01">'))
+
+
+@pytest.mark.asyncio
+async def test_incremental_parsing_same_as_parsing(feed_text):
+    data = feed_text.encode("utf-8")
+    parser = LXMLParser.incremental_parsing()
+    for start in range(0, len(data), 64):
+        parser.feed(data[start : start + 64])
+
+    assert to_rows(parser.close()) == to_rows(LXMLParser.parsing(lxml_data=feed_text))
+
+
+@pytest.mark.asyncio
+async def test_incremental_parsing_invalid_xml():
+    parser = LXMLParser.incremental_parsing()
+    parser.feed(b'<sales_data date="2024-01-01"><products>')
+
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+@pytest.mark.asyncio
+async def test_sharded_parsing_same_as_parsing(feed_text):
+    expected = to_rows(LXMLParser.parsing(lxml_data=feed_text))
+
+    assert to_rows(LXMLParser.sharded_parsing(feed_text, workers=1)) == expected
+    assert (
+        to_rows(LXMLParser.sharded_parsing(feed_text, workers=3, min_shard_size=1))
+        == expected
+    )
+
+
+@pytest.mark.asyncio
+async def test_sharded_parsing_sums_duplicates_across_shards():
+    products = b"".join(
+        b"<product><name>P%d</name><quantity>%d</quantity><price>1.25</price>"
+        b"<category>C</category></product>" % (number % 7, number)
+        for number in range(1, 200)
+    )
+    feed = b'<sales_data date="2024-01-01"><products>%s</products></sales_data>' % (
+        products
+    )
+
+    assert to_rows(
+        LXMLParser.sharded_parsing(feed, workers=4, min_shard_size=256)
+    ) == to_rows(LXMLParser.parsing(feed))
+
+
+@pytest.mark.asyncio
+async def test_sharded_parsing_reads_file_ranges_in_workers(feed_text):
+    expected = to_rows(LXMLParser.parsing(lxml_data=feed_text))
+
+    with map_feed(FEED_PATH) as lxml_data:
+        entities = LXMLParser.sharded_parsing(
+            lxml_data, workers=2, min_shard_size=1, path=str(FEED_PATH)
+        )
+
+    assert to_rows(entities) == expected
+
+
+@pytest.mark.asyncio
+async def test_columnar_parsing_same_as_parsing(feed_text):
+    columns = LXMLParser.columnar_parsing(str(FEED_PATH))
+
+    assert sorted(
+        zip(
+            columns.products,
+            [columns.sale_date] * len(columns),
+            columns.quantities,
+            columns.prices,
+            columns.categories,
+        )
+    ) == to_rows(LXMLParser.parsing(lxml_data=feed_text))
+
+
+@pytest.mark.asyncio
+async def test_columnar_parsing_without_products():
+    columns = LXMLParser.columnar_parsing(
+        io.BytesIO(b'<sales_data date="2024-01-01"><products/></sales_data>')
+    )
+
+    assert len(columns) == 0
+    assert columns.sale_date == datetime.date(2024, 1, 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("engine", list(PARSER_ENGINES))
+async def test_parser_engines_same_as_parsing(feed_text, engine):
+    expected = to_rows(LXMLParser.parsing(lxml_data=feed_text))
+    parser_engine = get_parser_engine(engine)
+
+    assert to_rows(parser_engine.parse(str(FEED_PATH))) == expected
+
+    incremental = parser_engine.incremental()
+    data = feed_text.encode("utf-8")
+    for start in range(0, len(data), 100):
+        incremental.feed(data[start : start + 100])
+    assert to_rows(incremental.close()) == expected
+
+
+@pytest.mark.asyncio
+async def test_target_engine_reads_fields_like_findtext():
+    feed = (
+        b'<sales_data date="2024-01-01"><products><product>'
+        b"<id>1</id><name>Milk<b>ignored</b></name><quantity>2</quantity>"
+        b"<price>10.50</price><name>Second name</name><extra><price>1</price></extra>"
+        b"</product></products></sales_data>"
+    )
+
+    assert to_rows(get_parser_engine("target").parse(io.BytesIO(feed))) == to_rows(
+        LXMLParser.streaming_parsing(io.BytesIO(feed))
+    )
+
+
+@pytest.mark.asyncio
+async def test_target_engine_invalid_feed():
+    engine = get_parser_engine("target")
+
+    with pytest.raises(ValueError, match="Missing 'date'"):
+        engine.parse(io.BytesIO(b"<sales_data><products/></sales_data>"))
+    with pytest.raises(ValueError, match="Invalid XML format"):
+        engine.parse(io.BytesIO(b'<sales_data date="2024-01-01"><product>'))
+    with pytest.raises(ValueError, match="Unknown parser engine"):
+        get_parser_engine("sax")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("engine", list(PARSER_ENGINES))
+async def test_iter_batches_same_as_parsing(feed_text, engine):
+    expected = to_rows(LXMLParser.parsing(lxml_data=feed_text))
+
+    batches = [
+        batch
+        async for batch in get_parser_engine(engine).iter_batches(
+            source=str(FEED_PATH), batch_size=3
+        )
+    ]
+
+    assert all(len(batch) == 3 for batch in batches[:-1])
+    assert to_rows(entity for batch in batches for entity in batch) == expected
+
+
+@pytest.mark.asyncio
+async def test_batch_parsing_merges_duplicates_within_batch():
+    feed = (
+        b'<sales_data date="2024-01-01"><products>'
+        b"<product><name>A</name><quantity>1</quantity><price>1</price></product>"
+        b"<product><name>A</name><quantity>2</quantity><price>1</price></product>"
+        b"<product><name>B</name><quantity>1</quantity><price>1</price></product>"
+        b"<product><name>A</name><quantity>4</quantity><price>1</price></product>"
+        b"</products></sales_data>"
+    )
+
+    batches = list(LXMLParser.batch_parsing(io.BytesIO(feed), batch_size=2))
+
+    # Повтор из другой пачки сольёт запись фида
+    assert [[(e.product.name, e.quantity.quantity) for e in b] for b in batches] == [
+        [("A", 3), ("B", 1)],
+        [("A", 4)],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_batches_invalid_xml():
+    with pytest.raises(ValueError, match="Invalid XML format"):
+        async for _ in get_parser_engine("tree").iter_batches(
+            source=io.BytesIO(b'<sales_data date="2024-01-01"><product>')
+        ):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_target_engine_batches_before_end_of_feed(monkeypatch):
+    monkeypatch.setattr(parser_engines, "FEED_READ_SIZE", 64)
+    feed = (
+        b'<sales_data date="2024-01-01"><products>'
+        + b"".join(
+            b"<product><name>P%d</name><quantity>1</quantity><price>1</price></product>"
+            % number
+            for number in range(20)
+        )
+        + b"</products></sales_data>"
+    )
+    source = io.BytesIO(feed)
+
+    batches = get_parser_engine("target").batches(source, batch_size=4)
+    first = next(batches)
+
+    # Первая пачка готова, когда прочитано только начало фида
+    assert [entity.product.name for entity in first] == ["P0", "P1", "P2", "P3"]
+    assert source.tell() < len(feed)
+    assert [len(batch) for batch in batches] == [4, 4, 4, 4]